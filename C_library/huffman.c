@@ -0,0 +1,149 @@
+#include "huffman.h"
+
+/**
+ * word_at - function that returns the 32 bit big endian word of the
+ * bytes data[byte:byte + 4]
+ * @data: the unstuffed entropy coded data
+ * @size: the number of bytes of data
+ * @byte: the index of the first byte
+ *
+ * Return: the word. Bytes past the end of the data read as 0
+*/
+static uint32_t word_at(const unsigned char *data, long size, long byte)
+{
+	uint32_t word = 0;
+	int k;
+
+	if (byte + 4 <= size)
+		return (((uint32_t)data[byte] << 24) |
+			((uint32_t)data[byte + 1] << 16) |
+			((uint32_t)data[byte + 2] << 8) | data[byte + 3]);
+	for (k = 0; k < 4; k++)
+	{
+		word <<= 8;
+		if (byte + k < size)
+			word |= data[byte + k];
+	}
+	return (word);
+}
+
+/**
+ * extend - function that returns the value of the size extra bits
+ * that follow a code
+ * @data: the unstuffed entropy coded data
+ * @size: the number of bytes of data
+ * @p: the bit position of the extra bits
+ * @bits: the number of extra bits (1 to 16)
+ *
+ * Return: the signed value of the bits
+*/
+static int32_t extend(const unsigned char *data, long size, long p,
+		      int bits)
+{
+	int32_t value;
+
+	value = (word_at(data, size, p >> 3) >> (32 - bits - (p & 7))) &
+		((1u << bits) - 1);
+	if (value < (1 << (bits - 1)))
+		value -= (1 << bits) - 1;
+	return (value);
+}
+
+/**
+ * decode_interval - function that Huffman decodes the blocks of one
+ * restart interval (the DC predictors start at 0)
+ * @data: the unstuffed entropy coded data of the interval
+ * @size: the number of bytes of data
+ * @owners: the scan component of every block in coding order
+ * @count: the number of blocks
+ * @out: the count X 64 zigzag coefficients (zeroed by the caller)
+ * @luts: the DC and the AC lookup tables of every scan component,
+ * tables X 2 X LUT_SIZE entries (see fileIO/jpeg_reader.py
+ * lookup_table)
+ * @tables: the number of scan components
+ *
+ * Return: 0 on success or -1 if the data is corrupt
+*/
+int decode_interval(const unsigned char *data, long size,
+		    const int64_t *owners, long count, int16_t *out,
+		    const int32_t *luts, int tables)
+{
+	int32_t predictors[MAX_TABLES] = {0};
+	const int32_t *dc_lut, *ac_lut;
+	int32_t entry, value;
+	long n, p = 0, limit = size * 8;
+	int c, k, bits, symbol;
+	int16_t *block;
+
+	if (tables < 1 || tables > MAX_TABLES)
+		return (-1);
+	for (n = 0; n < count; n++)
+	{
+		c = (int)owners[n];
+		if (c < 0 || c >= tables)
+			return (-1);
+		dc_lut = luts + (long)c * 2 * LUT_SIZE;
+		ac_lut = dc_lut + LUT_SIZE;
+		block = out + n * BLOCK_SIZE;
+
+		/* DC difference */
+		entry = dc_lut[(word_at(data, size, p >> 3) >>
+				(16 - (p & 7))) & 0xFFFF];
+		if (!entry)
+			return (-1);
+		bits = entry & 255;
+		if (bits & 32)
+		{
+			p += bits & 31;
+			symbol = entry >> 8;
+			if (symbol > 11)
+				return (-1);
+			if (symbol)
+				predictors[c] += extend(data, size, p, symbol);
+			p += symbol;
+		}
+		else
+		{
+			p += bits;
+			predictors[c] += entry >> 8;
+		}
+		block[0] = (int16_t)predictors[c];
+
+		/* Run length coded AC coefficients */
+		for (k = 1; k < BLOCK_SIZE;)
+		{
+			entry = ac_lut[(word_at(data, size, p >> 3) >>
+					(16 - (p & 7))) & 0xFFFF];
+			value = entry >> 16;
+			if (value)
+			{
+				p += entry & 255;
+				k += (entry >> 8) & 255;
+				if (k > BLOCK_SIZE - 1)
+					return (-1);
+				block[k++] = (int16_t)value;
+				continue;
+			}
+			if (!entry)
+				return (-1);
+			p += entry & 255;
+			symbol = entry >> 8;
+			if (symbol & 15)
+			{
+				k += symbol >> 4;
+				if (k > BLOCK_SIZE - 1)
+					return (-1);
+				block[k++] = (int16_t)extend(data, size, p,
+							     symbol & 15);
+				p += symbol & 15;
+			}
+			else if (symbol == 0xF0)
+				k += 16;
+			else
+				break;
+		}
+		if (p > limit)
+			return (-1);
+	}
+	return (0);
+}
@@ -0,0 +1,14 @@
+#ifndef HUFFMAN_H
+#define HUFFMAN_H
+
+#include <stdint.h>
+
+#define BLOCK_SIZE 64
+#define LUT_SIZE 65536
+#define MAX_TABLES 4
+
+int decode_interval(const unsigned char *data, long size,
+		    const int64_t *owners, long count, int16_t *out,
+		    const int32_t *luts, int tables);
+
+#endif /*End of Header*/
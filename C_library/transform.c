@@ -0,0 +1,328 @@
+#include "transform.h"
+
+/*
+ * Rounds a double to the nearest integer with halves to even (as rint
+ * in the default rounding mode) for every abs(x) < 2 ** 51, without
+ * a call to the math library
+*/
+#define ROUND_MAGIC 6755399441055744.0
+#define ROUND(x) (((x) + ROUND_MAGIC) - ROUND_MAGIC)
+
+/**
+ * fdct_points - function that applies the forward DCT to 8 points
+ * @in: the first point
+ * @out: the first coefficient
+ * @step: the distance between two points (and two coefficients)
+ * @cosine: the 8X8 DCT matrix T (row major)
+ *
+ * Description: the rows of T are even or odd, so the even rows
+ * multiply the sums and the odd rows the differences of the points
+ * k and 7 - k, which halves the multiplications of T * points
+*/
+static void fdct_points(const double *in, double *out, int step,
+			const double *cosine)
+{
+	double sum[4], diff[4];
+	double even, odd;
+	int k, u;
+
+	for (k = 0; k < 4; k++)
+	{
+		sum[k] = in[k * step] + in[(7 - k) * step];
+		diff[k] = in[k * step] - in[(7 - k) * step];
+	}
+	for (u = 0; u < BLOCK; u += 2)
+	{
+		even = odd = 0;
+		for (k = 0; k < 4; k++)
+		{
+			even += cosine[u * BLOCK + k] * sum[k];
+			odd += cosine[(u + 1) * BLOCK + k] * diff[k];
+		}
+		out[u * step] = even;
+		out[(u + 1) * step] = odd;
+	}
+}
+
+/**
+ * idct_points - function that applies the inverse DCT to 8 coefficients
+ * @in: the first coefficient
+ * @out: the first point
+ * @step: the distance between two coefficients (and two points)
+ * @cosine: the 8X8 DCT matrix T (row major)
+ *
+ * Description: points k and 7 - k are the sum and the difference of
+ * the even and the odd coefficient terms of T' * coefficients
+*/
+static void idct_points(const double *in, double *out, int step,
+			const double *cosine)
+{
+	double even, odd;
+	int k, u;
+
+	for (k = 0; k < 4; k++)
+	{
+		even = odd = 0;
+		for (u = 0; u < BLOCK; u += 2)
+		{
+			even += cosine[u * BLOCK + k] * in[u * step];
+			odd += cosine[(u + 1) * BLOCK + k] * in[(u + 1) * step];
+		}
+		out[k * step] = even + odd;
+		out[(7 - k) * step] = even - odd;
+	}
+}
+
+/**
+ * fdct_block - function that applies the forward DCT to an 8X8 block
+ * @block: the 64 samples (row major), replaced by the coefficients
+ * @cosine: the 8X8 DCT matrix T (row major)
+ *
+ * Description: block = T * block * T', the rows then the columns
+*/
+static void fdct_block(double *block, const double *cosine)
+{
+	double tmp[BLOCK_SIZE];
+	int i;
+
+	for (i = 0; i < BLOCK; i++)
+		fdct_points(block + i * BLOCK, tmp + i * BLOCK, 1, cosine);
+	for (i = 0; i < BLOCK; i++)
+		fdct_points(tmp + i, block + i, BLOCK, cosine);
+}
+
+/**
+ * idct_block - function that applies the inverse DCT to an 8X8 block
+ * @block: the 64 coefficients (row major), replaced by the samples
+ * @cosine: the 8X8 DCT matrix T (row major)
+ *
+ * Description: block = T' * block * T, the rows then the columns
+*/
+static void idct_block(double *block, const double *cosine)
+{
+	double tmp[BLOCK_SIZE];
+	int i;
+
+	for (i = 0; i < BLOCK; i++)
+		idct_points(block + i * BLOCK, tmp + i * BLOCK, 1, cosine);
+	for (i = 0; i < BLOCK; i++)
+		idct_points(tmp + i, block + i, BLOCK, cosine);
+}
+
+/**
+ * fdct_blocks - function that applies the forward DCT to 8X8 blocks
+ * @blocks: count contiguous 8X8 blocks, transformed in place
+ * @count: the number of blocks
+ * @cosine: the 8X8 DCT matrix (row major)
+*/
+void fdct_blocks(double *blocks, long count, const double *cosine)
+{
+	long i;
+
+	for (i = 0; i < count; i++)
+		fdct_block(blocks + i * BLOCK_SIZE, cosine);
+}
+
+/**
+ * idct_blocks - function that applies the inverse DCT to 8X8 blocks
+ * @blocks: count contiguous 8X8 blocks, transformed in place
+ * @count: the number of blocks
+ * @cosine: the 8X8 DCT matrix (row major)
+*/
+void idct_blocks(double *blocks, long count, const double *cosine)
+{
+	long i;
+
+	for (i = 0; i < count; i++)
+		idct_block(blocks + i * BLOCK_SIZE, cosine);
+}
+
+/**
+ * quantize_blocks - function that quantizes 8X8 blocks
+ * @blocks: count contiguous 8X8 blocks, quantized in place
+ * @count: the number of blocks
+ * @reciprocal: the 8X8 reciprocals of the quantization table
+ *
+ * Description: halves are rounded to even (as numpy.round)
+*/
+void quantize_blocks(double *blocks, long count, const double *reciprocal)
+{
+	long i;
+	int k;
+
+	for (i = 0; i < count; i++, blocks += BLOCK_SIZE)
+		for (k = 0; k < BLOCK_SIZE; k++)
+			blocks[k] = ROUND(blocks[k] * reciprocal[k]);
+}
+
+/**
+ * dequantize_blocks - function that dequantizes 8X8 blocks
+ * @blocks: count contiguous 8X8 blocks, dequantized in place
+ * @count: the number of blocks
+ * @multiplier: the 8X8 quantization table
+*/
+void dequantize_blocks(double *blocks, long count, const double *multiplier)
+{
+	long i;
+	int k;
+
+	for (i = 0; i < count; i++, blocks += BLOCK_SIZE)
+		for (k = 0; k < BLOCK_SIZE; k++)
+			blocks[k] = ROUND(blocks[k] * multiplier[k]);
+}
+
+/* Copies the 8X8 block at start of a plane of type to doubles */
+#define LOAD(type) \
+	for (i = 0; i < BLOCK; i++) \
+		for (j = 0; j < BLOCK; j++) \
+			block[i * BLOCK + j] = \
+				((const type *)plane)[start + i * cols + j]
+
+/* Writes 8X8 doubles to the block at start of a plane of type */
+#define STORE(type, value) \
+	for (i = 0; i < BLOCK; i++) \
+		for (j = 0; j < BLOCK; j++) \
+			((type *)plane)[start + i * cols + j] = \
+				(type)value(block[i * BLOCK + j])
+
+#define KEEP(x) (x)
+
+/**
+ * load_block - function that copies an 8X8 block of a plane to doubles
+ * @plane: the plane
+ * @kind: the element type of the plane (KIND_*)
+ * @start: the index of the first sample of the block
+ * @cols: the number of columns of the plane
+ * @block: the 64 doubles that receive the samples
+*/
+static void load_block(const void *plane, int kind, long start, long cols,
+		       double *block)
+{
+	long i, j;
+
+	switch (kind)
+	{
+	case KIND_FLOAT64:
+		LOAD(double);
+		break;
+	case KIND_FLOAT32:
+		LOAD(float);
+		break;
+	case KIND_INT16:
+		LOAD(int16_t);
+		break;
+	case KIND_INT32:
+		LOAD(int32_t);
+		break;
+	default:
+		LOAD(int64_t);
+	}
+}
+
+/**
+ * store_block - function that writes an 8X8 block of doubles to a plane
+ * @plane: the plane
+ * @kind: the element type of the plane (KIND_*)
+ * @start: the index of the first sample of the block
+ * @cols: the number of columns of the plane
+ * @block: the 64 doubles
+ * @round_samples: 1 to round values written to integer planes,
+ * 0 to truncate them (as a numpy assignment)
+*/
+static void store_block(void *plane, int kind, long start, long cols,
+			const double *block, int round_samples)
+{
+	long i, j;
+
+	switch (kind)
+	{
+	case KIND_FLOAT64:
+		STORE(double, KEEP);
+		break;
+	case KIND_FLOAT32:
+		STORE(float, KEEP);
+		break;
+	case KIND_INT16:
+		if (round_samples)
+			STORE(int16_t, rint);
+		else
+			STORE(int16_t, KEEP);
+		break;
+	case KIND_INT32:
+		if (round_samples)
+			STORE(int32_t, rint);
+		else
+			STORE(int32_t, KEEP);
+		break;
+	default:
+		if (round_samples)
+			STORE(int64_t, rint);
+		else
+			STORE(int64_t, KEEP);
+	}
+}
+
+/**
+ * compress_plane - function that applies the DCT and the quantization
+ * to every 8X8 block of a plane in place
+ * @plane: the C contiguous plane
+ * @kind: the element type of the plane (KIND_*)
+ * @rows: the number of rows of the plane (a multiple of 8)
+ * @cols: the number of columns of the plane (a multiple of 8)
+ * @cosine: the 8X8 DCT matrix (row major)
+ * @reciprocal: the 8X8 reciprocals of the quantization table
+ *
+ * Return: 0 on success or -1 if the plane is not made of 8X8 blocks
+*/
+int compress_plane(void *plane, int kind, long rows, long cols,
+		   const double *cosine, const double *reciprocal)
+{
+	double block[BLOCK_SIZE];
+	long r, c;
+
+	if (rows % BLOCK || cols % BLOCK || kind < 0 || kind > KIND_INT64)
+		return (-1);
+	for (r = 0; r < rows; r += BLOCK)
+		for (c = 0; c < cols; c += BLOCK)
+		{
+			load_block(plane, kind, r * cols + c, cols, block);
+			fdct_block(block, cosine);
+			quantize_blocks(block, 1, reciprocal);
+			store_block(plane, kind, r * cols + c, cols, block, 0);
+		}
+	return (0);
+}
+
+/**
+ * decompress_plane - function that applies the dequantization and the
+ * inverse DCT to every 8X8 block of a plane in place
+ * @plane: the C contiguous plane
+ * @kind: the element type of the plane (KIND_*)
+ * @rows: the number of rows of the plane (a multiple of 8)
+ * @cols: the number of columns of the plane (a multiple of 8)
+ * @cosine: the 8X8 DCT matrix (row major)
+ * @multiplier: the 8X8 quantization table
+ * @round_samples: 1 to round samples written to integer planes
+ *
+ * Return: 0 on success or -1 if the plane is not made of 8X8 blocks
+*/
+int decompress_plane(void *plane, int kind, long rows, long cols,
+		     const double *cosine, const double *multiplier,
+		     int round_samples)
+{
+	double block[BLOCK_SIZE];
+	long r, c;
+
+	if (rows % BLOCK || cols % BLOCK || kind < 0 || kind > KIND_INT64)
+		return (-1);
+	for (r = 0; r < rows; r += BLOCK)
+		for (c = 0; c < cols; c += BLOCK)
+		{
+			load_block(plane, kind, r * cols + c, cols, block);
+			dequantize_blocks(block, 1, multiplier);
+			idct_block(block, cosine);
+			store_block(plane, kind, r * cols + c, cols, block,
+				    round_samples);
+		}
+	return (0);
+}
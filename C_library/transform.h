@@ -0,0 +1,27 @@
+#ifndef TRANSFORM_H
+#define TRANSFORM_H
+
+#include <math.h>
+#include <stdint.h>
+
+#define BLOCK 8
+#define BLOCK_SIZE 64
+
+/* Element types of the planes (see util_func/native.py) */
+#define KIND_FLOAT64 0
+#define KIND_FLOAT32 1
+#define KIND_INT16 2
+#define KIND_INT32 3
+#define KIND_INT64 4
+
+void fdct_blocks(double *blocks, long count, const double *cosine);
+void idct_blocks(double *blocks, long count, const double *cosine);
+void quantize_blocks(double *blocks, long count, const double *reciprocal);
+void dequantize_blocks(double *blocks, long count, const double *multiplier);
+int compress_plane(void *plane, int kind, long rows, long cols,
+		   const double *cosine, const double *reciprocal);
+int decompress_plane(void *plane, int kind, long rows, long cols,
+		     const double *cosine, const double *multiplier,
+		     int round_samples);
+
+#endif /*End of Header*/
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+"""
+A script that times the stages of the codec on the images in the
+jpeg_images/ folder
+
+USAGE: python3 -m benchmarks.bench_codec [ image_folder ] [ quality ]
+
+The batched Encoder.compression and Decoder.decompression are
+compared with the reference per block loops (FDCT and quantize or
+de_quantize and IDCT called for every 8X8 block) and the speedup is
+printed for every image
+"""
+
+# Python modules
+import os
+import sys
+from time import perf_counter
+import numpy as np
+from PIL import Image
+
+# Modules (functions) from codec package
+from codec import Encoder
+from codec import Decoder
+
+# Modules (functions) from util_func package
+from util_func.transform import FDCT
+from util_func.transform import IDCT
+from util_func.quantization import quantize
+from util_func.quantization import de_quantize
+
+
+def per_block_compression(planes, quality, bits=8):
+    """
+    The reference per block implementation of Encoder.compression
+
+    Parameters
+    ----------
+    planes : tuple
+        The padded and level shifted Y, Cr, Cb planes
+    quality : int
+        The compression quality
+
+    Returns
+    -------
+    tuple:
+        The quantized Y, Cr, Cb planes
+    """
+    planes = tuple(plane.copy() for plane in planes)
+    for plane in planes:
+        for r in range(0, plane.shape[0], bits):
+            for c in range(0, plane.shape[1], bits):
+                mat_8 = plane[r:r + bits, c:c + bits]
+                dct = FDCT(mat_8)
+                plane[r:r + bits, c:c + bits] = quantize(dct, quality,
+                                                         channel='luma')
+    return (planes)
+
+
+def per_block_decompression(planes, quality, bits=8):
+    """
+    The reference per block implementation of Decoder.decompression
+
+    Parameters
+    ----------
+    planes : tuple
+        The quantized Y, Cr, Cb planes
+    quality : int
+        The compression quality
+
+    Returns
+    -------
+    tuple:
+        The decompressed (still padded and level shifted) planes
+    """
+    planes = tuple(plane.copy() for plane in planes)
+    for plane in planes:
+        for r in range(0, plane.shape[0], bits):
+            for c in range(0, plane.shape[1], bits):
+                mat_8 = plane[r:r + bits, c:c + bits]
+                dequant = de_quantize(mat_8, quality, channel='luma')
+                plane[r:r + bits, c:c + bits] = IDCT(dequant)
+    return (planes)
+
+
+def prepare(image_array, quality):
+    """
+    Runs the encoder stages that come before compression
+
+    Returns
+    -------
+    Encoder:
+        encoder that is ready for compression
+    """
+    encode = Encoder(image_array, quality, backend='matrix')
+    encode.RGB2YCrCb()
+    encode.sampling()
+    encode.padding()
+    return (encode)
+
+
+def timed(func, *args):
+    """
+    Returns the result of func and the seconds it took
+    """
+    start = perf_counter()
+    result = func(*args)
+    return (result, perf_counter() - start)
+
+
+def bench_image(filename, quality):
+    """
+    Times the per block and the batched paths of one image
+
+    Returns
+    -------
+    dict:
+        pixels, encode and decode timings (per_block, batched) and
+        whether the batched outputs are identical to the reference
+    """
+    with Image.open(filename) as img:
+        if img.format != 'JPEG' or img.mode != 'RGB':
+            return None
+        image_array = np.array(img)
+
+    encode = prepare(image_array, quality)
+    reference, t_block = timed(per_block_compression,
+                               (encode.Y, encode.Cr, encode.Cb), quality)
+    _, t_batch = timed(encode.compression)
+    planes = (encode.Y, encode.Cr, encode.Cb)
+    identical = all(np.array_equal(a, b) for a, b in zip(reference, planes))
+
+    reference, d_block = timed(per_block_decompression, planes, quality)
+    decode = Decoder(*planes, encode.width, encode.height,
+                     encode.paddedWidth, encode.paddedHeight, quality,
+                     backend='matrix')
+    _, d_batch = timed(decode.decompression)
+    decoded = (decode.Y, decode.Cr, decode.Cb)
+    identical = identical and all(np.array_equal(a, b) for a, b
+                                  in zip(reference, decoded))
+
+    return {
+        'pixels': image_array.shape[0] * image_array.shape[1],
+        'encode': (t_block, t_batch),
+        'decode': (d_block, d_batch),
+        'identical': identical
+    }
+
+
+def main(folder='./jpeg_images', quality=50):
+    """
+    Prints the compression timings for all images in folder
+    """
+    header = f"{'image': <18} {'pixels': >8} {'encode': >16}" \
+             f" {'decode': >16} {'same': >5}"
+    print(header)
+    print('-' * len(header))
+    totals = {'encode': [0, 0], 'decode': [0, 0]}
+    for name in sorted(os.listdir(folder)):
+        result = bench_image(os.path.join(folder, name), quality)
+        if not result:
+            continue
+        line = f"{name[0:18]: <18} {result['pixels']: >8}"
+        for stage in ('encode', 'decode'):
+            t_block, t_batch = result[stage]
+            totals[stage][0] += t_block
+            totals[stage][1] += t_batch
+            line += f" {t_block: >6.3f}/{t_batch: <6.3f}" \
+                    f"{t_block / max(t_batch, 1e-9): >3.0f}x"
+        print(f"{line} {str(result['identical']): >5}")
+    print('-' * len(header))
+    line = f"{'total (per block/batched)': <27}"
+    for stage in ('encode', 'decode'):
+        t_block, t_batch = totals[stage]
+        line += f" {t_block: >6.3f}/{t_batch: <6.3f}" \
+                f"{t_block / max(t_batch, 1e-9): >3.0f}x"
+    print(line)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    folder = args[0] if args else './jpeg_images'
+    quality = int(args[1]) if len(args) > 1 else 50
+    main(folder, quality)
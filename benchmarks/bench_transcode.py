@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""
+A script that times the transcode path of picture against the pixel
+path on the JPEG images in the jpeg_images/ folder
+
+USAGE: python3 -m benchmarks.bench_transcode [ image_folder ] [ quality ]
+
+For every baseline JPEG image the coefficients are read and
+requantized (transcode_image) with the Huffman decoder of C_library
+and with the Python decoder, and the image is decoded to pixels and
+compressed again (compress_image) with the subsampling of the input.
+Each path ends with write_jpeg into memory, so the times do not
+include the disk. The best time of RUNS runs is kept (the Huffman
+lookup tables are built in the first run). Progressive images can
+not be transcoded and are listed with the time of the pixel path
+only
+"""
+
+# Python modules
+import io
+import os
+import sys
+from time import perf_counter
+from unittest import mock
+
+# Modules (functions) from fileIO package
+from fileIO.compress import compress_image
+from fileIO.compress import transcode_image
+from fileIO.jpeg_reader import JpegReader
+from fileIO.jpeg_writer import write_jpeg
+
+# Modules (functions) from util_func package
+from util_func.native import LIBRARY
+
+# The number of times every path is run
+RUNS = 3
+
+
+def timed_write(func, *args):
+    """
+    Returns the best seconds func and write_jpeg of its planes took,
+    and the size of the JPEG file
+    """
+    best = None
+    for _ in range(RUNS):
+        start = perf_counter()
+        image_tuple, input_details = func(*args)
+        jpeg = io.BytesIO()
+        write_jpeg(jpeg, image_tuple, input_details)
+        seconds = perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return (best, len(jpeg.getvalue()))
+
+
+def bench_image(filename, quality):
+    """
+    Times the paths of one image
+
+    Returns
+    -------
+    dict or None:
+        pixels, the subsampling and the (seconds, bytes) of the pixel
+        path and of the transcode path with the C and the Python
+        decoders (None for progressive images). None if the file is
+        not a YCbCr JPEG file
+    """
+    try:
+        reader = JpegReader(filename)
+    except ValueError:
+        return (None)
+    subsampling = reader.subsampling
+    if subsampling is None:
+        return (None)
+    result = {
+        'pixels': reader.lines * reader.samples,
+        'subsampling': subsampling,
+        'pixel': timed_write(compress_image, filename, quality, 'standard',
+                             None, None, subsampling),
+        'native': None,
+        'python': None
+    }
+    if not reader.sequential:
+        return (result)
+    if LIBRARY is not None:
+        result['native'] = timed_write(transcode_image, filename, quality)
+    # transcode_image refuses the Python decoder, so JpegReader is
+    # given no library and transcode_image a dummy one
+    with mock.patch('fileIO.jpeg_reader.LIBRARY', None), \
+            mock.patch('fileIO.compress.LIBRARY', True):
+        result['python'] = timed_write(transcode_image, filename, quality)
+    return (result)
+
+
+def main(folder='./jpeg_images', quality=50):
+    """
+    Prints the timings of the paths for all images in folder
+    """
+    header = f"{'image': <18} {'pixels': >8} {'mode': >6} {'pixel': >7}" \
+             f" {'C': >7} {'python': >7} {'speedup': >8}"
+    print(header)
+    print('-' * len(header))
+    for name in sorted(os.listdir(folder)):
+        result = bench_image(os.path.join(folder, name), quality)
+        if not result:
+            continue
+        pixel = result['pixel'][0]
+        line = f"{name[0:18]: <18} {result['pixels']: >8}" \
+               f" {result['subsampling']: >6} {pixel: >7.3f}"
+        if result['python'] is None:
+            print(f"{line} {'progressive (pixel path)': >24}")
+            continue
+        native = result['native'][0] if result['native'] else None
+        line += f" {native: >7.3f}" if native else f" {'-': >7}"
+        line += f" {result['python'][0]: >7.3f}"
+        if native:
+            line += f" {pixel / max(native, 1e-9): >7.1f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    folder = args[0] if args else './jpeg_images'
+    quality = int(args[1]) if len(args) > 1 else 50
+    main(folder, quality)
@@ -12,6 +12,8 @@ Stage in Decoding
     Reverse Padding:
         Bringing the array back to its original form
     Reverse_Sampling (Up Sampling)
+        Subsampled chroma channels are brought back to full
+        resolution by repeating each value
     RGB Conversion
 """
 
@@ -19,8 +21,22 @@ Stage in Decoding
 import numpy as np
 
 # Modules (functions) from util_func package
-from util_func.transform import IDCT
-from util_func.quantization import de_quantize
+from util_func.blocks import get_blocks
+from util_func.blocks import put_blocks
+from util_func.blocks import block_view
+from util_func.blocks import iter_bands
+from util_func.memory import get_dtype_policy
+from util_func.memory import store
+from util_func.memory import allocate
+from util_func.memory import use_memmap
+from util_func.workers import WorkerPool
+from util_func.sampling import get_factors
+from util_func.sampling import chroma_dimensions
+from util_func.sampling import upsample
+from util_func.color import COLOR_ROWS
+from util_func.color import ycrcb_to_rgb
+from util_func.transform import get_backend
+from util_func.quantization import get_quant_table
 
 
 class Decoder:
@@ -50,7 +66,10 @@ class Decoder:
     bits = 8
 
     def __init__(self, Y, Cr, Cb, width, height,
-                 paddedWidth, paddedHeight, quality=50):
+                 paddedWidth, paddedHeight, quality=50,
+                 table_set='standard', backend=None, dtype=None,
+                 subsampling='4:4:4', memmap=None, workers=1,
+                 uint8=False):
         """
         Instance attributes
 
@@ -72,8 +91,45 @@ class Decoder:
             The padded height of the arrays
         quality: variable int
             The quality needed for image compression
+        table_set: str
+            The name of the quantization table set used to compress
+            the arrays
+        backend: str or None
+            The name of the DCT transform backend (see
+            util_func.transform.BACKENDS). None uses DEFAULT_BACKEND
+        dtype: str or None
+            The dtype policy of the arrays ('float32' or 'int16', see
+            util_func.memory.DTYPE_POLICIES). With a policy the
+            arrays are decompressed in place and the RGB array is
+            written directly as uint8
+        subsampling: str
+            The chroma subsampling mode the arrays were compressed
+            with ('4:4:4', '4:2:2' or '4:2:0')
+        memmap: bool or None
+            True to write the RGB array into a memory mapped scratch
+            file (see util_func.memory.allocate). None maps the array
+            of images with at least MEMMAP_PIXELS pixels. A mapped
+            image uses the float32 policy if dtype is None
+        workers: int or None
+            The number of threads that transform the bands of the
+            planes in decompression. None uses every CPU
+        uint8: bool
+            True to write the RGB array directly as uint8 without a
+            dtype policy too (the float64 planes are converted as the
+            planes of a policy, see YCrCb2RGB). False keeps the float
+            RGB array of the formula when there is no policy
         """
         self.__quality = quality
+        self.__table_set = table_set
+        self.__backend = get_backend(backend)
+        self.__policy = get_dtype_policy(dtype)
+        self.__mapped = use_memmap(width * height, memmap)
+        self.__workers = workers
+        if self.__mapped and not self.__policy:
+            self.__policy = get_dtype_policy('float32')
+        # The fixed point conversion to uint8 in YCrCb2RGB
+        self.__fused = bool(self.__policy) or uint8
+        self.__factors = get_factors(subsampling)
         self.__paddedWidth = paddedWidth
         self.__paddedHeight = paddedHeight
         self.__width = width
@@ -87,48 +143,87 @@ class Decoder:
     def array(self):
         return self.__array
 
+    @property
+    def Y(self):
+        return self.__Y
+
+    @property
+    def Cr(self):
+        return self.__Cr
+
+    @property
+    def Cb(self):
+        return self.__Cb
+
     def decompression(self) -> None:
         """
         A function that decompresses the image by applying dct transform
         and then quantization
         """
 
-        # Divide the width and height into 8X8 sections
-        row_section = self.__paddedWidth // self.bits
-        col_section = self.__paddedHeight // self.bits
-
-        # decompress and perfom dct transform
-        for row in range(row_section):
-            r_start = row * self.bits
-            r_end = r_start + self.bits
-            for col in range(col_section):
-                c_start = col * self.bits
-                c_end = c_start + self.bits
-
-                # ================================ #
-                # Get the 8X8 slice of the array   #
-                # Dequantize                       #
-                # Perform IDCT                     #
-                # Copy into the array channel      #
-                # ================================ #
-
-                # For Y channel
-                mat_8 = self.__Y[r_start:r_end, c_start:c_end]
-                dequant = de_quantize(mat_8, self.__quality, channel='luma')
-                idct = IDCT(dequant)
-                self.__Y[r_start:r_end, c_start:c_end] = idct
-
-                # For Cr channel
-                mat_8 = self.__Cr[r_start:r_end, c_start:c_end]
-                dequant = de_quantize(mat_8, self.__quality, channel='luma')
-                idct = IDCT(dequant)
-                self.__Cr[r_start:r_end, c_start:c_end] = idct
-
-                # For Cb channel
-                mat_8 = self.__Cb[r_start:r_end, c_start:c_end]
-                dequant = de_quantize(mat_8, self.__quality, channel='luma')
-                idct = IDCT(dequant)
-                self.__Cb[r_start:r_end, c_start:c_end] = idct
+        # ================================== #
+        # Get all 8X8 blocks of the channel  #
+        # Dequantize                         #
+        # Perform IDCT                       #
+        # Copy back into the array channel   #
+        # ================================== #
+        with WorkerPool(self.__workers) as pool:
+            self.__Y = self.__decompress_plane(self.__Y, 'luma', pool)
+            self.__Cr = self.__decompress_plane(self.__Cr, 'luma', pool)
+            self.__Cb = self.__decompress_plane(self.__Cb, 'luma', pool)
+
+    def __decompress_plane(self, plane, channel, pool):
+        """
+        Applies dequantization and idct to every 8X8 block of a
+        padded color channel in one batched operation
+
+        The result is written in place into the channel array, so no
+        new full size plane is allocated for the output
+
+        Parameters
+        ----------
+        plane : ndarray
+            2D padded array of a quantized color channel
+        channel : str ['luma' or 'chroma']
+            The quantization table to use for the channel
+        pool : WorkerPool
+            The threads that transform the bands of the plane
+
+        Returns
+        -------
+        ndarray:
+            The channel with each 8X8 block decompressed
+        """
+        # Contiguous planes are used as they are (memory mapped planes
+        # stay mapped)
+        if not plane.flags.c_contiguous:
+            plane = np.ascontiguousarray(plane)
+        table = get_quant_table(self.__quality, channel, self.__table_set,
+                                self.__backend.name)
+        work = self.__policy.work if self.__policy else np.float64
+        # Integer samples go to integer backends without a float copy
+        if (self.__backend.integer
+                and np.issubdtype(plane.dtype, np.integer)):
+            work = np.int32
+
+        # The plane is processed in bands so that the temporary block
+        # arrays stay small. Every band is written in place, so the
+        # bands can run on threads (numpy and ctypes release the GIL)
+        def decompress_band(band):
+            # Backends with plane kernels work on the band directly
+            if self.__backend.decompress_plane(band, table,
+                                               bool(self.__policy)):
+                return
+            blocks = get_blocks(band, self.bits, work)
+            dequant = table.de_quantize(blocks)
+            idct = self.__backend.inverse(dequant)
+            if self.__policy:
+                store(block_view(band, self.bits), idct)
+            else:
+                put_blocks(band, idct, self.bits)
+
+        list(pool.map(decompress_band, iter_bands(plane, self.bits)))
+        return (plane)
 
     def reverse_padding(self) -> None:
         """
@@ -136,8 +231,9 @@ class Decoder:
         color channel array to the original dimension
         """
         self.__Y = self.__Y[0:self.__width, 0:self.__height]
-        self.__Cr = self.__Cr[0:self.__width, 0:self.__height]
-        self.__Cb = self.__Cb[0:self.__width, 0:self.__height]
+        w, h = chroma_dimensions(self.__width, self.__height, self.__factors)
+        self.__Cr = self.__Cr[0:w, 0:h]
+        self.__Cb = self.__Cb[0:w, 0:h]
 
     def YCrCb2RGB(self) -> None:
         """
@@ -145,24 +241,56 @@ class Decoder:
 
         Formular
         --------
-            $ R = Y + 1.402 * (Cr - 128)
-            $ G = Y - 0.34414 * (Cb - 128) - 0.7141 * (Cr - 128)
-            $ B = Y + 1.772 * (Cb - 128)
+            $ R = Y + 1.403 * (Cr - 128)
+            $ G = Y - 0.344 * (Cb - 128) - 0.7141 * (Cr - 128)
+            $ B = Y + 1.773 * (Cb - 128)
+
+        With a dtype policy or uint8 the uint8 RGB array is allocated
+        once (on the heap or in a scratch file) and filled COLOR_ROWS
+        rows at a time from the level shifted, subsampled planes with
+        the fixed point conversion of util_func.color.ycrcb_to_rgb,
+        which also does the work of reverse_sampling. Otherwise the
+        float RGB array of the formula is kept
         """
+        if not self.__fused:
+            R = self.__Y + 1.403 * (self.__Cr - 128)
+            G = self.__Y - 0.344 * (self.__Cb - 128) - \
+                0.7141 * (self.__Cr - 128)
+            B = self.__Y + 1.773 * (self.__Cb - 128)
+            # Stack the R, G and B channels to a 3D np array
+            # and ensure values are within 0 and 255
+            self.__array = np.clip(np.stack((R, G, B), axis=-1), 0, 255)
+            return
+
+        fr = self.__factors[0]
+        width, height = self.__Y.shape
+        self.__array = allocate((width, height, 3), np.uint8, self.__mapped)
 
-        R = self.__Y + 1.403 * (self.__Cr - 128)
-        G = self.__Y - 0.344 * (self.__Cb - 128) - 0.7141 * (self.__Cr - 128)
-        B = self.__Y + 1.773 * (self.__Cb - 128)
-        # Stack the R, G and B channels to a 3D np array
-        # and ensure values are within 0 and 255
-        self.__array = np.clip(np.stack((R, G, B), axis=-1), 0, 255)
+        for start in range(0, width, COLOR_ROWS):
+            end = min(start + COLOR_ROWS, width)
+            # Chroma rows of the chunk (COLOR_ROWS is a multiple of fr)
+            rows = slice(start // fr, -(-end // fr))
+            ycrcb_to_rgb(self.__Y[start:end], self.__Cr[rows],
+                         self.__Cb[rows], self.__array[start:end],
+                         self.__factors)
 
     def reverse_sampling(self) -> None:
         """
         Function that changes the values from signed representation
-        to unsigned representation
+        to unsigned representation and upsamples subsampled chroma
+        channels
+
+        With a dtype policy or uint8 the level shift and the
+        upsampling are done chunk by chunk during the RGB conversion
+        (see YCrCb2RGB), so the planes are left as they are and no full
+        resolution chroma plane is made
         """
 
+        if self.__fused:
+            return
+
         self.__Y = self.__Y + 128
-        self.__Cr = self.__Cr + 128
-        self.__Cb = self.__Cb + 128
+        self.__Cr = upsample(self.__Cr + 128, self.__factors,
+                             self.__width, self.__height)
+        self.__Cb = upsample(self.__Cb + 128, self.__factors,
+                             self.__width, self.__height)
@@ -10,14 +10,17 @@ specify YCrCb encoded mode for the picture)
 
 STAGES IN ENCODING:
 -------------------
-    YCrCb Conversion:
+    YCrCb Conversion and Level Shifting:
         This involves transforming the image array from RGB to
         Y(luminance) and Cr, Cb (chrominance values). This method is
         skipped if the image mode is already in YCrCb mode
-    Level Shifting and Sampling:
-        Image array are transformed from 8bit unsigned to 8bit signed
-        representation by subtraction "128" from each array value
-        mat[i][j] - 128
+        The values are transformed from 8bit unsigned to 8bit signed
+        representation (mat[i][j] - 128) in the same pass, with the
+        fixed point arithmetic of util_func.color
+    Sampling:
+        The chroma (Cr and Cb) channels are subsampled to half
+        the columns (4:2:2) or half the rows and columns (4:2:0) if
+        subsampling is requested
     Padding:
         Image array are usually processed in 8x8 MCUs (minimum coded units)
         and so, both the width and height (dimensions) of the images
@@ -39,8 +42,22 @@ from math import ceil
 
 # Modules (functions) from util_func package
 from util_func.padding import pad_array
-from util_func.transform import FDCT
-from util_func.quantization import quantize
+from util_func.padding import pad_edges
+from util_func.blocks import get_blocks
+from util_func.blocks import put_blocks
+from util_func.blocks import iter_bands
+from util_func.memory import get_dtype_policy
+from util_func.memory import store
+from util_func.memory import allocate
+from util_func.memory import use_memmap
+from util_func.workers import WorkerPool
+from util_func.sampling import get_factors
+from util_func.sampling import chroma_dimensions
+from util_func.sampling import downsample
+from util_func.color import COLOR_ROWS
+from util_func.color import rgb_to_ycrcb
+from util_func.transform import get_backend
+from util_func.quantization import get_quant_table
 
 
 class Encoder():
@@ -55,18 +72,21 @@ class Encoder():
     Methods
     -------
     RGB2YCrCb:
-        Method to convert from RGB color space to YCrCb space
+        Method to convert from RGB color space to level shifted
+        YCrCb space
     padding:
         Method to implement padding
     sampling:
-        Method that shifts pixel level and implement sampling
+        Method that implements chroma subsampling
     compression
         Method that performs dct and quantization on array
     """
 
     bits = 8
 
-    def __init__(self, array, quality=50) -> None:
+    def __init__(self, array, quality=50, table_set='standard',
+                 backend=None, dtype=None, subsampling='4:4:4',
+                 memmap=None, workers=1) -> None:
         """
         Instance variables for the Encoder class
 
@@ -76,6 +96,27 @@ class Encoder():
             A 3D numpy array of image array that will be encoded
         quality : variable int
             The compression rate selected by the user
+        table_set : str
+            The name of the quantization table set (see
+            util_func.quantization.load_quant_tables)
+        backend : str or None
+            The name of the DCT transform backend (see
+            util_func.transform.BACKENDS). None uses DEFAULT_BACKEND
+        dtype : str or None
+            The dtype policy of the planes ('float32' or 'int16', see
+            util_func.memory.DTYPE_POLICIES). None keeps the float64
+            planes
+        subsampling : str
+            The chroma subsampling mode ('4:4:4', '4:2:2' or '4:2:0',
+            see util_func.sampling.SUBSAMPLING)
+        memmap : bool or None
+            True to back the Y, Cr, Cb planes with memory mapped
+            scratch files (see util_func.memory.allocate). None maps
+            the planes of images with at least MEMMAP_PIXELS pixels.
+            Mapped planes use the float32 policy if dtype is None
+        workers : int or None
+            The number of threads that transform the bands of the
+            planes in compression. None uses every CPU
         width : int
             The width of the image
         height : int
@@ -87,6 +128,11 @@ class Encoder():
         """
         self.__array = array
         self.__quality = quality
+        self.__table_set = table_set
+        self.__backend = get_backend(backend)
+        self.__policy = get_dtype_policy(dtype)
+        self.__subsampling = subsampling
+        self.__factors = get_factors(subsampling)
 
         if (np.any(array) and isinstance(array, np.ndarray)
                 and array.ndim >= 2):
@@ -95,6 +141,12 @@ class Encoder():
         else:
             raise ValueError('Cannot determine array dimensions')
 
+        # Mapped planes are filled in place, which needs a policy
+        self.__mapped = use_memmap(self.__width * self.__height, memmap)
+        self.__workers = workers
+        if self.__mapped and not self.__policy:
+            self.__policy = get_dtype_policy('float32')
+
         self.__paddedWidth = self.__paddedHeight = 0
         self.__Cr = self.__Cb = self.__Y = None
 
@@ -126,11 +178,23 @@ class Encoder():
     def paddedHeight(self):
         return self.__paddedHeight
 
+    @property
+    def subsampling(self):
+        return self.__subsampling
+
+    @property
+    def memmap(self):
+        return self.__mapped
+
     def padding(self, section=8) -> None:
         """
         A function that pads the array and ensures the width and height
         of the array are in multiples of 8
 
+        With chroma subsampling the luma channel is padded to multiples
+        of the MCU dimensions (section * subsampling factor) and the
+        chroma channels to the MCU dimensions divided by the factors
+
         Parameters
         ----------
         section : int
@@ -140,14 +204,38 @@ class Encoder():
         """
 
         # Get the padding dimensions
-        self.__paddedWidth = ceil(self.__width / section) * section
-        self.__paddedHeight = ceil(self.__height / section) * section
-        self.__Y = pad_array(self.__Y, self.__paddedWidth,
-                             self.__paddedHeight)
-        self.__Cr = pad_array(self.__Cr, self.__paddedWidth,
-                              self.__paddedHeight)
-        self.__Cb = pad_array(self.__Cb, self.__paddedWidth,
-                              self.__paddedHeight)
+        fr, fc = self.__factors
+        self.__paddedWidth = ceil(self.__width / (section * fr)) * \
+            section * fr
+        self.__paddedHeight = ceil(self.__height / (section * fc)) * \
+            section * fc
+        luma_shape = (self.__paddedWidth, self.__paddedHeight)
+        chroma_shape = (self.__paddedWidth // fr, self.__paddedHeight // fc)
+        w, h = chroma_dimensions(self.__width, self.__height, self.__factors)
+
+        self.__Y = self.__pad_plane(self.__Y, self.__width, self.__height,
+                                    luma_shape)
+        self.__Cr = self.__pad_plane(self.__Cr, w, h, chroma_shape)
+        self.__Cb = self.__pad_plane(self.__Cb, w, h, chroma_shape)
+
+    def __pad_plane(self, plane, width, height, shape):
+        """
+        Pads a color channel whose data is in plane[0:width, 0:height]
+
+        Planes of a dtype policy are allocated with the padded
+        dimensions before padding and are padded in place
+
+        Returns
+        -------
+        ndarray:
+            the padded color channel
+        """
+        if not self.__policy:
+            return (pad_array(plane, *shape, plane.dtype))
+        if plane.shape == shape:
+            pad_edges(plane, width, height)
+            return (plane)
+        return (pad_array(plane[0:width, 0:height], *shape, plane.dtype))
 
     def RGB2YCrCb(self, default_mode='RBG') -> None:
         """
@@ -169,47 +257,93 @@ class Encoder():
 
             # Converting to YCrCb
             $ Y = R * 0.299  +  G * 0.587  +  B * 0.114
-            $ Cr = R * -0.1687  +  G * -0.3317  +  B * 0.5  +  128
+            $ Cb = R * -0.1687  +  G * -0.3317  +  B * 0.5  +  128
             $ Cr = R * 0.5  +  G * -0.4187  +  B * -0.0813  +  128
-        """
 
-        # Get the YCrCb
-        Y = self.__array[:, :, 0] * 0.299 + self.__array[:, :, 1] * 0.587 +\
-            self.__array[:, :, 2] * 0.114
-        Cr = self.__array[:, :, 0] * 0.5 + self.__array[:, :, 1] * -0.4187 +\
-            self.__array[:, :, 2] * -0.0813 + 128
-        Cb = self.__array[:, :, 0] * -0.1687 + self.__array[:, :, 1] *\
-            -0.3317 + self.__array[:, :, 2] * 0.5 + 128
+            # Level shifting
+            $ Y, Cr, Cb = Y - 128, Cr - 128, Cb - 128
 
-        # Ensures values are within the range of 0 and 255
-        self.__Y = np.clip(Y, 0, 255)
-        self.__Cr = np.clip(Cr, 0, 255)
-        self.__Cb = np.clip(Cb, 0, 255)
+        The planes are allocated once (with the padded dimensions and
+        the dtype of a dtype policy) and the image is converted
+        COLOR_ROWS rows at a time by util_func.color.rgb_to_ycrcb,
+        which writes rounded level shifted samples straight into
+        the planes
+        """
+
+        if self.__policy:
+            shape = self.__mcu_shape()
+            sample = self.__policy.sample
+        else:
+            shape = (self.__width, self.__height)
+            sample = np.float64
+        self.__Y = allocate(shape, sample, self.__mapped)
+        self.__Cr = allocate(shape, sample, self.__mapped)
+        self.__Cb = allocate(shape, sample, self.__mapped)
+
+        for start in range(0, self.__width, COLOR_ROWS):
+            chunk = self.__array[start:start + COLOR_ROWS]
+            end = start + chunk.shape[0]
+            rgb_to_ycrcb(chunk, [plane[start:end, 0:self.__height]
+                                 for plane in (self.__Y, self.__Cr,
+                                               self.__Cb)])
 
         # Free self.__array memory for garbage collection
         self.__array = None
 
     def sampling(self) -> None:
         """
-        Convert the array array from unsigned to a signed representation
-
-        Converting floating point to integer was for reduce cost of
-        computation when handling float
-
-        Parameters
-        ----------
-        array: ndarray
-            numpy array
+        A function that subsamples the level shifted chroma channels
+        (see util_func.sampling)
 
         Note
         ----
         unsigned array: from 0 to 255
         signed representation: from -128 to 127
+        The level shift to the signed representation is done by
+        RGB2YCrCb
         """
 
-        self.__Y = self.__Y - 128
-        self.__Cr = self.__Cr - 128
-        self.__Cb = self.__Cb - 128
+        if self.__factors == (1, 1):
+            return
+        if self.__policy:
+            self.__Cr = self.__lean_downsample(self.__Cr)
+            self.__Cb = self.__lean_downsample(self.__Cb)
+        else:
+            self.__Cr = downsample(self.__Cr, self.__factors)
+            self.__Cb = downsample(self.__Cb, self.__factors)
+
+    def __mcu_shape(self):
+        """
+        Returns the luma dimensions padded to multiples of the MCU
+        """
+        fr, fc = self.__factors
+        return (ceil(self.__width / (self.bits * fr)) * self.bits * fr,
+                ceil(self.__height / (self.bits * fc)) * self.bits * fc)
+
+    def __lean_downsample(self, plane):
+        """
+        Subsamples a chroma channel of a dtype policy into a new plane
+        that is allocated with the padded chroma dimensions. The plane
+        is averaged COLOR_ROWS rows at a time, so the float temporaries
+        of downsample stay small
+
+        Returns
+        -------
+        ndarray:
+            the subsampled chroma channel
+        """
+        fr, fc = self.__factors
+        luma_w, luma_h = self.__mcu_shape()
+        out = allocate((luma_w // fr, luma_h // fc), self.__policy.sample,
+                       self.__mapped)
+        # COLOR_ROWS is a multiple of fr
+        for start in range(0, self.__width, COLOR_ROWS):
+            end = min(start + COLOR_ROWS, self.__width)
+            small = downsample(plane[start:end, 0:self.__height],
+                               self.__factors)
+            w, h = small.shape
+            store(out[start // fr:start // fr + w, 0:h], small)
+        return (out)
 
     def compression(self) -> None:
         """
@@ -221,38 +355,60 @@ class Encoder():
         if (self.__paddedWidth == 0) or (self.__paddedHeight == 0):
             self.__paddedWidth = ceil(self.__width / 8) * 8
             self.__paddedHeight = ceil(self.__height / 8) * 8
-        # Divide the width and height into 8X8 sections
-        row_section = self.__paddedWidth // self.bits
-        col_section = self.__paddedHeight // self.bits
-        # Compress
-        for row in range(row_section):
-            r_start = row * self.bits
-            r_end = r_start + self.bits
-            for col in range(col_section):
-                c_start = col * self.bits
-                c_end = c_start + self.bits
-
-                # ================================ #
-                # Get the 8X8 slice of the array   #
-                # Transform using DCT (FDCT)       #
-                # Quantize                         #
-                # Copy into the array channel      #
-                # ================================ #
-
-                # For Y channel
-                mat_8 = self.__Y[r_start:r_end, c_start:c_end]
-                dct = FDCT(mat_8)
-                quant = quantize(dct, self.__quality, channel='luma')
-                self.__Y[r_start:r_end, c_start:c_end] = quant
-
-                # For Cr channel
-                mat_8 = self.__Cr[r_start:r_end, c_start:c_end]
-                dct = FDCT(mat_8)
-                quant = quantize(dct, self.__quality, channel='luma')
-                self.__Cr[r_start:r_end, c_start:c_end] = quant
-
-                # For Cb channel
-                mat_8 = self.__Cb[r_start:r_end, c_start:c_end]
-                dct = FDCT(mat_8)
-                quant = quantize(dct, self.__quality, channel='luma')
-                self.__Cb[r_start:r_end, c_start:c_end] = quant
+
+        # ================================== #
+        # Get all 8X8 blocks of the channel  #
+        # Transform using DCT (FDCT)         #
+        # Quantize                           #
+        # Copy back into the array channel   #
+        # ================================== #
+        with WorkerPool(self.__workers) as pool:
+            self.__Y = self.__compress_plane(self.__Y, 'luma', pool)
+            self.__Cr = self.__compress_plane(self.__Cr, 'luma', pool)
+            self.__Cb = self.__compress_plane(self.__Cb, 'luma', pool)
+
+    def __compress_plane(self, plane, channel, pool):
+        """
+        Applies dct transform and quantization to every 8X8 block
+        of a padded color channel in one batched operation
+
+        Parameters
+        ----------
+        plane : ndarray
+            2D padded array of a color channel
+        channel : str ['luma' or 'chroma']
+            The quantization table to use for the channel
+        pool : WorkerPool
+            The threads that transform the bands of the plane
+
+        Returns
+        -------
+        ndarray:
+            The channel with each 8X8 block quantized
+        """
+        # Contiguous planes are used as they are (memory mapped planes
+        # stay mapped)
+        if not plane.flags.c_contiguous:
+            plane = np.ascontiguousarray(plane)
+        table = get_quant_table(self.__quality, channel, self.__table_set,
+                                self.__backend.name)
+        work = self.__policy.work if self.__policy else np.float64
+        # Integer samples go to integer backends without a float copy
+        if (self.__backend.integer
+                and np.issubdtype(plane.dtype, np.integer)):
+            work = np.int32
+
+        # The plane is processed in bands so that the temporary block
+        # arrays stay small. Every band is written in place, so the
+        # bands can run on threads (numpy and ctypes release the GIL)
+        def compress_band(band):
+            # Backends with plane kernels work on the band directly
+            if self.__backend.compress_plane(band, table):
+                return
+            blocks = get_blocks(band, self.bits, work)
+            dct = self.__backend.forward(blocks)
+            quant = table.quantize(dct)
+            put_blocks(band, quant, self.bits)
+
+        list(pool.map(compress_band, iter_bands(plane, self.bits)))
+        return (plane)
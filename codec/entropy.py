@@ -0,0 +1,750 @@
+#!/usr/bin/env python3
+
+"""
+A module that entropy codes the quantized coefficient planes of the
+Encoder into the baseline (sequential Huffman) JPEG bitstream
+
+Stage in Entropy Coding
+-----------------------
+    Zigzag Ordering:
+        The 64 coefficients of every 8X8 block are read in the zigzag
+        order so that the high frequency zeros come last
+    MCU Interleaving:
+        The blocks of the Y, Cb and Cr planes are interleaved in MCU
+        (minimum coded unit) order. With subsampling an MCU holds
+        H X V luma blocks followed by one Cb and one Cr block
+    DC Differencing:
+        The DC coefficient of each block is coded as the difference
+        from the DC coefficient of the previous block of the same
+        component
+    Run Length Coding:
+        Every non zero AC coefficient becomes the symbol
+        (zero run << 4 | size), zero runs over 15 become ZRL (0xF0)
+        symbols and trailing zeros become one EOB (0x00) symbol
+    Huffman Coding:
+        Every symbol is replaced by its Huffman code followed by
+        size extra bits of the coefficient value
+
+Variables
+---------
+ZIGZAG : ndarray
+    ZIGZAG[k] is the index (row * 8 + column) of the k-th coefficient
+    of a block in zigzag order
+DC_LUMA_BITS, DC_LUMA_VALUES, AC_LUMA_BITS, AC_LUMA_VALUES,
+DC_CHROMA_BITS, DC_CHROMA_VALUES, AC_CHROMA_BITS, AC_CHROMA_VALUES :
+    The typical Huffman tables of Annex K.3 of the JPEG standard.
+    BITS[i] is the number of codes of length i + 1 and VALUES are
+    the symbols in order of increasing code length
+
+Optimized Tables
+----------------
+    count_symbols gathers the symbol frequencies of the blocks (one
+    bincount per band of blocks) and optimal_table builds the Huffman
+    table of the frequencies with the procedure of Annex K.2 (the
+    optimize_coding option of libjpeg). Codes are limited to 16 bits
+    and the all ones code is never used
+
+Note
+----
+Every stage is done on whole arrays of blocks at once. Only the
+bit packing loops, and only over the (at most 27) bit positions of
+a code word
+"""
+
+# Python modules utilized
+import numpy as np
+
+# Modules (functions) from util_func package
+from util_func.blocks import block_view
+
+ZIGZAG = np.array((
+    0, 1, 8, 16, 9, 2, 3, 10,
+    17, 24, 32, 25, 18, 11, 4, 5,
+    12, 19, 26, 33, 40, 48, 41, 34,
+    27, 20, 13, 6, 7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36,
+    29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46,
+    53, 60, 61, 54, 47, 55, 62, 63
+))
+
+DC_LUMA_BITS = (0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0)
+DC_LUMA_VALUES = tuple(range(12))
+
+DC_CHROMA_BITS = (0, 3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0)
+DC_CHROMA_VALUES = tuple(range(12))
+
+AC_LUMA_BITS = (0, 2, 1, 3, 3, 2, 4, 3, 5, 5, 4, 4, 0, 0, 1, 0x7d)
+AC_LUMA_VALUES = (
+    0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12,
+    0x21, 0x31, 0x41, 0x06, 0x13, 0x51, 0x61, 0x07,
+    0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xa1, 0x08,
+    0x23, 0x42, 0xb1, 0xc1, 0x15, 0x52, 0xd1, 0xf0,
+    0x24, 0x33, 0x62, 0x72, 0x82, 0x09, 0x0a, 0x16,
+    0x17, 0x18, 0x19, 0x1a, 0x25, 0x26, 0x27, 0x28,
+    0x29, 0x2a, 0x34, 0x35, 0x36, 0x37, 0x38, 0x39,
+    0x3a, 0x43, 0x44, 0x45, 0x46, 0x47, 0x48, 0x49,
+    0x4a, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59,
+    0x5a, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68, 0x69,
+    0x6a, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79,
+    0x7a, 0x83, 0x84, 0x85, 0x86, 0x87, 0x88, 0x89,
+    0x8a, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98,
+    0x99, 0x9a, 0xa2, 0xa3, 0xa4, 0xa5, 0xa6, 0xa7,
+    0xa8, 0xa9, 0xaa, 0xb2, 0xb3, 0xb4, 0xb5, 0xb6,
+    0xb7, 0xb8, 0xb9, 0xba, 0xc2, 0xc3, 0xc4, 0xc5,
+    0xc6, 0xc7, 0xc8, 0xc9, 0xca, 0xd2, 0xd3, 0xd4,
+    0xd5, 0xd6, 0xd7, 0xd8, 0xd9, 0xda, 0xe1, 0xe2,
+    0xe3, 0xe4, 0xe5, 0xe6, 0xe7, 0xe8, 0xe9, 0xea,
+    0xf1, 0xf2, 0xf3, 0xf4, 0xf5, 0xf6, 0xf7, 0xf8,
+    0xf9, 0xfa
+)
+
+AC_CHROMA_BITS = (0, 2, 1, 2, 4, 4, 3, 4, 7, 5, 4, 4, 0, 1, 2, 0x77)
+AC_CHROMA_VALUES = (
+    0x00, 0x01, 0x02, 0x03, 0x11, 0x04, 0x05, 0x21,
+    0x31, 0x06, 0x12, 0x41, 0x51, 0x07, 0x61, 0x71,
+    0x13, 0x22, 0x32, 0x81, 0x08, 0x14, 0x42, 0x91,
+    0xa1, 0xb1, 0xc1, 0x09, 0x23, 0x33, 0x52, 0xf0,
+    0x15, 0x62, 0x72, 0xd1, 0x0a, 0x16, 0x24, 0x34,
+    0xe1, 0x25, 0xf1, 0x17, 0x18, 0x19, 0x1a, 0x26,
+    0x27, 0x28, 0x29, 0x2a, 0x35, 0x36, 0x37, 0x38,
+    0x39, 0x3a, 0x43, 0x44, 0x45, 0x46, 0x47, 0x48,
+    0x49, 0x4a, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58,
+    0x59, 0x5a, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68,
+    0x69, 0x6a, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78,
+    0x79, 0x7a, 0x82, 0x83, 0x84, 0x85, 0x86, 0x87,
+    0x88, 0x89, 0x8a, 0x92, 0x93, 0x94, 0x95, 0x96,
+    0x97, 0x98, 0x99, 0x9a, 0xa2, 0xa3, 0xa4, 0xa5,
+    0xa6, 0xa7, 0xa8, 0xa9, 0xaa, 0xb2, 0xb3, 0xb4,
+    0xb5, 0xb6, 0xb7, 0xb8, 0xb9, 0xba, 0xc2, 0xc3,
+    0xc4, 0xc5, 0xc6, 0xc7, 0xc8, 0xc9, 0xca, 0xd2,
+    0xd3, 0xd4, 0xd5, 0xd6, 0xd7, 0xd8, 0xd9, 0xda,
+    0xe2, 0xe3, 0xe4, 0xe5, 0xe6, 0xe7, 0xe8, 0xe9,
+    0xea, 0xf2, 0xf3, 0xf4, 0xf5, 0xf6, 0xf7, 0xf8,
+    0xf9, 0xfa
+)
+
+# Symbol classes of the coded symbols. RAW entries are bits without
+# a Huffman code (the refinement bits of progressive scans)
+DC = 0
+AC = 1
+RAW = 2
+
+# Special AC symbols
+EOB = 0x00
+ZRL = 0xF0
+
+
+class HuffmanTable:
+    """
+    A Huffman table given by the BITS and HUFFVAL lists of a DHT
+    segment, with the code and the code length of every symbol
+    precomputed (Annex C of the JPEG standard)
+
+    Parameters
+    ----------
+    bits : sequence
+        bits[i] is the number of codes of length i + 1
+    values : sequence
+        The symbols in order of increasing code length
+    """
+
+    def __init__(self, bits, values):
+        """
+        Instance attributes
+
+        Attributes
+        ----------
+        bits : tuple
+            16 code length counts
+        values : tuple
+            the symbols of the table
+        codes : ndarray
+            codes[symbol] is the Huffman code of the symbol
+        sizes : ndarray
+            sizes[symbol] is the code length of the symbol. 0 for
+            symbols that are not in the table
+        """
+        bits = tuple(int(b) for b in bits)
+        values = tuple(int(v) for v in values)
+        if len(bits) != 16:
+            raise ValueError('Huffman table must have 16 code lengths')
+        if sum(bits) != len(values):
+            raise ValueError('Huffman table values do not match the '
+                             'code lengths')
+
+        codes = np.zeros(256, dtype=np.int64)
+        sizes = np.zeros(256, dtype=np.int64)
+        code = k = 0
+        for length, count in enumerate(bits, start=1):
+            for _ in range(count):
+                codes[values[k]] = code
+                sizes[values[k]] = length
+                code += 1
+                k += 1
+            if code > (1 << length):
+                raise ValueError('Huffman table code lengths are invalid')
+            code <<= 1
+
+        self.__bits = bits
+        self.__values = values
+        self.__codes = codes
+        self.__sizes = sizes
+        self.__codes.flags.writeable = False
+        self.__sizes.flags.writeable = False
+
+    @property
+    def bits(self):
+        return self.__bits
+
+    @property
+    def values(self):
+        return self.__values
+
+    @property
+    def codes(self):
+        return self.__codes
+
+    @property
+    def sizes(self):
+        return self.__sizes
+
+
+def standard_tables():
+    """
+    A function that returns the typical Huffman tables of Annex K.3
+
+    Returns
+    -------
+    tuple:
+        (dc_tables : tuple, ac_tables : tuple) with the luma table at
+        index 0 and the chroma table at index 1
+    """
+    return ((HuffmanTable(DC_LUMA_BITS, DC_LUMA_VALUES),
+             HuffmanTable(DC_CHROMA_BITS, DC_CHROMA_VALUES)),
+            (HuffmanTable(AC_LUMA_BITS, AC_LUMA_VALUES),
+             HuffmanTable(AC_CHROMA_BITS, AC_CHROMA_VALUES)))
+
+
+def optimal_table(frequencies):
+    """
+    A function that builds the Huffman table of symbol frequencies
+    (Annex K.2 of the JPEG standard)
+
+    Parameters
+    ----------
+    frequencies : ndarray
+        256 symbol counts
+
+    Returns
+    -------
+    HuffmanTable:
+        the table with codes for every symbol whose count is not 0
+    """
+    # Symbol 256 is reserved so that no code is all ones
+    freq = np.zeros(257, dtype=np.float64)
+    freq[0:256] = frequencies
+    if not np.any(freq):
+        # A table must have at least one code
+        freq[0] = 1
+    freq[256] = 1
+    freq[freq == 0] = np.inf
+    code_size = np.zeros(257, dtype=np.int64)
+    others = np.full(257, -1, dtype=np.int64)
+    reverse = slice(None, None, -1)
+
+    while True:
+        # The least frequent symbols (the largest index on ties)
+        c1 = 256 - int(np.argmin(freq[reverse]))
+        value = freq[c1]
+        freq[c1] = np.inf
+        c2 = 256 - int(np.argmin(freq[reverse]))
+        if np.isinf(freq[c2]):
+            freq[c1] = value
+            break
+        freq[c1] = value + freq[c2]
+        freq[c2] = np.inf
+
+        # Every symbol of both branches gets one more bit
+        code_size[c1] += 1
+        while others[c1] >= 0:
+            c1 = others[c1]
+            code_size[c1] += 1
+        others[c1] = c2
+        code_size[c2] += 1
+        while others[c2] >= 0:
+            c2 = others[c2]
+            code_size[c2] += 1
+
+    bits = np.bincount(code_size[code_size > 0], minlength=33)
+
+    # Limit the code lengths to 16 bits
+    for i in range(32, 16, -1):
+        while bits[i] > 0:
+            j = i - 2
+            while bits[j] == 0:
+                j -= 1
+            bits[i] -= 2
+            bits[i - 1] += 1
+            bits[j + 1] += 2
+            bits[j] -= 1
+
+    # Remove the reserved symbol from the longest codes
+    i = 16
+    while bits[i] == 0:
+        i -= 1
+    bits[i] -= 1
+
+    symbols = np.flatnonzero(code_size[0:256])
+    order = np.argsort(code_size[symbols], kind='stable')
+    return (HuffmanTable(bits[1:17], symbols[order]))
+
+
+def bit_size(values):
+    """
+    A function that returns the size category (number of bits of the
+    magnitude) of every value
+
+    Parameters
+    ----------
+    values : ndarray
+        integer array
+
+    Returns
+    -------
+    ndarray:
+        int64 array with 0 for zeros and floor(log2(abs(value))) + 1
+        for the rest
+    """
+    _, exponent = np.frexp(np.abs(values).astype(np.float64))
+    return (exponent.astype(np.int64))
+
+
+def extra_bits(values, sizes):
+    """
+    A function that returns the extra bits that follow the Huffman
+    code of a coefficient. Negative values are coded as
+    value + 2 ** size - 1 (the ones complement)
+
+    Parameters
+    ----------
+    values : ndarray
+        integer array of coefficient values
+    sizes : ndarray
+        the size categories of the values
+
+    Returns
+    -------
+    ndarray:
+        int64 array of the extra bits
+    """
+    values = values.astype(np.int64)
+    return (np.where(values < 0, values + (1 << sizes) - 1, values))
+
+
+def zigzag_blocks(plane, bits=8):
+    """
+    A function that returns the blocks of a quantized plane with the
+    coefficients of each block in zigzag order
+
+    Parameters
+    ----------
+    plane : ndarray
+        2D array of quantized coefficients whose dimensions are
+        multiples of bits
+
+    Returns
+    -------
+    ndarray:
+        int16 array of shape (rows, cols, 64). The coefficients are
+        rounded and limited to the baseline range (DC to
+        [-1024, 1023] and AC to [-1023, 1023])
+    """
+    view = block_view(np.ascontiguousarray(plane), bits)
+    rows, cols = view.shape[0:2]
+    blocks = view.reshape(rows, cols, bits * bits)[:, :, ZIGZAG]
+    if not np.issubdtype(blocks.dtype, np.integer):
+        blocks = np.rint(blocks)
+    out = np.empty(blocks.shape, dtype=np.int16)
+    np.clip(blocks[:, :, 0], -1024, 1023, out=out[:, :, 0],
+            casting='unsafe')
+    np.clip(blocks[:, :, 1:], -1023, 1023, out=out[:, :, 1:],
+            casting='unsafe')
+    return (out)
+
+
+def mcu_blocks(planes, factors, bits=8):
+    """
+    A function that interleaves the zigzag blocks of the component
+    planes in MCU order
+
+    Parameters
+    ----------
+    planes : sequence
+        2D quantized planes of the components in scan order
+    factors : sequence
+        (V, H) sampling factors of every component. The block grid
+        of a component must be (mcu_rows * V, mcu_cols * H)
+
+    Returns
+    -------
+    tuple:
+        blocks : ndarray
+            (n, 64) int16 array of the blocks in coding order
+        components : ndarray
+            (n,) array with the component index of every block
+    """
+    return (interleave([zigzag_blocks(plane, bits) for plane in planes],
+                       factors))
+
+
+def interleave(zigzags, factors):
+    """
+    A function that interleaves zigzag blocks in MCU order
+
+    Parameters
+    ----------
+    zigzags : sequence
+        (rows, cols, 64) zigzag blocks of the components (see
+        zigzag_blocks)
+    factors : sequence
+        (V, H) sampling factors of every component
+
+    Returns
+    -------
+    tuple:
+        (blocks, components) as returned by mcu_blocks
+    """
+    mcus = []
+    counts = []
+    for zigzag, (v, h) in zip(zigzags, factors):
+        rows, cols = zigzag.shape[0:2]
+        if rows % v or cols % h:
+            raise ValueError('Plane blocks do not fill whole MCUs')
+        mcu = zigzag.reshape(rows // v, v, cols // h, h, 64)
+        mcu = mcu.transpose(0, 2, 1, 3, 4).reshape(-1, v * h, 64)
+        mcus.append(mcu)
+        counts.append(v * h)
+    if len({mcu.shape[0] for mcu in mcus}) != 1:
+        raise ValueError('Planes do not have the same number of MCUs')
+
+    blocks = np.concatenate(mcus, axis=1).reshape(-1, 64)
+    components = np.tile(np.repeat(np.arange(len(counts)), counts),
+                         mcus[0].shape[0])
+    return (blocks, components)
+
+
+def dc_symbols(dc, components, last_dc):
+    """
+    A function that codes DC values as differences from the previous
+    DC value of the same component
+
+    Parameters
+    ----------
+    dc : ndarray
+        (n,) array of DC values in coding order
+    components : ndarray
+        (n,) array with the component index of every value
+    last_dc : ndarray
+        the DC predictor of every component. It is updated in place
+        to the last DC value of each component
+
+    Returns
+    -------
+    tuple:
+        (diff, size) arrays of the differences and their sizes
+    """
+    dc = dc.astype(np.int64)
+    diff = np.empty(dc.shape[0], dtype=np.int64)
+    for component in range(last_dc.shape[0]):
+        index = np.flatnonzero(components == component)
+        if index.size:
+            diff[index] = np.diff(dc[index], prepend=last_dc[component])
+            last_dc[component] = dc[index[-1]]
+    return (diff, bit_size(diff))
+
+
+def block_symbols(blocks, components, last_dc):
+    """
+    A function that run length codes blocks into Huffman symbols
+
+    Parameters
+    ----------
+    blocks : ndarray
+        (n, 64) array of zigzag blocks in coding order
+    components : ndarray
+        (n,) array with the component index of every block
+    last_dc : ndarray
+        the DC predictor of every component. It is updated in place
+        to the DC value of the last block of each component
+
+    Returns
+    -------
+    tuple:
+        (components, kinds, symbols, values, sizes) arrays with one
+        entry per coded symbol in coding order. kinds is DC or AC
+        and values and sizes are the extra bits that follow the code
+    """
+    n = blocks.shape[0]
+
+    # DC differences along each component
+    diff, dc_size = dc_symbols(blocks[:, 0], components, last_dc)
+
+    # Zero runs between the non zero AC coefficients of each block
+    block, position = np.nonzero(blocks[:, 1:])
+    position = position + 1
+    first = np.ones(block.shape, dtype=bool)
+    first[1:] = block[1:] != block[:-1]
+    previous = np.empty_like(position)
+    previous[0:1] = 0
+    previous[1:] = position[:-1]
+    previous[first] = 0
+    run = position - previous - 1
+    value = blocks[block, position].astype(np.int64)
+    size = bit_size(value)
+
+    # Runs of 16 zeros before a coefficient become ZRL symbols
+    zrl = run >> 4
+    zrl_block = np.repeat(block, zrl)
+
+    # Blocks that do not end with a non zero coefficient get an EOB
+    last = np.zeros(n, dtype=np.int64)
+    end = np.ones(block.shape, dtype=bool)
+    end[:-1] = block[:-1] != block[1:]
+    last[block[end]] = position[end]
+    eob_block = np.flatnonzero(last < 63)
+
+    # Slot of each symbol within its block: DC 0, ZRLs before the
+    # coefficient at position p 2p - 1, the coefficient 2p, EOB 128
+    nz, nr, ne = block.shape[0], zrl_block.shape[0], eob_block.shape[0]
+    owner = np.concatenate((np.arange(n), zrl_block, block, eob_block))
+    slot = np.concatenate((np.zeros(n, dtype=np.int64),
+                           np.repeat(2 * position - 1, zrl),
+                           2 * position,
+                           np.full(ne, 128)))
+    kinds = np.concatenate((np.full(n, DC), np.full(nr + nz + ne, AC)))
+    symbols = np.concatenate((dc_size, np.full(nr, ZRL),
+                              ((run & 15) << 4) | size, np.full(ne, EOB)))
+    values = np.concatenate((diff, np.zeros(nr, dtype=np.int64), value,
+                             np.zeros(ne, dtype=np.int64)))
+    sizes = np.concatenate((dc_size, np.zeros(nr, dtype=np.int64), size,
+                            np.zeros(ne, dtype=np.int64)))
+
+    order = np.argsort(owner * 129 + slot, kind='stable')
+    return (components[owner[order]], kinds[order], symbols[order],
+            values[order], sizes[order])
+
+
+def count_symbols(blocks, components, last_dc, counts) -> None:
+    """
+    A function that adds the symbol frequencies of blocks to counts
+
+    Parameters
+    ----------
+    blocks : ndarray
+        (n, 64) array of zigzag blocks in coding order
+    components : ndarray
+        (n,) array with the component index of every block
+    last_dc : ndarray
+        the DC predictor of every component (updated in place)
+    counts : ndarray
+        (components, 2, 256) int64 array of the DC and AC symbol
+        counts of every component
+    """
+    add_counts(counts, *block_symbols(blocks, components, last_dc))
+
+
+def add_counts(counts, components, kinds, symbols, *extra) -> None:
+    """
+    A function that adds coded symbols to the symbol counts
+
+    Parameters
+    ----------
+    counts : ndarray
+        (components, 2, 256) int64 array of the DC and AC symbol
+        counts of every component
+    components, kinds, symbols : ndarray
+        the symbols (see block_symbols). RAW bits are not counted
+    """
+    coded = kinds != RAW
+    index = (components[coded] * 2 + kinds[coded]) * 256 + symbols[coded]
+    counts += np.bincount(index, minlength=counts.size).reshape(
+        counts.shape)
+
+
+def pack_bits(words, lengths, carry=0, carry_bits=0):
+    """
+    A function that packs variable length code words into bytes
+
+    Parameters
+    ----------
+    words : ndarray
+        int64 array of code words (most significant bit first)
+    lengths : ndarray
+        the number of bits of every code word
+    carry : int
+        bits left over from the previous call
+    carry_bits : int
+        the number of left over bits (0 - 7)
+
+    Returns
+    -------
+    tuple:
+        data : ndarray
+            uint8 array of the complete bytes
+        carry : int
+            the bits that do not fill a byte
+        carry_bits : int
+            the number of those bits
+    """
+    lengths = lengths.astype(np.int64)
+    ends = np.cumsum(lengths) + carry_bits
+    total = int(ends[-1]) if ends.size else carry_bits
+    starts = ends - lengths
+
+    stream = np.zeros(total, dtype=np.uint8)
+    for k in range(carry_bits):
+        stream[k] = (carry >> (carry_bits - 1 - k)) & 1
+    for k in range(int(lengths.max()) if lengths.size else 0):
+        mask = lengths > k
+        shift = lengths[mask] - 1 - k
+        stream[starts[mask] + k] = (words[mask] >> shift) & 1
+
+    complete = total - total % 8
+    carry_bits = total - complete
+    carry = 0
+    for bit in stream[complete:]:
+        carry = (carry << 1) | int(bit)
+    return (np.packbits(stream[0:complete]), carry, carry_bits)
+
+
+def stuff_bytes(data):
+    """
+    A function that inserts a 0x00 byte after every 0xFF byte of the
+    entropy coded data so that it cannot be read as a marker
+
+    Parameters
+    ----------
+    data : ndarray
+        uint8 array of entropy coded bytes
+
+    Returns
+    -------
+    bytes:
+        the stuffed bytes
+    """
+    index = np.flatnonzero(data == 0xFF)
+    if index.size:
+        data = np.insert(data, index + 1, 0)
+    return (data.tobytes())
+
+
+class EntropyEncoder:
+    """
+    A Huffman encoder for the blocks of one scan
+
+    The encoder keeps the DC predictors and the bits that do not yet
+    fill a byte between calls, so a scan can be coded in any number of
+    pieces of whole MCUs (see encode)
+
+    Parameters
+    ----------
+    dc_tables : sequence
+        the DC HuffmanTable of every component. None for scans
+        without DC symbols
+    ac_tables : sequence
+        the AC HuffmanTable of every component. None for scans
+        without AC symbols
+    """
+
+    def __init__(self, dc_tables, ac_tables):
+        """
+        Instance attributes
+
+        Attributes
+        ----------
+        dc_tables : sequence
+            the DC HuffmanTable of every component
+        ac_tables : sequence
+            the AC HuffmanTable of every component
+        last_dc : ndarray
+            the DC predictor of every component
+        """
+        if len(dc_tables) != len(ac_tables):
+            raise ValueError('Every component needs a DC and an AC table')
+        # codes[component, kind, symbol]. The RAW row has no codes
+        empty = np.zeros(256, dtype=np.int64)
+        self.__codes = np.stack([
+            np.stack((dc.codes if dc else empty, ac.codes if ac else empty,
+                      empty))
+            for dc, ac in zip(dc_tables, ac_tables)])
+        self.__sizes = np.stack([
+            np.stack((dc.sizes if dc else empty, ac.sizes if ac else empty,
+                      empty))
+            for dc, ac in zip(dc_tables, ac_tables)])
+        self.__last_dc = np.zeros(len(dc_tables), dtype=np.int64)
+        self.__carry = self.__carry_bits = 0
+
+    @property
+    def last_dc(self):
+        return self.__last_dc
+
+    def encode(self, blocks, components) -> bytes:
+        """
+        Huffman codes blocks in coding order
+
+        Parameters
+        ----------
+        blocks : ndarray
+            (n, 64) array of zigzag blocks (see mcu_blocks)
+        components : ndarray
+            (n,) array with the component index of every block
+
+        Returns
+        -------
+        bytes:
+            the complete (stuffed) bytes of the coded blocks. Bits
+            that do not fill a byte are kept for the next call
+        """
+        return (self.encode_symbols(*block_symbols(blocks, components,
+                                                   self.__last_dc)))
+
+    def encode_symbols(self, components, kinds, symbols, values,
+                       sizes) -> bytes:
+        """
+        Huffman codes symbols in coding order
+
+        Parameters
+        ----------
+        components, kinds, symbols, values, sizes : ndarray
+            the symbols and their extra bits (see block_symbols)
+
+        Returns
+        -------
+        bytes:
+            the complete (stuffed) bytes of the coded symbols
+        """
+        code_sizes = self.__sizes[components, kinds, symbols]
+        if np.any((code_sizes == 0) & (kinds != RAW)):
+            raise ValueError('Symbol not in the Huffman table')
+        words = (self.__codes[components, kinds, symbols] << sizes) | \
+            extra_bits(values, sizes)
+        data, self.__carry, self.__carry_bits = pack_bits(
+            words, code_sizes + sizes, self.__carry, self.__carry_bits)
+        return (stuff_bytes(data))
+
+    def flush(self) -> bytes:
+        """
+        Pads the left over bits with ones to a whole byte
+
+        Returns
+        -------
+        bytes:
+            the last (stuffed) byte of the scan or no bytes
+        """
+        if not self.__carry_bits:
+            return (b'')
+        pad = 8 - self.__carry_bits
+        byte = (self.__carry << pad) | ((1 << pad) - 1)
+        self.__carry = self.__carry_bits = 0
+        return (stuff_bytes(np.array([byte], dtype=np.uint8)))
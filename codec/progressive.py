@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+
+"""
+A module that codes the quantized coefficient blocks into the scans
+of a progressive JPEG (Annex G of the JPEG standard)
+
+Scans
+-----
+    Every scan codes a band of zigzag coefficients (spectral
+    selection Ss - Se) of one or more components at a bit position
+    (successive approximation Ah, Al). A scan script is a sequence of
+    (components, Ss, Se, Ah, Al) where components are indices of the
+    frame components (0 - Y, 1 - Cb, 2 - Cr)
+    DC first (Ss = Se = 0, Ah = 0):
+        The DC values shifted right by Al, coded like baseline DC
+    DC refinement (Ss = Se = 0, Ah > 0):
+        Bit Al of every DC value, as a raw bit
+    AC first (Ss > 0, Ah = 0):
+        The AC values of one component divided by 2 ** Al, coded as
+        run/size symbols. Blocks that end in zeros are counted into
+        end of band runs (EOBn symbols) instead of an EOB each
+    AC refinement (Ss > 0, Ah > 0):
+        Coefficients that become non zero at bit Al are coded as
+        run/size symbols with a sign bit. Bit Al of coefficients that
+        were already non zero follows as raw correction bits after
+        the next symbol, or after the EOBn symbol of the block
+
+Variables
+---------
+SCAN_PRESETS : dict
+    The named scan scripts of a 3 component (YCbCr) image
+    default:
+        The scan script of libjpeg (jpeg_simple_progression) with
+        spectral selection and successive approximation
+    spectral:
+        Spectral selection only (no refinement scans)
+    dc:
+        A DC scan followed by one full AC scan per component
+
+Note
+----
+Like codec.entropy, the symbols of a band of blocks are made from
+whole arrays. The order of the symbols is given by a sort key
+(block, slot, sub1, sub2) where slot is 4 * position for an EOBn
+symbol, 4 * position + 1 for ZRL symbols, 4 * position + 2 for a
+coefficient and END for the forced EOBn at the end of a block
+"""
+
+# Python modules utilized
+import numpy as np
+
+# Modules (functions) from codec package
+from codec.entropy import DC
+from codec.entropy import AC
+from codec.entropy import RAW
+from codec.entropy import ZRL
+from codec.entropy import bit_size
+from codec.entropy import dc_symbols
+
+SCAN_PRESETS = {
+    'default': (
+        ((0, 1, 2), 0, 0, 0, 1),
+        ((0,), 1, 5, 0, 2),
+        ((2,), 1, 63, 0, 1),
+        ((1,), 1, 63, 0, 1),
+        ((0,), 6, 63, 0, 2),
+        ((0,), 1, 63, 2, 1),
+        ((0, 1, 2), 0, 0, 1, 0),
+        ((2,), 1, 63, 1, 0),
+        ((1,), 1, 63, 1, 0),
+        ((0,), 1, 63, 1, 0)
+    ),
+    'spectral': (
+        ((0, 1, 2), 0, 0, 0, 0),
+        ((0,), 1, 5, 0, 0),
+        ((2,), 1, 63, 0, 0),
+        ((1,), 1, 63, 0, 0),
+        ((0,), 6, 63, 0, 0)
+    ),
+    'dc': (
+        ((0, 1, 2), 0, 0, 0, 0),
+        ((0,), 1, 63, 0, 0),
+        ((1,), 1, 63, 0, 0),
+        ((2,), 1, 63, 0, 0)
+    )
+}
+
+# The largest EOBn run
+MAX_EOBRUN = 0x7FFF
+
+# Sort slot of the EOBn symbol forced at the end of a block
+END = 4 * 64
+
+
+def get_scan_script(scans, count=3):
+    """
+    A function that returns a checked scan script
+
+    Parameters
+    ----------
+    scans : str or sequence
+        the name of a preset in SCAN_PRESETS or a sequence of
+        (components, Ss, Se, Ah, Al) scans
+    count : int
+        the number of components of the image
+
+    Returns
+    -------
+    tuple:
+        the scans as tuples of (components, Ss, Se, Ah, Al)
+    """
+    if isinstance(scans, str):
+        if scans not in SCAN_PRESETS:
+            raise ValueError(f'No scan script named {scans}')
+        scans = SCAN_PRESETS[scans]
+
+    # The last coded bit of every coefficient of every component
+    last_bit = np.full((count, 64), -1)
+    script = []
+    for scan in scans:
+        components, start, end, high, low = scan
+        components = tuple(int(c) for c in components)
+        if (not components or len(set(components)) != len(components)
+                or min(components) < 0 or max(components) >= count):
+            raise ValueError('Invalid scan script components')
+        if not (0 <= start <= end <= 63) or (start == 0 and end != 0):
+            raise ValueError('Invalid scan script spectral selection')
+        if start > 0 and len(components) != 1:
+            raise ValueError('AC scans must have one component')
+        if not 0 <= low <= 13 or (high and high != low + 1):
+            raise ValueError('Invalid scan script successive '
+                             'approximation')
+        for component in components:
+            coded = last_bit[component, start:end + 1]
+            if start > 0 and last_bit[component, 0] < 0:
+                raise ValueError('AC scans must follow the DC scan')
+            if np.any(coded != (high if high else -1)):
+                raise ValueError('Invalid scan script successive '
+                                 'approximation')
+            coded[:] = low
+        script.append((components, start, end, high, low))
+    if np.any(last_bit != 0):
+        raise ValueError('Scan script does not code every coefficient')
+    return (tuple(script))
+
+
+def eobrun_symbols(runs):
+    """
+    A function that returns the EOBn symbols of end of band runs
+
+    Parameters
+    ----------
+    runs : ndarray
+        the run lengths (1 - MAX_EOBRUN)
+
+    Returns
+    -------
+    tuple:
+        (symbols, values, sizes) of the runs
+    """
+    sizes = bit_size(runs) - 1
+    return ((sizes << 4), runs & ((1 << sizes) - 1), sizes)
+
+
+class ProgressiveScan:
+    """
+    The symbol coder of one progressive scan
+
+    The DC predictors and the end of band run (with its correction
+    bits) are kept between calls so that a scan can be coded in bands
+    of blocks (see symbols and finish)
+
+    Parameters
+    ----------
+    components : tuple
+        the indices of the frame components of the scan
+    start : int
+        the first zigzag coefficient (Ss)
+    end : int
+        the last zigzag coefficient (Se)
+    high : int
+        the previous bit position (Ah)
+    low : int
+        the bit position (Al)
+    """
+
+    def __init__(self, components, start, end, high, low):
+        """
+        Instance attributes
+
+        Attributes
+        ----------
+        components : tuple
+            the frame components of the scan
+        start, end, high, low : int
+            the spectral selection and successive approximation
+        """
+        self.__components = tuple(components)
+        self.__start = start
+        self.__end = end
+        self.__high = high
+        self.__low = low
+        self.reset()
+
+    @property
+    def components(self):
+        return self.__components
+
+    @property
+    def start(self):
+        return self.__start
+
+    @property
+    def end(self):
+        return self.__end
+
+    @property
+    def high(self):
+        return self.__high
+
+    @property
+    def low(self):
+        return self.__low
+
+    def reset(self) -> None:
+        """
+        Clears the DC predictors and the end of band run
+        """
+        self.__last_dc = np.zeros(len(self.__components), dtype=np.int64)
+        self.__eobrun = 0
+        self.__pending = np.zeros(0, dtype=np.int64)
+
+    def symbols(self, blocks, components):
+        """
+        Codes a band of blocks into symbols
+
+        Parameters
+        ----------
+        blocks : ndarray
+            (n, 64) array of zigzag blocks in coding order
+        components : ndarray
+            (n,) array with the index of every block in the
+            components of the scan
+
+        Returns
+        -------
+        tuple:
+            (components, kinds, symbols, values, sizes) arrays of the
+            symbols in coding order (see codec.entropy)
+        """
+        if self.__start == 0:
+            if self.__high:
+                bits = (blocks[:, 0].astype(np.int64) >> self.__low) & 1
+                return (components, np.full(bits.shape, RAW),
+                        np.zeros(bits.shape, dtype=np.int64), bits,
+                        np.ones(bits.shape, dtype=np.int64))
+            dc = blocks[:, 0].astype(np.int64) >> self.__low
+            diff, size = dc_symbols(dc, components, self.__last_dc)
+            return (components, np.full(diff.shape, DC), size, diff, size)
+
+        band = blocks[:, self.__start:self.__end + 1].astype(np.int64)
+        if self.__high:
+            events = self.__refine_events(band)
+        else:
+            events = self.__first_events(band)
+        return (self.__ordered(events))
+
+    def finish(self):
+        """
+        Codes the end of band run left at the end of the scan
+
+        Returns
+        -------
+        tuple:
+            (components, kinds, symbols, values, sizes) arrays
+        """
+        events = []
+        if self.__eobrun:
+            symbols, values, sizes = eobrun_symbols(
+                np.array([self.__eobrun]))
+            events.append(self.__event(0, 0, 0, 0, AC, symbols, values,
+                                       sizes))
+            bits = self.__pending
+            events.append(self.__event(0, 0, 0, 1 + np.arange(bits.size),
+                                       RAW, 0, bits, 1, bits.size))
+        self.__eobrun = 0
+        self.__pending = np.zeros(0, dtype=np.int64)
+        return (self.__ordered(events))
+
+    @staticmethod
+    def __event(block, slot, sub1, sub2, kind, symbol, value, size,
+                count=None):
+        """
+        Returns the arrays of count events broadcasting the scalars
+        """
+        if count is None:
+            count = np.shape(value)[0] if np.ndim(value) else 1
+        return tuple(np.broadcast_to(np.asarray(x, dtype=np.int64), (count,))
+                     for x in (block, slot, sub1, sub2, kind, symbol,
+                               value, size))
+
+    def __ordered(self, events):
+        """
+        Sorts events into coding order
+        """
+        if not events:
+            empty = np.zeros(0, dtype=np.int64)
+            return (empty, empty, empty, empty, empty)
+        block, slot, sub1, sub2, kinds, symbols, values, sizes = (
+            np.concatenate(x) for x in zip(*events))
+        order = np.lexsort((sub2, sub1, slot, block))
+        return (np.zeros(order.shape, dtype=np.int64), kinds[order],
+                symbols[order], values[order], sizes[order])
+
+    def __first_events(self, band):
+        """
+        Returns the events of an AC first scan
+        """
+        n, length = band.shape
+        magnitude = np.abs(band) >> self.__low
+        block, position = np.nonzero(magnitude)
+        value = magnitude[block, position]
+        value = np.where(band[block, position] < 0, -value, value)
+        size = bit_size(value)
+
+        first = np.ones(block.shape, dtype=bool)
+        first[1:] = block[1:] != block[:-1]
+        previous = np.empty_like(position)
+        previous[0:1] = -1
+        previous[1:] = position[:-1]
+        previous[first] = -1
+        run = position - previous - 1
+        zrl = run >> 4
+
+        # Blocks that end in zeros join the end of band run
+        last = np.full(n, -1)
+        final = np.ones(block.shape, dtype=bool)
+        final[:-1] = block[:-1] != block[1:]
+        last[block[final]] = position[final]
+        eob = last < length - 1
+
+        events = self.__eobrun_events(eob, block[first], 4 * position[first])
+        events.append(self.__event(np.repeat(block, zrl),
+                                   np.repeat(4 * position + 1, zrl), 0, 0,
+                                   AC, ZRL, 0, 0, int(zrl.sum())))
+        events.append(self.__event(block, 4 * position + 2, 0, 0, AC,
+                                   ((run & 15) << 4) | size, value, size))
+        return (events)
+
+    def __refine_events(self, band):
+        """
+        Returns the events of an AC refinement scan
+        """
+        n, length = band.shape
+        magnitude = np.abs(band) >> self.__low
+        new = magnitude == 1
+        old = magnitude > 1
+
+        # Position of the last newly non zero coefficient (-1 if none)
+        has_new = new.any(axis=1)
+        last_new = np.where(has_new,
+                            length - 1 - np.argmax(new[:, ::-1], axis=1), -1)
+        zeros = np.cumsum(magnitude == 0, axis=1)
+
+        # Checkpoints: non zero coefficients up to the last new one.
+        # ZRL symbols are only coded at checkpoints
+        block, position = np.nonzero(magnitude)
+        check = position <= last_new[block]
+        cb, cp = block[check], position[check]
+        cnew = new[cb, cp]
+        index = np.arange(cb.shape[0])
+
+        # Zeros since the last new coefficient of the block
+        marks = np.maximum.accumulate(np.where(cnew, index, -1))
+        start = np.full(cb.shape, -1)
+        start[1:] = marks[:-1]
+        valid = start >= 0
+        valid[valid] = cb[start[valid]] == cb[valid]
+        base = np.zeros(cb.shape, dtype=np.int64)
+        base[valid] = zeros[cb[start[valid]], cp[start[valid]]]
+        run = zeros[cb, cp] - base
+
+        # ZRLs already coded in the same run at the last checkpoint
+        same = np.zeros(cb.shape, dtype=bool)
+        same[1:] = (cb[1:] == cb[:-1]) & ~cnew[:-1]
+        before = np.zeros(cb.shape, dtype=np.int64)
+        before[1:] = run[:-1]
+        before[~same] = 0
+        zrl = (run >> 4) - (before >> 4)
+
+        # Symbols after which the buffered correction bits are coded
+        anchor = (zrl > 0) | cnew
+        ab, ap = cb[anchor], cp[anchor]
+        aslot = np.where(zrl[anchor] > 0, 4 * ap + 1, 4 * ap + 2)
+        first = np.ones(ab.shape, dtype=bool)
+        first[1:] = ab[1:] != ab[:-1]
+
+        events = []
+        # Correction bits of the coefficients that were non zero
+        ob, op = np.nonzero(old)
+        bits = magnitude[ob, op] & 1
+        keys = ab * 64 + ap
+        after = np.searchsorted(keys, ob * 64 + op, side='right')
+        anchored = after < keys.shape[0]
+        anchored[anchored] = ab[after[anchored]] == ob[anchored]
+        at = after[anchored]
+        events.append(self.__event(ab[at], aslot[at], 1, op[anchored], RAW,
+                                   0, bits[anchored], 1))
+        events.extend(self.__eobrun_events(
+            last_new < length - 1, ab[first], 4 * ap[first],
+            ob[~anchored], op[~anchored], bits[~anchored]))
+
+        # ZRL symbols (the first one is followed by the bits)
+        zb = np.repeat(cb, zrl)
+        count = zb.shape[0]
+        nth = np.arange(count) - np.repeat(np.cumsum(zrl) - zrl, zrl)
+        events.append(self.__event(zb, np.repeat(4 * cp + 1, zrl),
+                                   np.where(nth > 0, 2, 0), nth, AC, ZRL, 0,
+                                   0, count))
+        # New coefficients with their sign bit
+        sign = (band[cb, cp] > 0).astype(np.int64)[cnew]
+        events.append(self.__event(cb[cnew], 4 * cp[cnew] + 2, 0, 0, AC,
+                                   ((run[cnew] & 15) << 4) | 1, sign, 1))
+        return (events)
+
+    def __eobrun_events(self, eob, emit_block, emit_slot, tail_block=None,
+                        tail_position=None, tail_bits=None):
+        """
+        Returns the EOBn events of a band of blocks and updates the
+        end of band run
+
+        Parameters
+        ----------
+        eob : ndarray
+            (n,) True for the blocks that join the end of band run
+        emit_block, emit_slot : ndarray
+            the first coded symbol of the blocks that code one. The
+            run is coded before it
+        tail_block, tail_position, tail_bits : ndarray
+            correction bits that are coded after the EOBn symbol of
+            their block
+        """
+        if tail_block is None:
+            tail_block = tail_position = tail_bits = np.zeros(
+                0, dtype=np.int64)
+        eob_block = np.flatnonzero(eob)
+        flush_block = emit_block.astype(np.int64)
+        flush_slot = emit_slot.astype(np.int64)
+
+        while True:
+            keys = flush_block * (END + 1) + flush_slot
+            group = np.searchsorted(keys, eob_block * (END + 1) + END)
+            runs = np.bincount(group, minlength=keys.shape[0] + 1)
+            runs[0] += self.__eobrun
+            full = np.flatnonzero(runs > MAX_EOBRUN)
+            if not full.size:
+                break
+            # Code a run as soon as it reaches MAX_EOBRUN
+            forced = []
+            for g in full:
+                members = eob_block[group == g]
+                carry = self.__eobrun if g == 0 else 0
+                forced.extend(members[MAX_EOBRUN - carry - 1::MAX_EOBRUN])
+            forced = np.array(forced, dtype=np.int64)
+            flush_block = np.concatenate((flush_block, forced))
+            flush_slot = np.concatenate((flush_slot,
+                                         np.full(forced.shape, END)))
+            order = np.lexsort((flush_slot, flush_block))
+            flush_block, flush_slot = flush_block[order], flush_slot[order]
+
+        events = []
+        count = keys.shape[0]
+        coded = np.flatnonzero(runs[0:count] > 0)
+        symbols, values, sizes = eobrun_symbols(runs[coded])
+        events.append(self.__event(flush_block[coded], flush_slot[coded], 0,
+                                   0, AC, symbols, values, sizes))
+
+        # Correction bits left from the previous band
+        bits = self.__pending
+        if count and self.__eobrun:
+            events.append(self.__event(flush_block[0], flush_slot[0], 0,
+                                       1 + np.arange(bits.size), RAW, 0, bits,
+                                       1, bits.size))
+            bits = np.zeros(0, dtype=np.int64)
+
+        # Correction bits of the blocks of the band
+        owner = np.full(eob.shape[0], count)
+        owner[eob_block] = group
+        tail = owner[tail_block]
+        coded = tail < count
+        events.append(self.__event(flush_block[tail[coded]],
+                                   flush_slot[tail[coded]],
+                                   1 + tail_block[coded],
+                                   tail_position[coded], RAW, 0,
+                                   tail_bits[coded], 1))
+
+        self.__eobrun = int(runs[count])
+        self.__pending = np.concatenate((bits, tail_bits[~coded]))
+        return (events)
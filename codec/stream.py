@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+"""
+A module that encodes an image one strip of MCU rows at a time, so
+that the memory used depends on the width of the image and not on
+its size
+
+The Encoder needs the whole image as one array and makes full size
+Y, Cr, Cb planes at every stage. The StreamEncoder takes the image
+rows from any iterator of (rows, height, 3) RGB strips, and every
+MCU row (8 image rows, 16 with 4:2:0) goes through all the stages of
+the Encoder before the next rows are read
+
+Stages for every MCU row
+------------------------
+    YCrCb Conversion and Level Shifting:
+        As in Encoder.RGB2YCrCb
+    Sampling:
+        The chroma rows of the strip are subsampled (the MCU row
+        holds whole groups of subsampled rows)
+    Padding:
+        The columns are padded to the MCU width and the last strip
+        is padded with copies of the last image row
+    DCT Transform and Quantization:
+        As in Encoder.compression
+
+Example
+-------
+    $ stream = StreamEncoder(width, height, 50, subsampling='4:2:0')
+    $ for Y, Cr, Cb in stream.encode(strips):
+    $     write(Y, Cr, Cb)
+"""
+
+# Python modules utilized
+import numpy as np
+from math import ceil
+
+# Modules (functions) from util_func package
+from util_func.padding import pad_edges
+from util_func.blocks import get_blocks
+from util_func.blocks import put_blocks
+from util_func.memory import get_dtype_policy
+from util_func.memory import store
+from util_func.sampling import get_factors
+from util_func.sampling import chroma_dimensions
+from util_func.sampling import downsample
+from util_func.color import rgb_to_ycrcb
+from util_func.transform import get_backend
+from util_func.quantization import get_quant_table
+
+
+class StreamEncoder:
+    """
+    A class that compresses an image from a source of image rows
+
+    Parameters
+    ----------
+    bits : int, constant
+        The number of bits in each row and in each col of the MCU
+
+    Methods
+    -------
+    encode:
+        Generator that yields the quantized planes of every MCU row
+    """
+
+    bits = 8
+
+    def __init__(self, width, height, quality=50, table_set='standard',
+                 backend=None, dtype=None, subsampling='4:4:4'):
+        """
+        Instance attributes
+
+        Attributes
+        ----------
+        width : int
+            The width (rows) of the image
+        height : int
+            The height (columns) of the image
+        quality : int
+            The compression quality
+        table_set : str
+            The name of the quantization table set
+        backend : str
+            The name of the DCT transform backend
+        dtype : str or None
+            The dtype policy of the strips (see
+            util_func.memory.DTYPE_POLICIES). None uses float64
+        subsampling : str
+            The chroma subsampling mode
+        paddedWidth : int
+            The width after padding to whole MCU rows
+        paddedHeight : int
+            The height after padding to whole MCU columns
+        strip_rows : int
+            The number of image rows in an MCU row
+        """
+        if not (isinstance(width, int) and isinstance(height, int)):
+            raise TypeError('Image dimensions must be integers')
+        if width < 1 or height < 1:
+            raise ValueError('Image dimensions must be positive')
+        self.__width = width
+        self.__height = height
+        self.__quality = quality
+        self.__backend = get_backend(backend)
+        self.__policy = get_dtype_policy(dtype)
+        self.__subsampling = subsampling
+        self.__factors = get_factors(subsampling)
+        self.__table = get_quant_table(quality, 'luma', table_set,
+                                       self.__backend.name)
+
+        fr, fc = self.__factors
+        self.__strip_rows = self.bits * fr
+        self.__paddedWidth = ceil(width / (self.bits * fr)) * self.bits * fr
+        self.__paddedHeight = ceil(height / (self.bits * fc)) * \
+            self.bits * fc
+
+    @property
+    def width(self):
+        return self.__width
+
+    @property
+    def height(self):
+        return self.__height
+
+    @property
+    def paddedWidth(self):
+        return self.__paddedWidth
+
+    @property
+    def paddedHeight(self):
+        return self.__paddedHeight
+
+    @property
+    def subsampling(self):
+        return self.__subsampling
+
+    @property
+    def strip_rows(self):
+        return self.__strip_rows
+
+    def encode(self, strips):
+        """
+        A generator that compresses the rows of strips one MCU row at
+        a time
+
+        Parameters
+        ----------
+        strips : iterable
+            (rows, height, 3) uint8 RGB arrays with the image rows in
+            order. Strips can have any number of rows
+
+        Yields
+        ------
+        tuple:
+            (Y, Cr, Cb) quantized planes of an MCU row with
+            strip_rows luma rows
+        """
+        buffer = np.empty((self.__strip_rows, self.__height, 3),
+                          dtype=np.uint8)
+        filled = 0
+        rows = 0
+        for strip in strips:
+            strip = np.asarray(strip)
+            if strip.ndim != 3 or strip.shape[1:] != (self.__height, 3):
+                raise ValueError('Strips must be (rows, height, 3) arrays')
+            rows += strip.shape[0]
+            if rows > self.__width:
+                raise ValueError('Row source has more rows than the image')
+            start = 0
+            while start < strip.shape[0]:
+                n = min(self.__strip_rows - filled, strip.shape[0] - start)
+                buffer[filled:filled + n] = strip[start:start + n]
+                filled += n
+                start += n
+                if filled == self.__strip_rows:
+                    yield (self.__encode_strip(buffer, filled))
+                    filled = 0
+        if rows != self.__width:
+            raise ValueError('Row source ended before the last image row')
+        if filled:
+            yield (self.__encode_strip(buffer, filled))
+
+    def __encode_strip(self, rgb, n):
+        """
+        Compresses the first n rows of an MCU row of RGB pixels
+
+        Returns
+        -------
+        tuple:
+            (Y, Cr, Cb) quantized planes of the MCU row
+        """
+        sample = self.__policy.sample if self.__policy else np.float64
+        fc = self.__factors[1]
+        shape = (self.__strip_rows, self.__paddedHeight)
+        chroma_shape = (self.bits, self.__paddedHeight // fc)
+
+        Y, Cr, Cb = (np.empty(shape, dtype=sample) for _ in range(3))
+        rgb_to_ycrcb(rgb[0:n], [plane[0:n, 0:self.__height]
+                                for plane in (Y, Cr, Cb)])
+
+        pad_edges(Y, n, self.__height)
+        if self.__factors != (1, 1):
+            w, h = chroma_dimensions(n, self.__height, self.__factors)
+            chroma = []
+            for plane in (Cr, Cb):
+                small = downsample(plane[0:n, 0:self.__height],
+                                   self.__factors)
+                out = np.empty(chroma_shape, dtype=sample)
+                store(out[0:w, 0:h], small)
+                pad_edges(out, w, h)
+                chroma.append(out)
+            Cr, Cb = chroma
+        else:
+            pad_edges(Cr, n, self.__height)
+            pad_edges(Cb, n, self.__height)
+
+        return tuple(self.__compress_plane(plane) for plane in (Y, Cr, Cb))
+
+    def __compress_plane(self, plane):
+        """
+        Applies dct transform and quantization to the blocks of a
+        padded MCU row plane (see Encoder.compression)
+        """
+        work = self.__policy.work if self.__policy else np.float64
+        if (self.__backend.integer
+                and np.issubdtype(plane.dtype, np.integer)):
+            work = np.int32
+        blocks = get_blocks(plane, self.bits, work)
+        put_blocks(plane, self.__table.quantize(
+            self.__backend.forward(blocks)), self.bits)
+        return (plane)
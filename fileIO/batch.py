@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+A module that compresses a batch of image files on a pool of worker
+processes
+
+Every image is compressed by picture in a worker process without
+saving its details. The details are sent back to the parent process,
+which adds them to storage and saves the json file once for the
+whole batch
+
+Example
+-------
+    $ jobs = get_path_array(args, file_type='file')
+    $ results = compress_batch(jobs)
+"""
+
+# Modules (functions) from fileIO package
+from fileIO.compress import picture
+from fileIO import storage
+
+# Modules (functions) from util_func package
+from util_func.workers import WorkerPool
+
+
+def compress_job(job) -> tuple:
+    """
+    A function that compresses one image of a batch (in a worker
+    process)
+
+    Parameters
+    ----------
+    job : list
+        (pathname, quality, options) as made by get_path_array
+
+    Returns
+    -------
+    tuple:
+        (details : dict or None, error : str or None)
+    """
+    pathname, quality, options = job
+    try:
+        return (picture(pathname, quality, commit=False, **options), None)
+    except Exception as er:
+        return (None, error_message(er))
+
+
+def error_message(er) -> str:
+    """
+    A function that returns the message of the exception of a job
+    """
+    try:
+        e = er.exception
+    except Exception:
+        return (str(er))
+    return (str(e))
+
+
+def compress_batch(jobs, workers=None) -> list:
+    """
+    A function that compresses the images of a batch on worker
+    processes and commits their details to storage
+
+    Parameters
+    ----------
+    jobs : list
+        (pathname, quality, options) lists as made by get_path_array
+    workers : int or None
+        The number of worker processes. None uses every CPU
+
+    Returns
+    -------
+    list:
+        (details : dict or None, error : str or None) of every job in
+        the order of the jobs
+    """
+    with WorkerPool(workers, processes=True) as pool:
+        results = list(pool.map(compress_job, jobs))
+    commit_results(results)
+    return (results)
+
+
+def commit_results(results) -> None:
+    """
+    A function that adds the details of the compressed images of a
+    batch to storage and saves the json file once (failed jobs have
+    no details and are skipped)
+
+    Parameters
+    ----------
+    results : list
+        (details : dict or None, error : str or None) of every job
+    """
+    for details, _ in results:
+        storage.new(details)
+    storage.save()
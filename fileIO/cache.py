@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+"""
+Module that keeps the outputs of compressions in a content addressed
+cache, so that compressing the same file with the same settings again
+returns the existing output and its details without compressing it
+
+Key
+---
+    $ key = sha256(input bytes + json of the compression settings)
+    The settings are every picture parameter that changes the output
+    file (quality, mode, backend, table set, ...). Renaming or moving
+    the input file does not change the key
+
+Eviction
+--------
+    The entries are kept in least recently used order. When the
+    outputs of the cache add up to more than max_size bytes, the least
+    recently used outputs are deleted until they fit (the newest
+    output is always kept). The storage records of the evicted
+    outputs are removed with them, so no record points to a deleted
+    file
+
+Example
+-------
+    $ cache = ResultCache()
+    $ details = picture('image.png', 60, cache=cache)
+    $ again = picture('image.png', 60, cache=cache)
+    $ again['cache_hit']
+    $ > True
+"""
+
+# Python modules
+import hashlib
+import json
+import os
+
+# Modules (functions) from fileIO package
+from fileIO import storage
+
+# The default bound of the outputs of a cache in bytes
+CACHE_SIZE = 512 * 2 ** 20
+
+# The number of bytes of the input read at a time for the hash
+CHUNK_SIZE = 2 ** 20
+
+
+def cache_key(filename, settings) -> str:
+    """
+    Function that makes the key of a compression from the bytes of
+    its input file and its settings
+
+    Parameters
+    ----------
+    filename : str
+        The pathname of the input image file
+    settings : dict
+        The compression settings (json serializable)
+
+    Returns
+    -------
+    str
+        The hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as image:
+        for chunk in iter(lambda: image.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return (digest.hexdigest())
+
+
+class ResultCache:
+    """
+    A class that maps compression keys to their output files and
+    details, and saves the map in a json file next to the json file
+    of FileStorage
+
+    Parameters
+    ----------
+    path : str
+        The pathname of the json file of the cache
+    max_size : int
+        The maximum number of bytes of the cached outputs
+
+    Methods
+    -------
+    get :
+        returns the details of a key or None
+    put :
+        adds the details of a new output under a key
+    clear :
+        forgets every entry without deleting the outputs
+    save :
+        serializes the entries to json
+    """
+
+    def __init__(self, path='result_cache.json', max_size=CACHE_SIZE):
+        """
+        Instance attributes (see the class parameters)
+        """
+        if not isinstance(max_size, int):
+            raise TypeError('max_size must be an integer')
+        if max_size <= 0:
+            raise ValueError('max_size must be a positive number')
+        self.__path = path
+        self.__max_size = max_size
+        # {key: {'size': int, 'details': dict}} in least recently used
+        # order
+        self.__entries = {}
+        self.reload()
+
+    @property
+    def path(self):
+        return self.__path
+
+    @property
+    def max_size(self):
+        return self.__max_size
+
+    @property
+    def size(self):
+        """
+        The number of bytes of the cached outputs
+        """
+        return (sum(entry['size'] for entry in self.__entries.values()))
+
+    def __len__(self):
+        return (len(self.__entries))
+
+    def __contains__(self, key):
+        return (key in self.__entries)
+
+    def reload(self) -> None:
+        """
+        Deserializes the json file of the cache (an empty cache if it
+        does not exist)
+        """
+        try:
+            with open(self.__path, mode='r') as jfile:
+                self.__entries = json.load(jfile)
+        except (OSError, ValueError):
+            self.__entries = {}
+
+    def save(self) -> None:
+        """
+        Serializes the entries to the json file of the cache
+        """
+        with open(self.__path, 'w') as jfile:
+            json.dump(self.__entries, jfile)
+
+    def get(self, key):
+        """
+        Returns the details of the output of a key and marks it as the
+        most recently used. An entry whose output was deleted or
+        changed is dropped
+
+        Returns
+        -------
+        dict or None
+            A copy of the details, or None on a miss
+        """
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return (None)
+        full_path = entry['details']['out_fullpath']
+        if (not os.path.isfile(full_path) or
+                os.path.getsize(full_path) != entry['size']):
+            self.save()
+            return (None)
+        self.__entries[key] = entry
+        self.save()
+        return (dict(entry['details']))
+
+    def put(self, key, details) -> None:
+        """
+        Adds the details of a new output under a key, then deletes the
+        least recently used outputs and their storage records while
+        the cache is over max_size
+
+        Parameters
+        ----------
+        key : str
+            The key of the compression (see cache_key)
+        details : dict
+            The details of the output (see fileIO.compress.picture)
+        """
+        full_path = details['out_fullpath']
+        # An output written over an older one replaces its entry
+        for old in [old for old, entry in self.__entries.items()
+                    if entry['details']['out_fullpath'] == full_path]:
+            del self.__entries[old]
+        self.__entries.pop(key, None)
+        self.__entries[key] = {
+            'size': os.path.getsize(full_path),
+            'details': details
+        }
+
+        total = self.size
+        evicted = False
+        while total > self.__max_size and len(self.__entries) > 1:
+            old = next(iter(self.__entries))
+            entry = self.__entries.pop(old)
+            total -= entry['size']
+            old_path = entry['details']['out_fullpath']
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+            evicted |= storage.discard(
+                entry['details']['compressed_image_name'], old_path)
+        if evicted:
+            storage.save()
+        self.save()
+
+    def clear(self) -> None:
+        """
+        Forgets every entry. The outputs are not deleted
+        """
+        self.__entries = {}
+        if os.path.exists(self.__path):
+            os.remove(self.__path)
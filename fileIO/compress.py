@@ -9,26 +9,58 @@ of the image to enable image compression
 from uuid import uuid4
 from datetime import datetime
 import os
+import shutil
 import numpy as np
 
 # Modules (functions) from codec package
 from codec import Encoder
 from codec import Decoder
+from codec.stream import StreamEncoder
 
 # Modules (functions) from util_func package
 from util_func.helpers import picture_resolution
 from util_func.helpers import get_image_size
+from util_func.memory import MemoryTracker
+from util_func.memory import format_size
+from util_func.memory import get_dtype_policy
+from util_func.memory import store
+from util_func.blocks import block_view
+from util_func.blocks import iter_bands
+from util_func.quantization import get_quant_table
+from util_func.quantization import requantize_blocks
+from util_func.quantization import estimate_quality
+from util_func.transform import get_backend
+from util_func.native import LIBRARY
 
 # Modules (functions) from fileIO package
 from fileIO.image_io import save_image
 from fileIO.image_io import get_image_array
+from fileIO.image_io import get_image_strips
+from fileIO.jpeg_writer import write_jpeg
+from fileIO.jpeg_writer import write_jpeg_stream
+from fileIO.jpeg_writer import JPEG_EXTENSIONS
+from fileIO.jpeg_reader import JpegReader
+from fileIO.jpeg_reader import probe_jpeg
+from fileIO.rate import rate_image
+from fileIO.cache import cache_key
 from fileIO import storage
 
 
-def picture(filename, quality=50, output_image_name=None):
+def picture(filename, quality=50, output_image_name=None,
+            table_set='standard', backend=None, dtype=None,
+            subsampling='4:4:4', optimize=False, mode='baseline',
+            scans='default', transcode=False, restart_rows=0,
+            workers=1, stream=False, memmap=None, commit=True,
+            target_size=None, target_psnr=None, passthrough=False,
+            cache=None, track_memory=False):
     """
     The main function that compresses an image file
 
+    The quantized planes are entropy coded and written directly to
+    a baseline JPEG file (see fileIO.jpeg_writer). Qualities above 95
+    and output names without a JPEG extension are decompressed and
+    saved with pillow
+
     Parameters:
     -----------
     filename: str
@@ -37,6 +69,84 @@ def picture(filename, quality=50, output_image_name=None):
         The compression quality required
     output_image_name: str
         The pathname to store the compressed image
+    table_set: str
+        The name of the quantization table set to use. Custom
+        tables are registered once with load_quant_tables and then
+        reused by name for every image of a batch
+    backend: str or None
+        The name of the DCT transform backend (see
+        util_func.transform). 'native' runs the C kernels of C_library
+        (numpy without the library). None uses 'matrix'
+    dtype: str
+        The dtype policy of the codec planes ('float32' or 'int16').
+        None keeps the float64 planes
+    subsampling: str
+        The chroma subsampling mode ('4:4:4', '4:2:2' or '4:2:0').
+        Subsampled chroma channels need half or a quarter of the
+        memory and transform work
+    optimize: bool
+        True to build Huffman tables from the symbol counts of the
+        image. It costs a second pass over the quantized blocks and
+        makes the file a few percent smaller at the same quality
+    mode: str
+        'baseline' or 'progressive'. Progressive files show a preview
+        of the whole image after the first scan
+    scans: str or sequence
+        The scan script of progressive files. The name of a preset
+        ('default', 'spectral' or 'dc') or a sequence of
+        (components, Ss, Se, Ah, Al) scans
+    transcode: bool
+        True to requantize the coefficients of a baseline JPEG input
+        to the quality without decoding it to pixels (see
+        transcode_image). The input keeps its own subsampling.
+        Progressive and other inputs, and every input when the
+        Huffman decoder of C_library is not loaded, are compressed
+        from their pixels (transcoded is then False)
+    restart_rows: int
+        The number of MCU rows between the restart markers of a
+        baseline file (0 for none). The restart segments are entropy
+        coded in parallel
+    workers: int
+        The number of workers that transform the bands of the planes,
+        code the restart segments and decode the restart intervals of
+        a transcoded input. None uses every CPU
+    stream: bool
+        True to compress and write the image one MCU row at a time
+        (see stream_image), so the codec memory does not grow with
+        the image size. Only baseline JPEG files with the standard
+        Huffman tables can be streamed
+    memmap: bool or None
+        True to keep the Y, Cr, Cb planes (and the decoded RGB array
+        of the pixel path) in memory mapped scratch files, False to
+        keep them in memory. None maps them for images with at least
+        util_func.memory.MEMMAP_PIXELS pixels (see configure_memmap)
+    commit: bool
+        True to add the details to storage and save the json file.
+        A batch commits the details of all its images at once (see
+        fileIO.batch)
+    target_size: int or None
+        Rate control: the maximum number of bytes of the JPEG file.
+        The image is written at the highest quality up to quality
+        that fits (see fileIO.rate)
+    target_psnr: float or None
+        Rate control: the minimum PSNR in dB of the decoded image.
+        The image is written at the lowest quality up to quality that
+        reaches it
+    passthrough: bool
+        True to copy (or hardlink) a JPEG input whose estimated IJG
+        quality (see source_quality) is at most quality to the JPEG
+        output instead of compressing it again. The copy keeps the
+        mode and the subsampling of the input. Not checked with a
+        rate control target
+    cache: ResultCache or None
+        The cache of the outputs (see fileIO.cache). When the input
+        bytes were compressed before with the same settings and the
+        output still exists, its details are returned without
+        compressing the file. New outputs are added to the cache
+    track_memory: bool
+        True to measure the peak memory of the compression with
+        tracemalloc (see util_func.memory.MemoryTracker), which makes
+        it about 11% slower. False leaves peak_memory None
 
     Returns:
     --------
@@ -54,14 +164,142 @@ def picture(filename, quality=50, output_image_name=None):
             out_size : str - (size of the compressed image)
             in_resolution : str (input image resolution)
             out_resolution : str (output image resolution)
+            peak_memory : str or None (peak memory used by the codec,
+                                       only with track_memory)
+            first_scan_offset : int (byte offset at which the first
+                                     full image scan ends)
+            rate_control : dict (only with a target, the target, the
+                                 value reached, if it was met and the
+                                 number of qualities tried. quality is
+                                 the chosen quality)
+            source_quality : int or None (only with passthrough, the
+                                          estimated quality of a JPEG
+                                          input)
+            passthrough : bool (only with passthrough, True if the
+                                input was copied. quality is then the
+                                source quality)
+            cache_hit : bool (only with a cache, True if the details
+                              are the ones of a cached output)
+            transcoded : bool (only with transcode, True if the
+                               coefficients of the input were
+                               requantized)
         }
     """
 
+    names = output_names(filename, output_image_name)
+    full_path = names[2]
+
+    native = native_output(quality, full_path)
+    if stream and not (native and mode == 'baseline' and not optimize):
+        raise ValueError('Only baseline JPEG files with the standard '
+                         'tables can be streamed')
+    rate = target_size is not None or target_psnr is not None
+    if rate and (stream or transcode or not native):
+        raise ValueError('Rate control needs a JPEG file written from '
+                         'the pixels of the image')
+
+    if cache is not None:
+        key = cache_key(filename, {
+            'quality': quality,
+            'output_image_name': output_image_name,
+            'table_set': table_set,
+            'backend': get_backend(backend).name,
+            'dtype': dtype,
+            'subsampling': subsampling,
+            'optimize': optimize,
+            'mode': mode,
+            'scans': scans,
+            'transcode': transcode,
+            'restart_rows': restart_rows,
+            'stream': stream,
+            'target_size': target_size,
+            'target_psnr': target_psnr,
+            'passthrough': passthrough
+        })
+        im_details = cache.get(key)
+        if im_details is not None:
+            im_details['cache_hit'] = True
+            return (im_details)
+
+    source = copied = None
+    if passthrough and not rate:
+        source = source_quality(filename)
+        copied = native and source is not None and source <= quality
+
+    first_scan_offset = report = transcoded = None
     start_time = datetime.now()
-    ar, input_details = compress_image(filename, quality)
-    image_array = decompress_image(ar, input_details)
+    with MemoryTracker(track_memory) as tracker:
+        if copied:
+            copy_image(filename, full_path)
+            quality = source
+        elif rate:
+            quality, first_scan_offset, report = rate_image(
+                filename, full_path, quality, target_size, target_psnr,
+                table_set, backend, dtype, subsampling, optimize, mode,
+                scans, restart_rows, workers)
+        elif stream:
+            first_scan_offset = stream_image(filename, full_path, quality,
+                                             table_set, backend, dtype,
+                                             subsampling, restart_rows)
+        else:
+            if transcode:
+                transcoded = transcode_image(filename, quality, table_set,
+                                             backend, dtype, workers)
+            if transcoded:
+                ar, input_details = transcoded
+            else:
+                ar, input_details = compress_image(filename, quality,
+                                                   table_set, backend,
+                                                   dtype, subsampling,
+                                                   memmap, workers)
+            # Keep only whether the input was transcoded
+            transcoded = bool(transcoded)
+            first_scan_offset = write_image(full_path, ar, input_details,
+                                            optimize, mode, scans,
+                                            restart_rows, workers)
+            del ar
     end_time = datetime.now()
 
+    im_details = image_details(names, quality, filename, start_time,
+                               end_time, tracker.peak, first_scan_offset)
+    if report:
+        im_details['rate_control'] = report
+    if passthrough and not rate:
+        im_details['source_quality'] = source
+        im_details['passthrough'] = copied
+    if transcode:
+        im_details['transcoded'] = bool(transcoded)
+    if cache is not None:
+        cache.put(key, dict(im_details))
+        im_details['cache_hit'] = False
+
+    # Save the details of the compressed file
+    if commit:
+        storage.new(im_details)
+        storage.save()
+
+    return (im_details)
+
+
+def output_names(filename, output_image_name=None) -> tuple:
+    """
+    Function that makes the id of a compression and the pathname of
+    its compressed image, and creates the output directory
+
+    Parameters:
+    -----------
+    filename: str
+        The pathname of the image file to compress
+    output_image_name: str
+        The name of the compressed image. None names it after the
+        input and the id
+
+    Returns
+    -------
+    tuple
+        (user_id : str, compressed_image_name : str, full_path : str)
+    """
+
     # Get unique ID for each user
     user_id = str(uuid4())
 
@@ -76,16 +314,117 @@ def picture(filename, quality=50, output_image_name=None):
 
     # If the directory does not exit, create it
     os.makedirs(output_path, exist_ok=True)
+    return (user_id, compressed_image_name, full_path)
+
+
+def native_output(quality, full_path) -> bool:
+    """
+    Function that tells if the quantized planes of an image can be
+    written straight to its JPEG file. The pixel path (decompress and
+    save with pillow) is only needed for qualities above 95 and non
+    JPEG output names
+    """
+    return (quality <= 95 and
+            full_path.split('.')[-1].lower() in JPEG_EXTENSIONS)
+
+
+def source_quality(filename):
+    """
+    Function that estimates the IJG quality of a JPEG file from the
+    quantization table of its first component (see
+    util_func.quantization.estimate_quality). Only the segments before
+    the first scan are read
+
+    Returns
+    -------
+    int or None
+        The quality, or None if the file is not a JPEG file
+    """
+    try:
+        quant_tables, components = probe_jpeg(filename)
+    except ValueError:
+        return (None)
+    table = quant_tables.get(components[0][3]) if components else None
+    if table is None:
+        return (None)
+    return (estimate_quality(table))
+
+
+def copy_image(filename, full_path) -> None:
+    """
+    Function that hardlinks an input file to its output pathname, or
+    copies it where a link can not be made (another file system or an
+    existing output)
+    """
+    try:
+        os.link(filename, full_path)
+    except OSError:
+        shutil.copyfile(filename, full_path)
+
+
+def write_image(full_path, image_tuple, input_details, optimize=False,
+                mode='baseline', scans='default', restart_rows=0,
+                workers=1):
+    """
+    Function that writes the compressed planes of an image to its
+    output file (see picture for the parameters)
+
+    Returns
+    -------
+    int or None
+        The byte offset at which the first full image scan of a JPEG
+        file written from the planes ends
+    """
+    if native_output(input_details['quality'], full_path):
+        return (write_jpeg(full_path, image_tuple, input_details, optimize,
+                           mode, scans, restart_rows, workers))
+    image_array = decompress_image(image_tuple, input_details, workers)
     # Save the image file
-    save_image(image_array, full_path)
+    save_image(image_array, full_path, mode == 'progressive')
+    return (None)
+
+
+def image_details(names, quality, filename, start_time, end_time, peak,
+                  first_scan_offset=None, resolution=None) -> dict:
+    """
+    Function that makes the details dictionary of a compressed image
+    (see picture)
+
+    Parameters:
+    -----------
+    names: tuple
+        (user_id, compressed_image_name, full_path) as made by
+        output_names
+    quality: int
+        The compression quality
+    filename: str
+        The pathname of the input image file
+    start_time, end_time: datetime
+        The start and the end of the compression
+    peak: int or None
+        The peak memory used by the codec in bytes (None if it was
+        not measured)
+    resolution: str
+        The resolution of the input and the output images. None reads
+        them from the files
+
+    Returns
+    -------
+    dict
+    """
+
+    user_id, compressed_image_name, full_path = names
 
     # Get the input image size and output image size
     in_size = get_image_size(filename)
     out_size = get_image_size(full_path)
 
     # Get the image resolution
-    in_resolution = picture_resolution(filename)
-    out_resolution = picture_resolution(full_path)
+    if resolution:
+        in_resolution = out_resolution = resolution
+    else:
+        in_resolution = picture_resolution(filename)
+        out_resolution = picture_resolution(full_path)
 
     # Get the time taken
     start_time_str = start_time.strftime("%y-%m-%dT%H:%M:%S")
@@ -93,7 +432,7 @@ def picture(filename, quality=50, output_image_name=None):
     t = end_time - start_time
     t = t.total_seconds()
     time_diff = "{:.0f}m:{:.0f}s".format((t // 60), (t % 60))
-    im_details = {
+    return ({
         'user_id': user_id,
         'quality': quality,
         'start_time': start_time_str,
@@ -105,17 +444,15 @@ def picture(filename, quality=50, output_image_name=None):
         'in_size': in_size,
         'in_resolution': in_resolution,
         'out_resolution': out_resolution,
-        'out_size': out_size
-    }
-
-    # Save the details of the compressed file
-    storage.new(im_details)
-    storage.save()
-
-    return (im_details)
+        'out_size': out_size,
+        'peak_memory': None if peak is None else format_size(peak),
+        'first_scan_offset': first_scan_offset
+    })
 
 
-def compress_image(filename, quality) -> tuple:
+def compress_image(filename, quality, table_set='standard',
+                   backend=None, dtype=None,
+                   subsampling='4:4:4', memmap=None, workers=1) -> tuple:
     """
     Function that decodes the image, passing the image file
     through extraction to quantization
@@ -126,6 +463,19 @@ def compress_image(filename, quality) -> tuple:
         The pathname of the image file to compress
     quality: int
         The compression quality required
+    table_set: str
+        The name of the quantization table set
+    backend: str
+        The name of the DCT transform backend
+    dtype: str
+        The dtype policy of the codec planes
+    subsampling: str
+        The chroma subsampling mode
+    memmap: bool or None
+        True to back the planes with memory mapped scratch files.
+        None maps the planes of large images
+    workers: int
+        The number of threads that transform the bands of the planes
 
     Returns
     -------
@@ -139,10 +489,37 @@ def compress_image(filename, quality) -> tuple:
                 paddedWidth: int
                 paddedHeight: int
                 quality: int
+                table_set: str
+                backend: str
+                dtype: str
+                subsampling: str
+                memmap: bool
             }
     """
 
     image_array = get_image_array(filename)
+    return (encode_image(image_array, quality, table_set, backend, dtype,
+                         subsampling, memmap, workers))
+
+
+def encode_image(image_array, quality, table_set='standard',
+                 backend=None, dtype=None, subsampling='4:4:4',
+                 memmap=None, workers=1) -> tuple:
+    """
+    Function that passes the RGB array of an image through the
+    Encoder (see compress_image)
+
+    Parameters:
+    -----------
+    image_array: ndarray
+        3D uint8 RGB array of the image
+
+    Returns
+    -------
+    tuple
+        (image_tuple : tuple, input_details : dict)
+    """
+
     R = image_array[:, :, 0]
     G = image_array[:, :, 1]
     B = image_array[:, :, 2]
@@ -152,12 +529,18 @@ def compress_image(filename, quality) -> tuple:
         'height': 0,
         'paddedHeight': 0,
         'paddedWidth': 0,
-        'quality': quality
+        'quality': quality,
+        'table_set': table_set,
+        'backend': backend,
+        'dtype': dtype,
+        'subsampling': subsampling,
+        'memmap': memmap
     }
     if quality > 95 and quality <= 100:
         return (image_tuple, input_details)
     # Call the Encode functions to compress Image
-    encode = Encoder(image_array, quality)
+    encode = Encoder(image_array, quality, table_set, backend, dtype,
+                     subsampling, memmap, workers)
     encode.RGB2YCrCb()
     encode.sampling()
     encode.padding()
@@ -167,12 +550,142 @@ def compress_image(filename, quality) -> tuple:
     input_details['height'] = encode.height
     input_details['paddedHeight'] = encode.paddedHeight
     input_details['paddedWidth'] = encode.paddedWidth
+    input_details['memmap'] = encode.memmap
 
     image_tuple = (encode.Y, encode.Cr, encode.Cb)
     return (image_tuple, input_details)
 
 
-def decompress_image(image_tuple, input_details):
+def stream_image(filename, full_path, quality, table_set='standard',
+                 backend=None, dtype=None, subsampling='4:4:4',
+                 restart_rows=0) -> int:
+    """
+    Function that compresses an image file into a baseline JPEG file
+    one MCU row at a time (see codec.stream.StreamEncoder and
+    fileIO.jpeg_writer.write_jpeg_stream)
+
+    Parameters:
+    -----------
+    filename: str
+        The pathname of the image file to compress
+    full_path: str
+        The pathname of the JPEG file to write
+    quality: int
+        The compression quality required
+    table_set: str
+        The name of the quantization table set
+    backend: str
+        The name of the DCT transform backend
+    dtype: str
+        The dtype policy of the strips
+    subsampling: str
+        The chroma subsampling mode
+    restart_rows: int
+        The number of MCU rows between restart markers
+
+    Returns
+    -------
+    int
+        The byte offset at which the scan ends
+    """
+    width, height, strips = get_image_strips(filename)
+    encoder = StreamEncoder(width, height, quality, table_set, backend,
+                            dtype, subsampling)
+    input_details = {
+        'width': width,
+        'height': height,
+        'paddedWidth': encoder.paddedWidth,
+        'paddedHeight': encoder.paddedHeight,
+        'quality': quality,
+        'table_set': table_set,
+        'backend': backend,
+        'dtype': dtype,
+        'subsampling': subsampling
+    }
+    return (write_jpeg_stream(full_path, encoder.encode(strips),
+                              input_details, restart_rows))
+
+
+def transcode_image(filename, quality, table_set='standard',
+                    backend=None, dtype=None, workers=1):
+    """
+    Function that compresses a baseline JPEG file by requantizing its
+    coefficients to the quality. The planes are read straight from
+    the file (see fileIO.jpeg_reader), so there is no IDCT, FDCT or
+    color conversion and no rounding of pixels
+
+    The coefficients are only read with the Huffman decoder of
+    C_library (see fileIO.jpeg_reader). The Python decoder takes
+    longer than decoding the file to pixels and compressing them
+    (see benchmarks.bench_transcode), so without the library the
+    file is not transcoded
+
+    Parameters:
+    -----------
+    filename: str
+        The pathname of the JPEG file to compress
+    quality: int
+        The compression quality required
+    table_set: str
+        The name of the quantization table set
+    backend: str
+        The name of the DCT transform backend
+    dtype: str
+        The dtype policy of the codec planes
+    workers: int
+        The number of processes that decode the restart intervals
+        of the input
+
+    Returns
+    -------
+    tuple or None
+        (image_tuple, input_details) as returned by compress_image,
+        or None if the file is not a baseline YCbCr JPEG file with
+        one of the subsampling modes of the Encoder (or the quality
+        is above 95, or the library is not loaded)
+    """
+    if quality > 95 or LIBRARY is None:
+        return (None)
+    try:
+        reader = JpegReader(filename)
+    except ValueError:
+        return (None)
+    subsampling = reader.subsampling
+    if not reader.sequential or subsampling is None:
+        return (None)
+    tables = [reader.quant_tables.get(c[3]) for c in reader.components]
+    if any(table is None for table in tables):
+        raise ValueError('JPEG file uses an undefined quantization table')
+
+    target = get_quant_table(quality, 'luma', table_set, backend).table
+    policy = get_dtype_policy(dtype)
+    sample = policy.sample if policy else np.float64
+    planes = []
+    for plane, source in zip(reader.planes(workers), tables):
+        out = np.empty(plane.shape, dtype=sample)
+        # The blocks are read and written through views, without a
+        # contiguous copy of the band
+        for band, out_band in zip(iter_bands(plane), iter_bands(out)):
+            store(block_view(out_band),
+                  requantize_blocks(block_view(band), source, target))
+        planes.append(out)
+    Y, Cb, Cr = planes
+
+    input_details = {
+        'width': reader.lines,
+        'height': reader.samples,
+        'paddedWidth': Y.shape[0],
+        'paddedHeight': Y.shape[1],
+        'quality': quality,
+        'table_set': table_set,
+        'backend': backend,
+        'dtype': dtype,
+        'subsampling': subsampling
+    }
+    return ((Y, Cr, Cb), input_details)
+
+
+def decompress_image(image_tuple, input_details, workers=1):
     """
     A function that decompresses the encoded image arrays
     back to RGB color channel
@@ -183,11 +696,14 @@ def decompress_image(image_tuple, input_details):
         tuple containing the Y, Cr, Cb channels
     input_details : dict
         dict values with the image dimensions
+    workers : int
+        The number of threads that transform the bands of the planes
 
     Returns
     -------
         ndarray:
-            3D ndarray in RGB color channel
+            3D ndarray in RGB color channel (uint8 pixels below
+            quality 96)
     """
 
     quality = input_details['quality']
@@ -200,10 +716,17 @@ def decompress_image(image_tuple, input_details):
     height = input_details['height']
     paddedHeight = input_details['paddedHeight']
     paddedWidth = input_details['paddedWidth']
+    table_set = input_details.get('table_set', 'standard')
+    backend = input_details.get('backend')
+    dtype = input_details.get('dtype')
+    subsampling = input_details.get('subsampling', '4:4:4')
+    memmap = input_details.get('memmap')
     Y, Cr, Cb = image_tuple
 
     decode = Decoder(Y, Cr, Cb, width, height,
-                     paddedWidth, paddedHeight, quality)
+                     paddedWidth, paddedHeight, quality, table_set,
+                     backend, dtype, subsampling, memmap, workers,
+                     uint8=True)
     decode.decompression()
     decode.reverse_padding()
     decode.reverse_sampling()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+"""
+A module that estimates the size of the JPEG file of quantized planes
+without entropy coding them or writing a file
+
+Model
+-----
+    Symbol statistics:
+        For every component the DC size categories, the (zero run,
+        size) symbols of the non zero AC coefficients, the ZRL symbols
+        of long zero runs and the EOB symbols of the blocks are
+        counted (the symbols of codec.entropy.block_symbols, counted
+        over all the blocks at once instead of block by block)
+    Scan bits:
+        $ bits = sum(counts[symbol] * code_length[symbol])
+        $        + sum(size of every coefficient)
+        with the code lengths of the typical tables, or with optimize
+        of the tables built from the counts
+    File size:
+        $ size = headers + bits / 8 * (1 + 1 / 256) + EOI
+        The headers are the real segments of the file and 1 / 256
+        is the expected share of stuffed 0xFF bytes
+
+With sample, only every sample-th MCU row of the image is encoded and
+counted, and the counts are scaled to the whole image
+
+Example
+-------
+    $ estimate_image('image.jpg', 60, sample=4)
+    $ > 48213
+"""
+
+# Python modules
+import io
+import numpy as np
+
+# Modules (functions) from codec package
+from codec.entropy import EOB
+from codec.entropy import ZRL
+from codec.entropy import bit_size
+from codec.entropy import zigzag_blocks
+from codec.entropy import standard_tables
+from codec.entropy import optimal_table
+
+# Modules (functions) from util_func package
+from util_func.sampling import get_factors
+from util_func.quantization import get_quant_table
+
+# Modules (functions) from fileIO package
+from fileIO.compress import encode_image
+from fileIO.image_io import get_image_array
+from fileIO.jpeg_writer import marker
+from fileIO.jpeg_writer import app0_segment
+from fileIO.jpeg_writer import dqt_segment
+from fileIO.jpeg_writer import sof_segment
+from fileIO.jpeg_writer import sos_segment
+from fileIO.jpeg_writer import frame_layout
+from fileIO.jpeg_writer import write_tables
+
+
+def symbol_statistics(plane, factors=(1, 1), bits=8) -> tuple:
+    """
+    A function that counts the Huffman symbols of a quantized plane
+
+    Parameters
+    ----------
+    plane : ndarray
+        2D array of quantized coefficients whose dimensions are
+        multiples of bits
+    factors : tuple
+        The (H, V) sampling factors of the component. The DC
+        differences follow its blocks in MCU order
+
+    Returns
+    -------
+    tuple:
+        counts : ndarray
+            (2, 256) int64 array of the DC and the AC symbol counts
+        extra : int
+            the number of extra bits of all the coefficients
+    """
+    h, v = factors
+    zigzag = zigzag_blocks(plane, bits)
+    rows, cols = zigzag.shape[0:2]
+    blocks = zigzag.reshape(rows // v, v, cols // h, h, bits * bits)
+    blocks = blocks.transpose(0, 2, 1, 3, 4).reshape(-1, bits * bits)
+    n = blocks.shape[0]
+    counts = np.zeros((2, 256), dtype=np.int64)
+
+    # DC differences along the blocks in coding order
+    dc = blocks[:, 0].astype(np.int64)
+    dc_size = bit_size(np.diff(dc, prepend=0))
+    counts[0] = np.bincount(dc_size, minlength=256)
+
+    # Zero runs before the non zero AC coefficients of each block
+    block, position = np.nonzero(blocks[:, 1:])
+    position = position + 1
+    first = np.ones(block.shape, dtype=bool)
+    first[1:] = block[1:] != block[:-1]
+    previous = np.zeros_like(position)
+    previous[1:] = position[:-1]
+    previous[first] = 0
+    run = position - previous - 1
+    size = bit_size(blocks[block, position])
+    counts[1] = np.bincount(((run & 15) << 4) | size, minlength=256)
+    counts[1, ZRL] += np.sum(run >> 4)
+
+    # Blocks whose last coefficient is zero end with an EOB
+    end = np.ones(block.shape, dtype=bool)
+    end[:-1] = block[:-1] != block[1:]
+    full = np.count_nonzero(position[end] == bits * bits - 1)
+    counts[1, EOB] += n - full
+
+    return (counts, int(dc_size.sum() + size.sum()))
+
+
+def scan_bits(planes, layout, optimize=False, scale=1.0) -> tuple:
+    """
+    A function that estimates the number of bits of the baseline scan
+    of quantized planes
+
+    Parameters
+    ----------
+    planes : sequence
+        the quantized Y, Cb, Cr planes
+    layout : sequence
+        (H, V) sampling factors of the components (see
+        fileIO.jpeg_writer.frame_layout)
+    optimize : bool
+        True to use the Huffman tables built from the counts
+    scale : float
+        The factor the counts are scaled by (the share of the image
+        the planes hold is 1 / scale)
+
+    Returns
+    -------
+    tuple:
+        (bits : float, dc_tables : tuple, ac_tables : tuple)
+    """
+    counts = []
+    extra = 0
+    for plane, factors in zip(planes, layout):
+        plane_counts, plane_extra = symbol_statistics(plane, factors)
+        counts.append(plane_counts)
+        extra += plane_extra
+    luma = counts[0]
+    chroma = sum(counts[1:])
+
+    if optimize:
+        dc_tables = (optimal_table(luma[0]), optimal_table(chroma[0]))
+        ac_tables = (optimal_table(luma[1]), optimal_table(chroma[1]))
+    else:
+        dc_tables, ac_tables = standard_tables()
+
+    bits = extra
+    for index, table_counts in enumerate((luma, chroma)):
+        bits += int(np.dot(table_counts[0], dc_tables[index].sizes))
+        bits += int(np.dot(table_counts[1], ac_tables[index].sizes))
+    return (bits * scale, dc_tables, ac_tables)
+
+
+def header_size(input_details, dc_tables, ac_tables) -> int:
+    """
+    A function that returns the number of bytes of the segments of a
+    baseline file before its scan data
+    """
+    table = get_quant_table(input_details['quality'], 'luma',
+                            input_details.get('table_set', 'standard'),
+                            input_details.get('backend'))
+    layout = frame_layout(input_details)
+    headers = io.BytesIO()
+    headers.write(marker(0xD8))
+    headers.write(app0_segment())
+    headers.write(dqt_segment((table.table,)))
+    headers.write(sof_segment(input_details['width'],
+                              input_details['height'],
+                              [(i + 1, h, v, 0)
+                               for i, (h, v) in enumerate(layout)]))
+    write_tables(headers, dc_tables, ac_tables)
+    headers.write(sos_segment(((1, 0, 0), (2, 1, 1), (3, 1, 1))))
+    return (len(headers.getvalue()))
+
+
+def file_size(bits, input_details, dc_tables, ac_tables) -> int:
+    """
+    A function that returns the estimated size of a file from the
+    estimated bits of its scan (see the Model of the module)
+    """
+    data = bits / 8 * (1 + 1 / 256)
+    return (header_size(input_details, dc_tables, ac_tables) +
+            int(round(data)) + 2)
+
+
+def estimate_size(image_tuple, input_details, optimize=False) -> int:
+    """
+    A function that estimates the size of the baseline JPEG file of
+    the quantized planes of the Encoder
+
+    Parameters
+    ----------
+    image_tuple : tuple
+        tuple containing the quantized Y, Cr, Cb channels
+    input_details : dict
+        dict with the image dimensions and the compression settings
+        (see fileIO.compress.compress_image)
+    optimize : bool
+        True to estimate a file with optimized Huffman tables
+
+    Returns
+    -------
+    int:
+        The estimated number of bytes of the file
+    """
+    Y, Cr, Cb = image_tuple
+    bits, dc_tables, ac_tables = scan_bits((Y, Cb, Cr),
+                                           frame_layout(input_details),
+                                           optimize)
+    return (file_size(bits, input_details, dc_tables, ac_tables))
+
+
+def estimate_image(filename, quality, table_set='standard', backend=None,
+                   dtype=None, subsampling='4:4:4', optimize=False,
+                   sample=1) -> int:
+    """
+    A function that estimates the size of the baseline JPEG file an
+    image file would be compressed to (see fileIO.compress.picture)
+
+    Parameters
+    ----------
+    filename : str
+        The pathname of the image file
+    quality : int
+        The compression quality (5 to 95)
+    sample : int
+        Only every sample-th MCU row of the image is encoded and
+        counted. 1 encodes the whole image
+
+    Returns
+    -------
+    int:
+        The estimated number of bytes of the file
+    """
+    if not isinstance(sample, int) or sample < 1:
+        raise ValueError('sample must be a positive integer')
+    if quality < 5 or quality > 95:
+        raise ValueError('Quality must be between 5 and 95 for an '
+                         'estimate')
+    image_array = get_image_array(filename)
+    rows = image_array.shape[0]
+    mcu = 8 * get_factors(subsampling)[0]
+    mcu_rows = -(-rows // mcu)
+    kept = np.arange(0, mcu_rows, sample)
+    if sample > 1:
+        strips = [image_array[r * mcu:(r + 1) * mcu] for r in kept]
+        # A short last strip would add padding rows in the middle
+        if strips[-1].shape[0] < mcu and len(strips) > 1:
+            strips.pop()
+            kept = kept[:-1]
+        image_array = np.concatenate(strips)
+
+    (Y, Cr, Cb), details = encode_image(image_array, quality, table_set,
+                                        backend, dtype, subsampling,
+                                        False)
+    bits, dc_tables, ac_tables = scan_bits((Y, Cb, Cr),
+                                           frame_layout(details), optimize,
+                                           mcu_rows / kept.shape[0])
+    details['width'] = rows
+    return (file_size(bits, details, dc_tables, ac_tables))
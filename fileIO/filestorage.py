@@ -33,6 +33,8 @@ class FileStorage:
     delete :
         deletes an object and its corresponding compressed
         files
+    discard :
+        removes an object without saving or printing
     """
 
     # json file name to save image details
@@ -93,6 +95,32 @@ class FileStorage:
             self.__lastObject = obj['compressed_image_name']
             self.__objects[self.__lastObject] = obj
 
+    def discard(self, obj, full_path=None) -> bool:
+        """
+        Removes an object from the objects dictionary without saving
+        the json file or printing (the caller saves)
+
+        Parameters
+        ----------
+        obj : str
+            The dict key to remove
+        full_path : str
+            Only remove the object if its compressed file is full_path
+
+        Returns
+        -------
+        bool
+            True if the object was removed
+        """
+        details = self.__objects.get(obj)
+        if details is None:
+            return (False)
+        if full_path and details.get('out_fullpath') != full_path:
+            return (False)
+        del self.__objects[obj]
+        self.__lastObject = None
+        return (True)
+
     def delete(self, obj, remove=True) -> None:
         """
         Deletes object information from the database with
@@ -13,7 +13,8 @@ class Details:
     def __init__(self, user_id, quality, start_time, end_time, time_taken,
                  in_image_name, compressed_image_name, out_fullpath,
                  in_size, in_resolution, out_resolution,
-                 out_size):
+                 out_size, peak_memory=None,
+                 first_scan_offset=None):
         self.user_id = user_id
         self.quality = quality
         self.start_time = start_time
@@ -26,3 +27,5 @@ class Details:
         self.in_resolution = in_resolution
         self.out_resolution = out_resolution
         self.out_size = out_size
+        self.peak_memory = peak_memory
+        self.first_scan_offset = first_scan_offset
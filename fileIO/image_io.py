@@ -15,8 +15,15 @@ import os
 import json
 import shlex
 
+# Optional key-value pairs of an image detail and the picture
+# parameters they set
+COMPRESS_OPTIONS = ('mode', 'scans', 'target_size', 'target_psnr')
 
-def save_image(array, filename) -> None:
+# The types of the numeric options (the others are strings)
+OPTION_TYPES = {'target_size': int, 'target_psnr': float}
+
+
+def save_image(array, filename, progressive=False) -> None:
     """
     A function that saves a compressed image from array
 
@@ -26,6 +33,8 @@ def save_image(array, filename) -> None:
         3D nd arrray of the pixels
     filename: file
         The filepath and name to save the image
+    progressive: bool
+        True to save JPEG files in progressive mode
     """
     if not np.any(array):
         raise ValueError('Array must be a non empty array')
@@ -35,7 +44,7 @@ def save_image(array, filename) -> None:
         raise TypeError('Array must be a 3D array')
 
     image = Image.fromarray(array.astype(np.uint8))
-    image.save(filename)
+    image.save(filename, progressive=progressive)
 
 
 def get_image_array(filename) -> np.ndarray:
@@ -61,6 +70,54 @@ def get_image_array(filename) -> np.ndarray:
     return (image_array)
 
 
+def get_image_strips(filename, rows=16) -> tuple:
+    """
+    A function that gets the dimensions of an image file and a
+    generator of its rows
+
+    Parameters
+    ----------
+    filename: file
+        The filepath of the image file
+    rows: int
+        The number of image rows in every strip
+
+    Returns
+    -------
+    tuple:
+        width : int
+            the number of image rows
+        height : int
+            the number of image columns
+        strips : generator
+            (rows, height, 3) uint8 RGB arrays of the image rows
+
+    Note
+    ----
+    pillow decodes a JPEG file as a whole, so the source image is in
+    memory (3 bytes per pixel) while the strips are read. The codec
+    planes of every stage are only made for one strip at a time
+    """
+    with Image.open(filename) as img:
+        if img.format != "JPEG":
+            raise TypeError('Image must be JPEG format')
+        if img.mode != "RGB":
+            raise TypeError(f'Image mode must be RGB. {img.mode} not allowed')
+        width, height = img.height, img.width
+    return (width, height, image_strips(filename, rows))
+
+
+def image_strips(filename, rows=16):
+    """
+    A generator that yields the rows of an image file as strips of
+    rows image rows (see get_image_strips)
+    """
+    with Image.open(filename) as img:
+        for top in range(0, img.height, rows):
+            bottom = min(top + rows, img.height)
+            yield (np.asarray(img.crop((0, top, img.width, bottom))))
+
+
 def show_image(name) -> None:
     """
     A function that uses open cv to show_image an image file
@@ -135,6 +192,8 @@ def print_details(image_details) -> None:
     size2 = image_details.get('out_size')
     comp_time = image_details.get('time_taken')
     quality = image_details.get('quality')
+    peak_memory = image_details.get('peak_memory')
+    first_scan_offset = image_details.get('first_scan_offset')
 
     header = f"    {' ': <{4}} | {'ORIGINAL': <{10}} | {'COMPRESSED': <{18}}"
     name = f"    {'Name': <{4}} | {name1: <{10}} | {name2: <{18}}"
@@ -144,6 +203,10 @@ def print_details(image_details) -> None:
     print(f"\t Resolution: {resolution}")
     print(f"\t Time Taken: {comp_time}")
     print(f"\t Quality: {quality}")
+    if peak_memory:
+        print(f"\t Peak Memory: {peak_memory}")
+    if first_scan_offset:
+        print(f"\t First Scan Ends: {first_scan_offset} bytes")
 
     print(header)
     print(f"{'-' * (len(header) + 4)}")
@@ -155,8 +218,8 @@ def print_details(image_details) -> None:
 
 def get_path_array(args, file_type) -> list:
     """
-    Formats input args into lists containing image path and
-    quality
+    Formats input args into lists containing image path,
+    quality and the optional compress options (see COMPRESS_OPTIONS)
 
     Parameters
     ----------
@@ -179,7 +242,7 @@ def get_path_array(args, file_type) -> list:
     Returns
     -------
     list of list :
-        containing image paths and quality
+        containing image paths, quality and a dict of the options
     """
     if file_type == 'file':
         args_list = file_array(args)
@@ -205,11 +268,12 @@ def get_path_array(args, file_type) -> list:
     for arg in args_list:
         # Split into pathname and quality
         arg_list = shlex.split(arg)
-        if len(arg_list) != 2:
+        if len(arg_list) < 2 or len(arg_list) > 2 + len(COMPRESS_OPTIONS):
             print(f"ERROR: Wrong number of input args:\t{arg}")
             return None
-        # Loop through pathname and quality
+        # Loop through pathname, quality and the options
         filename = quality = None
+        options = {}
         for key_value in arg_list:
             # Break into key-value
             kv = key_value.split('=')
@@ -225,13 +289,20 @@ def get_path_array(args, file_type) -> list:
                 except Exception:
                     print(f"ERROR: Conversion to int failed:\t{arg}'")
                     return None
+            elif len(kv) > 1 and kv[0] in COMPRESS_OPTIONS:
+                check = True
+                try:
+                    options[kv[0]] = OPTION_TYPES.get(kv[0], str)(kv[1])
+                except Exception:
+                    print(f"ERROR: Conversion of {kv[0]} failed:\t{arg}'")
+                    return None
             if check is False:
                 print(f"ERROR: Wrong key-value pair:\t{arg}")
                 return None
         if not (filename and quality):
             print(f"ERROR: path and type must be valid inputs:\t{arg}")
             return None
-        image_array.append(list((filename, quality)))
+        image_array.append(list((filename, quality, options)))
     return (image_array)
 
 
@@ -281,6 +352,9 @@ def json_array(args):
         quality = data.get('quality')
         if path and quality:
             ar_string = f'path={path} quality={quality}'
+            for key in COMPRESS_OPTIONS:
+                if data.get(key):
+                    ar_string += f' {key}={data.get(key)}'
             args_list.append(ar_string)
     return (args_list)
 
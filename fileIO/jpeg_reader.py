@@ -0,0 +1,766 @@
+#!/usr/bin/env python3
+
+"""
+A module that reads baseline JPEG files into their quantized DCT
+coefficient planes, so that a JPEG file can be compressed again
+without decoding it to pixels (see fileIO.compress.transcode_image)
+
+Stages in Reading
+-----------------
+    Markers:
+        The DQT, SOF, DHT, DRI and SOS segments are parsed. APPn and
+        COM segments are skipped, except the Adobe APP14 segment
+        whose transform flag tells if the components are YCbCr
+    Entropy Coded Data:
+        The data of a scan is split at the RSTn markers into restart
+        intervals and the 0xFF 0x00 stuffing is removed
+    Huffman Decoding:
+        Codes are decoded with a 16 bit lookup table per Huffman table,
+        so every symbol costs one table lookup. The coefficients are
+        written into int16 zigzag blocks by the decode_interval kernel
+        of C_library/huffman.c (see util_func.native), or by the
+        Python decode_interval without the library, which is about
+        50 times slower. The restart intervals of a scan do not depend
+        on each other and can be decoded by a pool of processes
+
+Note
+----
+Only the Huffman coded sequential processes with 8 bit samples
+(SOF0 and SOF1) are decoded. Progressive files can be read for their
+header but not for their coefficients. The JPEG "lines" are the
+Encoder width (array rows) and the "samples per line" are the Encoder
+height (array columns)
+"""
+
+# Python modules utilized
+import struct
+import numpy as np
+from array import array
+from math import ceil
+from functools import lru_cache
+
+# Modules (functions) from codec package
+from codec.entropy import ZIGZAG
+from codec.entropy import HuffmanTable
+
+# Modules (functions) from util_func package
+from util_func.blocks import block_view
+from util_func.sampling import SUBSAMPLING
+from util_func.workers import WorkerPool
+from util_func.native import LIBRARY
+
+# Frame markers that can be decoded (baseline and extended sequential)
+SEQUENTIAL = (0xC0, 0xC1)
+
+# Every other frame marker (0xC4 DHT, 0xC8 JPG and 0xCC DAC are not)
+FRAMES = (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB,
+          0xCD, 0xCE, 0xCF)
+
+# The zigzag position of every coefficient in natural order
+NATURAL = np.argsort(ZIGZAG)
+
+
+def lookup_table(table, ac=True):
+    """
+    A function that returns the 16 bit decoding table of a Huffman
+    table
+
+    When the code and the extra bits of a symbol fit in 16 bits the
+    entry holds the decoded coefficient, so most symbols are decoded
+    with one lookup
+
+    Parameters
+    ----------
+    table : HuffmanTable
+        the table to decode
+    ac : bool
+        True for AC tables (run/size symbols) and False for DC tables
+        (size symbols)
+
+    Returns
+    -------
+    ndarray:
+        65536 int32 entries indexed by the next 16 bits of the data.
+        0 for
+        bits that do not start with a code, otherwise
+        AC: (value << 16) | (run << 8) | bits of code and value, or
+            (symbol << 8) | code bits for EOB, ZRL and long values
+        DC: (value << 8) | bits of code and value, or
+            (size << 8) | 32 | code bits for long values
+    """
+    lut = np.zeros(1 << 16, dtype=np.int64)
+    index = np.arange(1 << 16, dtype=np.int64)
+    for symbol in table.values:
+        length = int(table.sizes[symbol])
+        start = int(table.codes[symbol]) << (16 - length)
+        stop = start + (1 << (16 - length))
+        size = symbol & 15 if ac else symbol
+        if (ac and size == 0) or length + size > 16:
+            lut[start:stop] = (symbol << 8) | (0 if ac else 32) | length
+            continue
+        bits = (index[start:stop] >> (16 - length - size)) & \
+            ((1 << size) - 1)
+        if size:
+            bits = np.where(bits < (1 << (size - 1)),
+                            bits - (1 << size) + 1, bits)
+        if ac:
+            lut[start:stop] = (bits << 16) | ((symbol >> 4) << 8) | \
+                (length + size)
+        else:
+            lut[start:stop] = (bits << 8) | (length + size)
+    return (lut.astype(np.int32))
+
+
+def unstuff(data):
+    """
+    A function that removes the 0x00 bytes stuffed after the 0xFF
+    bytes of entropy coded data
+
+    Parameters
+    ----------
+    data : ndarray
+        uint8 array of the entropy coded bytes of one restart interval
+
+    Returns
+    -------
+    ndarray:
+        the data without the stuffed bytes
+    """
+    index = np.flatnonzero(data[:-1] == 0xFF)
+    index = index[data[index + 1] == 0x00]
+    if index.size:
+        data = np.delete(data, index + 1)
+    return (data)
+
+
+def bit_windows(data):
+    """
+    A function that returns the 32 bit big endian word at every byte
+    of the data, so that up to 25 bits at any bit position can be
+    read with one shift
+
+    Parameters
+    ----------
+    data : ndarray
+        uint8 array of unstuffed entropy coded data
+
+    Returns
+    -------
+    list:
+        windows[i] is the word of the bytes data[i:i + 4]. Bytes past
+        the end of the data read as 0
+    """
+    padded = np.zeros(data.shape[0] + 8, dtype=np.int64)
+    padded[0:data.shape[0]] = data
+    n = data.shape[0] + 4
+    return (((padded[0:n] << 24) | (padded[1:n + 1] << 16) |
+             (padded[2:n + 2] << 8) | padded[3:n + 3]).tolist())
+
+
+class JpegReader:
+    """
+    A class that reads the headers of a JPEG file and decodes its
+    quantized coefficients
+
+    Parameters
+    ----------
+    filename : str
+        The pathname of the JPEG file
+
+    Methods
+    -------
+    coefficients:
+        Method that decodes the zigzag coefficient blocks
+    planes:
+        Method that returns the 2D coefficient planes in the layout
+        of the Encoder planes
+    """
+
+    bits = 8
+
+    def __init__(self, filename):
+        """
+        Instance attributes
+
+        Attributes
+        ----------
+        lines : int
+            The number of lines (rows) of the image
+        samples : int
+            The number of samples per line (columns) of the image
+        components : tuple
+            (id, H, V, quantization table id) of every component
+        quant_tables : dict
+            8X8 quantization tables in natural order by table id
+        process : int
+            The SOF marker of the frame (0xC0 baseline, 0xC2
+            progressive)
+        restart_interval : int
+            The number of MCUs between restart markers (0 for none)
+        """
+        with open(filename, 'rb') as jpeg:
+            self.__data = np.frombuffer(jpeg.read(), dtype=np.uint8)
+        self.__lines = self.__samples = 0
+        self.__components = ()
+        self.__quant_tables = {}
+        self.__process = None
+        self.__restart_interval = 0
+        self.__transform = None
+        self.__scans = []
+        self.__read_headers()
+
+    @property
+    def lines(self):
+        return self.__lines
+
+    @property
+    def samples(self):
+        return self.__samples
+
+    @property
+    def components(self):
+        return self.__components
+
+    @property
+    def quant_tables(self):
+        return self.__quant_tables
+
+    @property
+    def process(self):
+        return self.__process
+
+    @property
+    def restart_interval(self):
+        return self.__restart_interval
+
+    @property
+    def sequential(self):
+        return (self.__process in SEQUENTIAL)
+
+    @property
+    def subsampling(self):
+        """
+        The subsampling mode (see util_func.sampling.SUBSAMPLING) of
+        a YCbCr image, or None for the layouts the Encoder does not
+        make (grayscale, CMYK, RGB or other sampling factors)
+        """
+        if len(self.__components) != 3 or self.__transform == 0:
+            return (None)
+        (_, h, v, _), cb, cr = self.__components
+        if cb[1:3] != (1, 1) or cr[1:3] != (1, 1):
+            return (None)
+        for name, factors in SUBSAMPLING.items():
+            if factors == (v, h):
+                return (name)
+        return (None)
+
+    def __read_headers(self) -> None:
+        """
+        Parses the marker segments up to the end of the image. The
+        Huffman tables and the position of the data of every scan are
+        kept for coefficients
+        """
+        data = self.__data
+        if data.shape[0] < 4 or data[0] != 0xFF or data[1] != 0xD8:
+            raise ValueError('File is not a JPEG file')
+        dc_tables = {}
+        ac_tables = {}
+        pos = 2
+        while pos + 4 <= data.shape[0]:
+            if data[pos] != 0xFF:
+                raise ValueError('Corrupt JPEG marker')
+            code = int(data[pos + 1])
+            if code == 0xFF:
+                # Fill bytes before a marker
+                pos += 1
+                continue
+            if code == 0xD9:
+                break
+            length = (int(data[pos + 2]) << 8) | int(data[pos + 3])
+            payload = data[pos + 4:pos + 2 + length].tobytes()
+            pos += 2 + length
+            if len(payload) != length - 2:
+                raise ValueError('Corrupt JPEG segment')
+
+            if code == 0xDB:
+                self.__read_dqt(payload)
+            elif code == 0xC4:
+                for table_class, ident, table in self.__read_dht(payload):
+                    tables = dc_tables if table_class == 0 else ac_tables
+                    tables[ident] = table
+            elif code in FRAMES:
+                self.__read_sof(code, payload)
+            elif code == 0xDD:
+                self.__restart_interval = struct.unpack('>H', payload)[0]
+            elif code == 0xEE and payload[0:5] == b'Adobe':
+                self.__transform = payload[11] if len(payload) > 11 else None
+            elif code == 0xDA:
+                end = self.__scan_end(pos)
+                self.__scans.append((payload, pos, end, dict(dc_tables),
+                                     dict(ac_tables),
+                                     self.__restart_interval))
+                pos = end
+        if self.__process is None:
+            raise ValueError('JPEG file has no frame header')
+
+    def __read_dqt(self, payload) -> None:
+        """
+        Reads the 8 or 16 bit quantization tables of a DQT segment
+        """
+        self.__quant_tables.update(dqt_tables(payload))
+
+    def __read_dht(self, payload):
+        """
+        Reads the Huffman tables of a DHT segment
+
+        Returns
+        -------
+        list:
+            (class, id, HuffmanTable) of every table
+        """
+        tables = []
+        pos = 0
+        while pos < len(payload):
+            table_class, ident = payload[pos] >> 4, payload[pos] & 15
+            bits = payload[pos + 1:pos + 17]
+            count = sum(bits)
+            values = payload[pos + 17:pos + 17 + count]
+            tables.append((table_class, ident, HuffmanTable(bits, values)))
+            pos += 17 + count
+        return (tables)
+
+    def __read_sof(self, code, payload) -> None:
+        """
+        Reads the frame header
+        """
+        precision, lines, samples = struct.unpack('>BHH', payload[0:5])
+        if precision != 8 and code in SEQUENTIAL:
+            code = None
+        if lines == 0:
+            raise ValueError('JPEG files without a line count are not '
+                             'supported')
+        self.__process = code
+        self.__lines = lines
+        self.__samples = samples
+        self.__components = frame_components(payload)
+
+    def __scan_end(self, pos):
+        """
+        Returns the position of the first marker after the entropy
+        coded data that starts at pos (RSTn markers are part of the
+        data)
+        """
+        data = self.__data
+        index = np.flatnonzero(data[pos:-1] == 0xFF) + pos
+        following = data[index + 1]
+        marker = (following != 0x00) & ((following < 0xD0) |
+                                         (following > 0xD7))
+        index = index[marker]
+        if not index.size:
+            raise ValueError('JPEG scan has no end')
+        return (int(index[0]))
+
+    def __mcu_grid(self):
+        """
+        Returns the number of MCU rows and MCU columns of the frame
+        """
+        h_max = max(h for _, h, _, _ in self.__components)
+        v_max = max(v for _, _, v, _ in self.__components)
+        return (ceil(self.__lines / (self.bits * v_max)),
+                ceil(self.__samples / (self.bits * h_max)))
+
+    def coefficients(self, workers=1):
+        """
+        Decodes the quantized coefficients of a sequential file
+
+        Parameters
+        ----------
+        workers : int or None
+            The number of processes that decode the restart intervals
+            of a scan at the same time. None uses every CPU
+
+        Returns
+        -------
+        list:
+            (rows, cols, 64) int16 zigzag blocks of every component.
+            The block grid of a component is (mcu_rows * V,
+            mcu_cols * H), the blocks of whole MCUs
+        """
+        if not self.sequential:
+            raise ValueError('Only baseline JPEG files can be decoded')
+        mcu_rows, mcu_cols = self.__mcu_grid()
+        grids = [(mcu_rows * v, mcu_cols * h)
+                 for _, h, v, _ in self.__components]
+        outs = [np.zeros((rows * cols, 64), dtype=np.int16)
+                for rows, cols in grids]
+
+        with WorkerPool(workers, processes=True) as pool:
+            for scan in self.__scans:
+                self.__decode_scan(scan, grids, outs, pool)
+
+        return ([out.reshape(rows, cols, 64)
+                 for out, (rows, cols) in zip(outs, grids)])
+
+    def planes(self, workers=1):
+        """
+        Decodes the quantized coefficients into 2D planes
+
+        Parameters
+        ----------
+        workers : int or None
+            The number of decoding processes (see coefficients)
+
+        Returns
+        -------
+        list:
+            int16 planes of every component with each 8X8 block in
+            natural order, padded to whole MCUs as the Encoder planes
+        """
+        planes = []
+        for zigzag in self.coefficients(workers):
+            rows, cols = zigzag.shape[0:2]
+            plane = np.empty((rows * self.bits, cols * self.bits),
+                             dtype=np.int16)
+            # Gathering the natural order is faster than scattering
+            # the zigzag order
+            natural = np.take(zigzag, NATURAL, axis=2)
+            block_view(plane, self.bits)[...] = natural.reshape(
+                rows, cols, self.bits, self.bits)
+            planes.append(plane)
+        return (planes)
+
+    def __decode_scan(self, scan, grids, outs, pool) -> None:
+        """
+        Decodes one scan into the coefficient arrays of its
+        components. The restart intervals of the scan are decoded on
+        the pool
+        """
+        payload, start, end, dc_tables, ac_tables, interval = scan
+        count = payload[0]
+        idents = [c[0] for c in self.__components]
+        members = []
+        for i in range(count):
+            ident, tables = payload[1 + 2 * i:3 + 2 * i]
+            if ident not in idents:
+                raise ValueError('JPEG scan has an unknown component')
+            members.append((idents.index(ident), tables >> 4, tables & 15))
+        try:
+            tables = [(dc_tables[dc], ac_tables[ac])
+                      for _, dc, ac in members]
+        except KeyError:
+            raise ValueError('JPEG scan uses an undefined Huffman table')
+
+        # The component and the block index of every block in coding
+        # order
+        if count == 1:
+            c = members[0][0]
+            h_max = max(x[1] for x in self.__components)
+            v_max = max(x[2] for x in self.__components)
+            _, h, v, _ = self.__components[c]
+            rows = ceil(ceil(self.__lines * v / v_max) / self.bits)
+            cols = ceil(ceil(self.__samples * h / h_max) / self.bits)
+            offsets = (np.arange(rows)[:, None] * grids[c][1] +
+                       np.arange(cols)).reshape(-1)
+            owners = np.zeros(offsets.shape[0], dtype=np.int64)
+            per_unit = 1
+        else:
+            owners, offsets = [], []
+            for slot, (c, _, _) in enumerate(members):
+                _, h, v, _ = self.__components[c]
+                rows, cols = grids[c]
+                index = np.arange(rows * cols).reshape(
+                    rows // v, v, cols // h, h).transpose(0, 2, 1, 3)
+                offsets.append(index.reshape(-1, v * h))
+                owners.append(np.full(v * h, slot))
+            offsets = np.concatenate(offsets, axis=1).reshape(-1)
+            per_unit = sum(len(owner) for owner in owners)
+            owners = np.tile(np.concatenate(owners),
+                             offsets.shape[0] // per_unit)
+
+        # Restart intervals split the data and the blocks
+        data = self.__data[start:end]
+        index = np.flatnonzero(data[:-1] == 0xFF)
+        index = index[(data[index + 1] >= 0xD0) & (data[index + 1] <= 0xD7)]
+        bounds = [0] + (index + 2).tolist()
+        ends = index.tolist() + [data.shape[0]]
+        step = interval * per_unit if interval else offsets.shape[0]
+        pieces = [slice(k * step, (k + 1) * step)
+                  for k in range(min(len(bounds),
+                                     ceil(offsets.shape[0] / step)))]
+
+        decoded = pool.map(decode_segment,
+                           [data[bounds[k]:ends[k]]
+                            for k in range(len(pieces))],
+                           [owners[piece] for piece in pieces],
+                           [tables] * len(pieces))
+        for piece, blocks in zip(pieces, decoded):
+            for slot, (c, _, _) in enumerate(members):
+                mine = owners[piece] == slot
+                outs[c][offsets[piece][mine]] = blocks[mine]
+
+
+@lru_cache(maxsize=32)
+def dqt_tables(payload) -> dict:
+    """
+    A function that reads the 8 or 16 bit quantization tables of a DQT
+    segment
+
+    Returns
+    -------
+    dict
+        8X8 quantization tables in natural order by table id
+    """
+    tables = {}
+    pos = 0
+    while pos < len(payload):
+        precision, ident = payload[pos] >> 4, payload[pos] & 15
+        size = 128 if precision else 64
+        values = np.frombuffer(payload[pos + 1:pos + 1 + size],
+                               dtype='>u2' if precision else np.uint8)
+        if values.shape[0] != 64:
+            raise ValueError('Corrupt JPEG quantization table')
+        table = np.zeros(64, dtype=int)
+        table[ZIGZAG] = values
+        tables[ident] = table.reshape(8, 8)
+        pos += 1 + size
+    return (tables)
+
+
+def frame_components(payload) -> tuple:
+    """
+    A function that reads the (id, H, V, quantization table id) of
+    every component of a frame header
+    """
+    components = []
+    for i in range(payload[5]):
+        ident, factors, table = payload[6 + 3 * i:9 + 3 * i]
+        components.append((ident, factors >> 4, factors & 15, table))
+    return (tuple(components))
+
+
+def probe_jpeg(filename) -> tuple:
+    """
+    A function that reads the quantization tables and the components
+    of a JPEG file from the segments before its first scan, without
+    reading the scan data
+
+    Parameters
+    ----------
+    filename : str
+        The pathname of the JPEG file
+
+    Returns
+    -------
+    tuple
+        (quant_tables : dict, components : tuple) as the attributes
+        of JpegReader
+    """
+    quant_tables = {}
+    components = None
+    with open(filename, 'rb') as jpeg:
+        if jpeg.read(2) != b'\xff\xd8':
+            raise ValueError('File is not a JPEG file')
+        prefix = False
+        while True:
+            byte = jpeg.read(1)
+            if not byte:
+                break
+            if byte == b'\xff':
+                # The 0xFF of a marker, or fill bytes before a marker
+                prefix = True
+                continue
+            if not prefix:
+                raise ValueError('Corrupt JPEG marker')
+            prefix = False
+            code = byte[0]
+            if code in (0xD9, 0xDA):
+                break
+            head = jpeg.read(2)
+            if len(head) != 2:
+                raise ValueError('Corrupt JPEG segment')
+            length = struct.unpack('>H', head)[0]
+            payload = jpeg.read(length - 2)
+            if len(payload) != length - 2:
+                raise ValueError('Corrupt JPEG segment')
+            if code == 0xDB:
+                quant_tables.update(dqt_tables(payload))
+            elif code in FRAMES:
+                components = frame_components(payload)
+    if components is None:
+        raise ValueError('JPEG file has no frame header')
+    return (quant_tables, components)
+
+
+@lru_cache(maxsize=32)
+def table_array(bits, values, ac=True):
+    """
+    A function that returns the cached decoding table (see
+    lookup_table) of the Huffman table with bits and values
+
+    The key is the (bits, values, ac) tuples of HuffmanTable, so the
+    tables of a scan are built once per process instead of once per
+    restart interval. The arrays are shared and read only
+    """
+    lut = lookup_table(HuffmanTable(bits, values), ac)
+    lut.flags.writeable = False
+    return (lut)
+
+
+@lru_cache(maxsize=32)
+def table_lookup(bits, values, ac=True):
+    """
+    A function that returns the cached decoding table of table_array
+    as a list for the Python decode_interval (a list is indexed much
+    faster than an array). The lists must not be changed
+    """
+    return (table_array(bits, values, ac).tolist())
+
+
+@lru_cache(maxsize=8)
+def scan_lookup(keys):
+    """
+    A function that returns the cached decoding tables of the
+    components of a scan for the decode_interval kernel
+
+    Parameters
+    ----------
+    keys : tuple
+        (dc bits, dc values, ac bits, ac values) of every component
+
+    Returns
+    -------
+    ndarray:
+        (components, 2, 65536) int32 DC and AC tables (see
+        lookup_table)
+    """
+    return (np.stack([(table_array(dc_bits, dc_values, False),
+                       table_array(ac_bits, ac_values))
+                      for dc_bits, dc_values, ac_bits, ac_values in keys]))
+
+
+def decode_segment(data, owners, tables):
+    """
+    A function that decodes the blocks of one restart interval (or
+    of a scan without restart intervals)
+
+    Parameters
+    ----------
+    data : ndarray
+        uint8 array of the entropy coded data of the interval
+    owners : ndarray
+        the scan component of every block of the interval in coding
+        order
+    tables : list
+        (DC HuffmanTable, AC HuffmanTable) of every scan component
+
+    Returns
+    -------
+    ndarray:
+        (blocks, 64) int16 zigzag blocks in coding order
+    """
+    data = unstuff(data)
+    if LIBRARY is not None:
+        out = np.zeros((owners.shape[0], 64), dtype=np.int16)
+        luts = scan_lookup(tuple((dc.bits, dc.values, ac.bits, ac.values)
+                                 for dc, ac in tables))
+        status = LIBRARY.decode_interval(
+            np.ascontiguousarray(data), data.shape[0],
+            np.ascontiguousarray(owners, dtype=np.int64), owners.shape[0],
+            out, luts, len(tables))
+        if status != 0:
+            raise ValueError('Corrupt JPEG data')
+        return (out)
+
+    luts = [(table_lookup(dc.bits, dc.values, False),
+             table_lookup(ac.bits, ac.values))
+            for dc, ac in tables]
+    out = array('h', bytes(owners.shape[0] * 64 * 2))
+    try:
+        decode_interval(bit_windows(data), owners.tolist(), out, luts)
+    except IndexError:
+        # Codes that run past the end of the data
+        raise ValueError('Corrupt JPEG data')
+    return (np.frombuffer(out, dtype=np.int16).reshape(-1, 64))
+
+
+def decode_interval(windows, owners, out, luts):
+    """
+    A function that Huffman decodes the blocks of one restart
+    interval (the DC predictors start at 0)
+
+    Parameters
+    ----------
+    windows : list
+        the 32 bit words of the unstuffed data (see bit_windows)
+    owners : list
+        the scan component of every block in coding order
+    out : array
+        int16 array that receives the 64 zigzag coefficients of
+        every block
+    luts : list
+        (DC lookup table, AC lookup table) lists of every scan
+        component (see table_lookup)
+    """
+    predictors = [0] * len(luts)
+    limit = (len(windows) - 4) * 8
+    p = 0
+    for n, c in enumerate(owners):
+        base = n << 6
+        dc_lut, ac_lut = luts[c]
+
+        # DC difference
+        entry = dc_lut[(windows[p >> 3] >> (16 - (p & 7))) & 0xFFFF]
+        if not entry:
+            raise ValueError('Corrupt JPEG data')
+        bits = entry & 255
+        if bits & 32:
+            p += bits & 31
+            size = entry >> 8
+            if size > 11:
+                raise ValueError('Corrupt JPEG data')
+            value = (windows[p >> 3] >> (32 - size - (p & 7))) & \
+                ((1 << size) - 1)
+            p += size
+            if value < (1 << (size - 1)):
+                value -= (1 << size) - 1
+            predictors[c] += value
+        else:
+            p += bits
+            predictors[c] += entry >> 8
+        out[base] = predictors[c]
+
+        # Run length coded AC coefficients
+        k = 1
+        while k < 64:
+            entry = ac_lut[(windows[p >> 3] >> (16 - (p & 7))) & 0xFFFF]
+            value = entry >> 16
+            if value:
+                p += entry & 255
+                k += (entry >> 8) & 255
+                if k > 63:
+                    raise ValueError('Corrupt JPEG data')
+                out[base + k] = value
+                k += 1
+                continue
+            if not entry:
+                raise ValueError('Corrupt JPEG data')
+            p += entry & 255
+            symbol = entry >> 8
+            size = symbol & 15
+            if size:
+                k += symbol >> 4
+                if k > 63:
+                    raise ValueError('Corrupt JPEG data')
+                value = (windows[p >> 3] >> (32 - size - (p & 7))) & \
+                    ((1 << size) - 1)
+                p += size
+                if value < (1 << (size - 1)):
+                    value -= (1 << size) - 1
+                out[base + k] = value
+                k += 1
+            elif symbol == 0xF0:
+                k += 16
+            else:
+                break
+        if p > limit:
+            raise ValueError('Corrupt JPEG data')
@@ -0,0 +1,732 @@
+#!/usr/bin/env python3
+
+"""
+A module that writes the quantized Y, Cr, Cb planes of the Encoder
+directly to a baseline JFIF (JPEG) file, so the image does not have
+to be decompressed and encoded again by pillow
+
+File Layout
+-----------
+    SOI:
+        Start of image marker
+    APP0:
+        JFIF header (version 1.01, no density units)
+    DQT:
+        The quantization table(s) in zigzag order
+    SOF0 / SOF2:
+        Baseline or progressive frame header with the image
+        dimensions and the sampling factors of the Y, Cb and Cr
+        components
+    DHT:
+        The DC and AC Huffman tables for luma and chroma. These are
+        the typical tables of the standard, or with optimize the
+        tables built from the symbol counts of the image (two passes
+        over the quantized blocks)
+    DRI:
+        The restart interval in MCUs (only with restart_rows). The
+        scan is then split into segments of restart_rows MCU rows
+        that end with RSTn markers and are coded independently
+    SOS:
+        One interleaved scan of all the components followed by the
+        entropy coded data (see codec.entropy). Progressive files
+        have one DHT and SOS per scan of the scan script, each with
+        Huffman tables built for the scan (see codec.progressive)
+    EOI:
+        End of image marker
+
+Note
+----
+The Encoder quantizes the Cr and Cb channels with the luma table, so
+all the components use quantization table 0. The JPEG "lines" are
+the Encoder width (array rows) and the "samples per line" are the
+Encoder height (array columns)
+"""
+
+# Python modules utilized
+import struct
+from contextlib import nullcontext
+import numpy as np
+from math import ceil
+
+# Modules (functions) from codec package
+from codec.entropy import ZIGZAG
+from codec.entropy import EntropyEncoder
+from codec.entropy import mcu_blocks
+from codec.entropy import standard_tables
+from codec.entropy import count_symbols
+from codec.entropy import add_counts
+from codec.entropy import optimal_table
+from codec.entropy import zigzag_blocks
+from codec.entropy import interleave
+from codec.progressive import ProgressiveScan
+from codec.progressive import get_scan_script
+
+# Modules (functions) from util_func package
+from util_func.sampling import get_factors
+from util_func.quantization import get_quant_table
+from util_func.workers import WorkerPool
+
+JPEG_EXTENSIONS = ('jpg', 'jpeg', 'jpe', 'jfif')
+
+MODES = ('baseline', 'progressive')
+
+# The maximum number of blocks coded at once. The symbol arrays of a
+# band take about 1.3 KB per block
+MAX_BLOCKS = 4096
+
+
+def marker(code, payload=b'') -> bytes:
+    """
+    A function that returns a marker segment
+
+    Parameters
+    ----------
+    code : int
+        the second byte of the marker (0xFF code)
+    payload : bytes
+        the segment data. Markers without data (SOI, EOI and the
+        RSTn markers) have none
+
+    Returns
+    -------
+    bytes:
+        the marker followed by the segment length and the payload
+    """
+    if 0xD0 <= code <= 0xD9:
+        return (bytes((0xFF, code)))
+    return (bytes((0xFF, code)) + struct.pack('>H', len(payload) + 2) +
+            payload)
+
+
+def app0_segment() -> bytes:
+    """
+    Returns the JFIF APP0 segment
+    """
+    return (marker(0xE0, b'JFIF\x00' + bytes((1, 1, 0)) +
+                   struct.pack('>HH', 1, 1) + bytes((0, 0))))
+
+
+def dqt_segment(tables) -> bytes:
+    """
+    Returns the DQT segment of 8 bit quantization tables
+
+    Parameters
+    ----------
+    tables : sequence
+        8X8 quantization tables. tables[i] gets the table id i
+    """
+    payload = b''
+    for index, table in enumerate(tables):
+        values = table.reshape(64)[ZIGZAG]
+        payload += bytes((index,)) + bytes(int(v) for v in values)
+    return (marker(0xDB, payload))
+
+
+def sof_segment(lines, samples, components, code=0xC0) -> bytes:
+    """
+    Returns the frame header segment
+
+    Parameters
+    ----------
+    lines : int
+        the number of lines (rows) of the image
+    samples : int
+        the number of samples per line (columns) of the image
+    components : sequence
+        (id, H, V, quantization table id) of every component
+    code : int
+        the SOF marker (0xC0 baseline, 0xC2 progressive)
+    """
+    payload = struct.pack('>BHHB', 8, lines, samples, len(components))
+    for ident, h, v, table in components:
+        payload += bytes((ident, (h << 4) | v, table))
+    return (marker(code, payload))
+
+
+def dht_segment(tables) -> bytes:
+    """
+    Returns the DHT segment of Huffman tables
+
+    Parameters
+    ----------
+    tables : sequence
+        (class, id, HuffmanTable) of every table. class is 0 for DC
+        and 1 for AC tables
+    """
+    payload = b''
+    for table_class, ident, table in tables:
+        payload += bytes(((table_class << 4) | ident,))
+        payload += bytes(table.bits) + bytes(table.values)
+    return (marker(0xC4, payload))
+
+
+def sos_segment(components, start=0, end=63, high=0, low=0) -> bytes:
+    """
+    Returns the scan header segment
+
+    Parameters
+    ----------
+    components : sequence
+        (id, DC table id, AC table id) of every component of the scan
+    start : int
+        the first zigzag coefficient of the scan
+    end : int
+        the last zigzag coefficient of the scan
+    high : int
+        the previous successive approximation bit (progressive only)
+    low : int
+        the successive approximation bit (progressive only)
+    """
+    payload = bytes((len(components),))
+    for ident, dc, ac in components:
+        payload += bytes((ident, (dc << 4) | ac))
+    payload += bytes((start, end, (high << 4) | low))
+    return (marker(0xDA, payload))
+
+
+def frame_layout(input_details):
+    """
+    A function that returns the sampling factors of the Y, Cb, Cr
+    components of compressed planes
+
+    Parameters
+    ----------
+    input_details : dict
+        the details returned by fileIO.compress.compress_image
+
+    Returns
+    -------
+    tuple:
+        ((H, V) of Y, (H, V) of Cb, (H, V) of Cr)
+    """
+    rows, cols = get_factors(input_details.get('subsampling', '4:4:4'))
+    return ((cols, rows), (1, 1), (1, 1))
+
+
+def dri_segment(interval) -> bytes:
+    """
+    Returns the DRI segment of a restart interval of interval MCUs
+    """
+    return (marker(0xDD, struct.pack('>H', interval)))
+
+
+def open_output(filename):
+    """
+    Returns a context manager of the binary output of a JPEG file: the
+    opened file of a pathname, or a file object (such as io.BytesIO)
+    as it is, which is not closed
+    """
+    if hasattr(filename, 'write'):
+        return (nullcontext(filename))
+    return (open(filename, 'wb'))
+
+
+def write_jpeg(filename, image_tuple, input_details, optimize=False,
+               mode='baseline', scans='default', restart_rows=0,
+               workers=1) -> int:
+    """
+    A function that writes quantized planes to a JPEG file
+
+    Parameters
+    ----------
+    filename : str or file object
+        The pathname of the JPEG file to write, or a binary file
+        object that receives the bytes of the file
+    image_tuple : tuple
+        tuple containing the quantized Y, Cr, Cb channels
+    input_details : dict
+        dict with the image dimensions and the compression settings
+        (see fileIO.compress.compress_image)
+    optimize : bool
+        True to code a baseline image with Huffman tables built from
+        its own symbol counts instead of the typical tables.
+        Progressive scans always use their own tables
+    mode : str ['baseline' or 'progressive']
+        The JPEG process of the file
+    scans : str or sequence
+        The scan script of a progressive file. The name of a preset
+        (see codec.progressive.SCAN_PRESETS) or a sequence of
+        (components, Ss, Se, Ah, Al) scans
+    restart_rows : int
+        The number of MCU rows between restart markers of a baseline
+        file. 0 writes no restart markers
+    workers : int or None
+        The number of threads that code the restart segments (and
+        count their symbols for optimize) at the same time. None
+        uses every CPU
+
+    Returns
+    -------
+    int:
+        The byte offset at which the first scan that completes a
+        preview of the whole image (every component coded at least
+        once) ends
+    """
+    if mode not in MODES:
+        raise ValueError('mode must be either "baseline" or "progressive"')
+    if not isinstance(restart_rows, int) or restart_rows < 0:
+        raise ValueError('restart_rows must be a non negative integer')
+    if restart_rows and mode != 'baseline':
+        raise ValueError('Restart intervals are only written in baseline '
+                         'mode')
+    quality = input_details['quality']
+    table = get_quant_table(quality, 'luma',
+                            input_details.get('table_set', 'standard'),
+                            input_details.get('backend'))
+    Y, Cr, Cb = image_tuple
+    planes = (Y, Cb, Cr)
+    layout = frame_layout(input_details)
+    if mode == 'progressive':
+        script = get_scan_script(scans, len(planes))
+
+    with open_output(filename) as jpeg:
+        jpeg.write(marker(0xD8))
+        jpeg.write(app0_segment())
+        jpeg.write(dqt_segment((table.table,)))
+        jpeg.write(sof_segment(input_details['width'],
+                               input_details['height'],
+                               [(i + 1, h, v, 0)
+                                for i, (h, v) in enumerate(layout)],
+                               0xC0 if mode == 'baseline' else 0xC2))
+        if mode == 'baseline':
+            write_baseline(jpeg, planes, layout, optimize, restart_rows,
+                           workers)
+            first_scan_offset = jpeg.tell()
+        else:
+            first_scan_offset = write_progressive(
+                jpeg, planes, layout, script, input_details['width'],
+                input_details['height'])
+        jpeg.write(marker(0xD9))
+    return (first_scan_offset)
+
+
+def write_jpeg_stream(filename, strips, input_details,
+                      restart_rows=0) -> int:
+    """
+    A function that writes a baseline JPEG file from the quantized
+    planes of one MCU row at a time (see codec.stream.StreamEncoder),
+    so the whole image is never held in memory. The standard Huffman
+    tables are used because optimized tables need the symbols of the
+    whole image
+
+    Parameters
+    ----------
+    filename : str
+        The pathname of the JPEG file to write
+    strips : iterable
+        (Y, Cr, Cb) quantized planes of every MCU row in order
+    input_details : dict
+        dict with the image dimensions and the compression settings
+        (see write_jpeg)
+    restart_rows : int
+        The number of MCU rows between restart markers. 0 writes no
+        restart markers
+
+    Returns
+    -------
+    int:
+        The byte offset at which the scan ends
+    """
+    if not isinstance(restart_rows, int) or restart_rows < 0:
+        raise ValueError('restart_rows must be a non negative integer')
+    quality = input_details['quality']
+    table = get_quant_table(quality, 'luma',
+                            input_details.get('table_set', 'standard'),
+                            input_details.get('backend'))
+    layout = frame_layout(input_details)
+    dc_tables, ac_tables = standard_tables()
+    tables = ((dc_tables[0], dc_tables[1], dc_tables[1]),
+              (ac_tables[0], ac_tables[1], ac_tables[1]))
+    mcu_cols = input_details['paddedHeight'] // (8 * layout[0][0])
+    if restart_rows * mcu_cols > 0xFFFF:
+        raise ValueError('Restart interval is more than 65535 MCUs')
+
+    with open(filename, 'wb') as jpeg:
+        jpeg.write(marker(0xD8))
+        jpeg.write(app0_segment())
+        jpeg.write(dqt_segment((table.table,)))
+        jpeg.write(sof_segment(input_details['width'],
+                               input_details['height'],
+                               [(i + 1, h, v, 0)
+                                for i, (h, v) in enumerate(layout)]))
+        write_tables(jpeg, dc_tables, ac_tables)
+        if restart_rows:
+            jpeg.write(dri_segment(restart_rows * mcu_cols))
+        jpeg.write(sos_segment(((1, 0, 0), (2, 1, 1), (3, 1, 1))))
+        encoder = EntropyEncoder(*tables)
+        for row, (Y, Cr, Cb) in enumerate(strips):
+            if restart_rows and row and row % restart_rows == 0:
+                jpeg.write(encoder.flush())
+                jpeg.write(marker(0xD0 + (row // restart_rows - 1) % 8))
+                encoder = EntropyEncoder(*tables)
+            for blocks, components in scan_bands((Y, Cb, Cr), layout):
+                jpeg.write(encoder.encode(blocks, components))
+        jpeg.write(encoder.flush())
+        first_scan_offset = jpeg.tell()
+        jpeg.write(marker(0xD9))
+    return (first_scan_offset)
+
+
+def write_baseline(jpeg, planes, layout, optimize=False, restart_rows=0,
+                   workers=1) -> None:
+    """
+    A function that writes the Huffman tables and the single
+    interleaved scan of a baseline file
+
+    Parameters
+    ----------
+    jpeg : file
+        the binary file object to write
+    planes : sequence
+        the quantized Y, Cb, Cr planes
+    layout : sequence
+        (H, V) sampling factors of the components
+    optimize : bool
+        True to build the Huffman tables from the symbol counts
+    restart_rows : int
+        the number of MCU rows of a restart interval (0 for none)
+    workers : int or None
+        the number of threads that code the restart segments
+    """
+    if restart_rows:
+        write_segments(jpeg, planes, layout, optimize, restart_rows,
+                       workers)
+        return
+    if optimize:
+        # The int16 zigzag blocks of the statistics pass are kept for
+        # the coding pass (2 bytes per coefficient)
+        bands = list(scan_bands(planes, layout))
+        dc_tables, ac_tables = image_tables(bands, len(planes))
+    else:
+        bands = scan_bands(planes, layout)
+        dc_tables, ac_tables = standard_tables()
+
+    write_tables(jpeg, dc_tables, ac_tables)
+    jpeg.write(sos_segment(((1, 0, 0), (2, 1, 1), (3, 1, 1))))
+    encoder = EntropyEncoder((dc_tables[0], dc_tables[1], dc_tables[1]),
+                             (ac_tables[0], ac_tables[1], ac_tables[1]))
+    for blocks, components in bands:
+        jpeg.write(encoder.encode(blocks, components))
+    jpeg.write(encoder.flush())
+
+
+def write_tables(jpeg, dc_tables, ac_tables) -> None:
+    """
+    Writes the DHT segment of the luma (id 0) and chroma (id 1) tables
+    """
+    jpeg.write(dht_segment(((0, 0, dc_tables[0]), (1, 0, ac_tables[0]),
+                            (0, 1, dc_tables[1]), (1, 1, ac_tables[1]))))
+
+
+def write_segments(jpeg, planes, layout, optimize, restart_rows,
+                   workers=1) -> None:
+    """
+    A function that writes a baseline scan as restart segments of
+    restart_rows MCU rows
+
+    The DC predictors start again at every restart marker, so every
+    segment is coded (and counted) on its own by a pool of threads
+    and the coded segments are joined with RSTn markers
+
+    Parameters
+    ----------
+    jpeg : file
+        the binary file object to write
+    planes : sequence
+        the quantized Y, Cb, Cr planes
+    layout : sequence
+        (H, V) sampling factors of the components
+    optimize : bool
+        True to build the Huffman tables from the symbol counts
+    restart_rows : int
+        the number of MCU rows of a restart interval
+    workers : int or None
+        the number of threads
+    """
+    segments = restart_segments(planes, layout, restart_rows)
+    mcu_cols = planes[0].shape[1] // (8 * layout[0][0])
+    interval = restart_rows * mcu_cols
+    if interval > 0xFFFF:
+        raise ValueError('Restart interval is more than 65535 MCUs')
+
+    with WorkerPool(workers) as pool:
+        if optimize:
+            counts = sum(pool.map(segment_counts, segments,
+                                  [layout] * len(segments)))
+            luma = counts[0]
+            chroma = counts[1:].sum(axis=0)
+            dc_tables = (optimal_table(luma[0]), optimal_table(chroma[0]))
+            ac_tables = (optimal_table(luma[1]), optimal_table(chroma[1]))
+        else:
+            dc_tables, ac_tables = standard_tables()
+
+        write_tables(jpeg, dc_tables, ac_tables)
+        jpeg.write(dri_segment(interval))
+        jpeg.write(sos_segment(((1, 0, 0), (2, 1, 1), (3, 1, 1))))
+        tables = [(dc_tables, ac_tables)] * len(segments)
+        coded = pool.map(encode_segment, segments,
+                         [layout] * len(segments), tables)
+        for index, data in enumerate(coded):
+            if index:
+                jpeg.write(marker(0xD0 + (index - 1) % 8))
+            jpeg.write(data)
+
+
+def restart_segments(planes, layout, restart_rows, bits=8):
+    """
+    A function that splits the planes into restart segments
+
+    Returns
+    -------
+    list:
+        the planes (views) of every segment of restart_rows MCU rows
+    """
+    mcu_rows = planes[0].shape[0] // (bits * layout[0][1])
+    return ([[plane[start * bits * v:(start + restart_rows) * bits * v]
+              for plane, (_, v) in zip(planes, layout)]
+             for start in range(0, mcu_rows, restart_rows)])
+
+
+def segment_counts(planes, layout):
+    """
+    A function that counts the symbols of a restart segment
+
+    Returns
+    -------
+    ndarray:
+        (components, 2, 256) DC and AC symbol counts
+    """
+    counts = np.zeros((len(planes), 2, 256), dtype=np.int64)
+    last_dc = np.zeros(len(planes), dtype=np.int64)
+    for blocks, components in scan_bands(planes, layout):
+        count_symbols(blocks, components, last_dc, counts)
+    return (counts)
+
+
+def encode_segment(planes, layout, tables) -> bytes:
+    """
+    A function that entropy codes a restart segment
+
+    Parameters
+    ----------
+    planes : sequence
+        the quantized planes of the segment
+    layout : sequence
+        (H, V) sampling factors of the components
+    tables : tuple
+        (dc_tables, ac_tables) with the luma tables at index 0 and
+        the chroma tables at index 1
+
+    Returns
+    -------
+    bytes:
+        the coded segment padded to a whole byte
+    """
+    dc_tables, ac_tables = tables
+    encoder = EntropyEncoder((dc_tables[0], dc_tables[1], dc_tables[1]),
+                             (ac_tables[0], ac_tables[1], ac_tables[1]))
+    data = [encoder.encode(blocks, components)
+            for blocks, components in scan_bands(planes, layout)]
+    data.append(encoder.flush())
+    return (b''.join(data))
+
+
+def write_progressive(jpeg, planes, layout, script, lines,
+                      samples) -> int:
+    """
+    A function that writes the scans of a progressive file
+
+    Every scan is coded twice: once to count its symbols for its
+    Huffman tables and once to write it. The zigzag blocks of the
+    planes are made once and shared by all the scans
+
+    Parameters
+    ----------
+    jpeg : file
+        the binary file object to write
+    planes : sequence
+        the quantized Y, Cb, Cr planes
+    layout : sequence
+        (H, V) sampling factors of the components
+    script : tuple
+        the checked scan script (see codec.progressive)
+    lines : int
+        the number of lines (rows) of the image
+    samples : int
+        the number of samples per line (columns) of the image
+
+    Returns
+    -------
+    int:
+        the offset at the end of the first scan after which every
+        component has been coded
+    """
+    zigzags = [zigzag_blocks(plane) for plane in planes]
+    grids = component_grids(lines, samples, layout)
+    first_scan_offset = None
+    coded = set()
+
+    for components, start, end, high, low in script:
+        scan = ProgressiveScan(components, start, end, high, low)
+        bands = ScanBands(zigzags, layout, grids, components)
+
+        # Statistics pass
+        counts = np.zeros((len(components), 2, 256), dtype=np.int64)
+        for blocks, index in bands:
+            add_counts(counts, *scan.symbols(blocks, index))
+        add_counts(counts, *scan.finish())
+
+        # Luma uses table 0 and the chroma components table 1
+        ids = [0 if c == 0 else 1 for c in components]
+        kind = 0 if start == 0 else 1
+        tables = {}
+        for ident in set(ids):
+            total = counts[[i == ident for i in ids], kind].sum(axis=0)
+            tables[ident] = optimal_table(total)
+        dc_tables = [None] * len(ids)
+        ac_tables = [None] * len(ids)
+        if not (start == 0 and high):
+            jpeg.write(dht_segment([(kind, ident, tables[ident])
+                                    for ident in sorted(tables)]))
+            for i, ident in enumerate(ids):
+                if kind == 0:
+                    dc_tables[i] = tables[ident]
+                else:
+                    ac_tables[i] = tables[ident]
+        jpeg.write(sos_segment([(c + 1, ident if kind == 0 else 0,
+                                 ident if kind == 1 else 0)
+                                for c, ident in zip(components, ids)],
+                               start, end, high, low))
+
+        # Coding pass
+        scan.reset()
+        encoder = EntropyEncoder(dc_tables, ac_tables)
+        for blocks, index in bands:
+            jpeg.write(encoder.encode_symbols(*scan.symbols(blocks, index)))
+        jpeg.write(encoder.encode_symbols(*scan.finish()))
+        jpeg.write(encoder.flush())
+
+        coded.update(components)
+        if first_scan_offset is None and len(coded) == len(planes):
+            first_scan_offset = jpeg.tell()
+    return (first_scan_offset)
+
+
+def component_grids(lines, samples, layout, bits=8):
+    """
+    A function that returns the number of blocks of every component
+    in a non interleaved scan. These are the blocks that hold image
+    samples, which can be fewer than the blocks of the MCU padded
+    planes
+
+    Returns
+    -------
+    list:
+        (rows, cols) of the block grid of every component
+    """
+    h_max = max(h for h, _ in layout)
+    v_max = max(v for _, v in layout)
+    return ([(ceil(ceil(lines * v / v_max) / bits),
+              ceil(ceil(samples * h / h_max) / bits)) for h, v in layout])
+
+
+class ScanBands:
+    """
+    The bands of blocks of one progressive scan. It can be iterated
+    once for every pass over the scan
+
+    Parameters
+    ----------
+    zigzags : sequence
+        (rows, cols, 64) zigzag blocks of every component
+    layout : sequence
+        (H, V) sampling factors of the components
+    grids : sequence
+        the block grids of the non interleaved scans
+    components : tuple
+        the components of the scan
+    """
+
+    def __init__(self, zigzags, layout, grids, components):
+        self.__zigzags = [zigzags[c] for c in components]
+        self.__factors = [(layout[c][1], layout[c][0]) for c in components]
+        self.__grid = grids[components[0]]
+        self.__interleaved = len(components) > 1
+
+    def __iter__(self):
+        if self.__interleaved:
+            v = self.__factors[0][0]
+            mcu_rows = self.__zigzags[0].shape[0] // v
+            blocks_per_row = sum(zigzag.shape[1] * f[0] for zigzag, f
+                                 in zip(self.__zigzags, self.__factors))
+            step = max(MAX_BLOCKS // blocks_per_row, 1)
+            for start in range(0, mcu_rows, step):
+                yield (interleave([zigzag[start * f[0]:(start + step) * f[0]]
+                                   for zigzag, f in zip(self.__zigzags,
+                                                        self.__factors)],
+                                  self.__factors))
+        else:
+            rows, cols = self.__grid
+            step = max(MAX_BLOCKS // cols, 1)
+            for start in range(0, rows, step):
+                blocks = self.__zigzags[0][start:min(start + step, rows),
+                                           0:cols].reshape(-1, 64)
+                yield (blocks, np.zeros(blocks.shape[0], dtype=np.int64))
+
+
+def image_tables(bands, count):
+    """
+    A function that builds the optimized luma and chroma Huffman
+    tables of an interleaved scan
+
+    Parameters
+    ----------
+    bands : iterable
+        (blocks, components) of the scan (see scan_bands)
+    count : int
+        the number of components. Component 0 is luma and the rest
+        share the chroma tables
+
+    Returns
+    -------
+    tuple:
+        (dc_tables : tuple, ac_tables : tuple) with the luma table at
+        index 0 and the chroma table at index 1
+    """
+    counts = np.zeros((count, 2, 256), dtype=np.int64)
+    last_dc = np.zeros(count, dtype=np.int64)
+    for blocks, components in bands:
+        count_symbols(blocks, components, last_dc, counts)
+    luma = counts[0]
+    chroma = counts[1:].sum(axis=0)
+    return ((optimal_table(luma[0]), optimal_table(chroma[0])),
+            (optimal_table(luma[1]), optimal_table(chroma[1])))
+
+
+def scan_bands(planes, layout, bits=8):
+    """
+    A generator that splits an interleaved scan into bands of whole
+    MCU rows so that the temporary symbol arrays stay small
+
+    Parameters
+    ----------
+    planes : sequence
+        the quantized planes of the components in scan order
+    layout : sequence
+        (H, V) sampling factors of the components
+
+    Yields
+    ------
+    tuple:
+        (blocks, components) of the band in coding order (see
+        codec.entropy.mcu_blocks)
+    """
+    mcu_rows = planes[0].shape[0] // (bits * layout[0][1])
+    mcu_cols = planes[0].shape[1] // (bits * layout[0][0])
+    blocks_per_row = mcu_cols * sum(h * v for h, v in layout)
+    step = max(MAX_BLOCKS // blocks_per_row, 1)
+    for start in range(0, mcu_rows, step):
+        end = min(start + step, mcu_rows)
+        band = [plane[start * bits * v:end * bits * v]
+                for plane, (_, v) in zip(planes, layout)]
+        yield (mcu_blocks(band, [(v, h) for h, v in layout], bits))
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+"""
+A module that compresses a batch of image files in an asyncio
+pipeline of three stages, so that the disk work of some images
+overlaps the codec work of others
+
+Stages
+------
+    Reader:
+        Makes the output names, then reads and decodes the image file
+        on a thread (see get_image_array)
+    Compute:
+        Passes the RGB array through the Encoder on a worker process
+        (see encode_image)
+    Writer:
+        Writes the output file and makes the details of the image on
+        a thread (see write_image and image_details). The resolution
+        is known from the RGB array, so the output is not read again
+
+The stages are joined by queues of queue_size images. A slow stage
+holds back the stages before it, so at most about
+2 * queue_size + 2 * workers images are in memory at a time
+
+Note
+----
+The pipeline is an API only entry point. The CLI compresses its
+batches with fileIO.batch.compress_batch, which runs picture with
+all of its options. The stages here split picture into its pixel
+path, so a job accepts only the subset of the options of picture in
+COMPUTE_OPTIONS, WRITE_OPTIONS, output_image_name and track_memory
+(the peak memory is that of the compute stage). A job with any
+other option (transcode, stream, passthrough, target_size,
+target_psnr, cache, ...) fails with a TypeError
+
+Example
+-------
+    $ jobs = get_path_array(args, file_type='directory')
+    $ results = run_pipeline(jobs)
+"""
+
+# Python modules
+import asyncio
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
+
+# Modules (functions) from fileIO package
+from fileIO.compress import output_names
+from fileIO.compress import encode_image
+from fileIO.compress import write_image
+from fileIO.compress import image_details
+from fileIO.image_io import get_image_array
+from fileIO.batch import error_message
+from fileIO.batch import commit_results
+
+# Modules (functions) from util_func package
+from util_func.memory import MemoryTracker
+from util_func.workers import get_workers
+
+# The job options of the compute and the writer stages
+COMPUTE_OPTIONS = ('table_set', 'backend', 'dtype', 'subsampling', 'memmap')
+WRITE_OPTIONS = ('optimize', 'mode', 'scans', 'restart_rows')
+
+
+def read_job(job) -> tuple:
+    """
+    A function that reads the image of a job (reader stage)
+
+    Parameters
+    ----------
+    job : list
+        (pathname, quality, options) as made by get_path_array.
+        The options are keys of COMPUTE_OPTIONS, WRITE_OPTIONS,
+        output_image_name or track_memory (see the Note of the module)
+
+    Returns
+    -------
+    tuple:
+        (names : tuple, start_time : datetime, resolution : str,
+         image_array : ndarray)
+    """
+    pathname, _, options = job
+    for key in options:
+        if key not in (COMPUTE_OPTIONS + WRITE_OPTIONS +
+                       ('output_image_name', 'track_memory')):
+            raise TypeError(f'Unknown option {key}')
+    names = output_names(pathname, options.get('output_image_name'))
+    start_time = datetime.now()
+    image_array = get_image_array(pathname)
+    resolution = f'{image_array.shape[1]} X {image_array.shape[0]}'
+    return (names, start_time, resolution, image_array)
+
+
+def compute_job(image_array, quality, options) -> tuple:
+    """
+    A function that compresses the RGB array of a job (compute stage,
+    in a worker process)
+
+    Returns
+    -------
+    tuple:
+        (image_tuple : tuple, input_details : dict, peak : int or
+         None)
+    """
+    settings = {key: options[key] for key in COMPUTE_OPTIONS
+                if key in options}
+    with MemoryTracker(options.get('track_memory', False)) as tracker:
+        image_tuple, input_details = encode_image(image_array, quality,
+                                                  **settings)
+    return (image_tuple, input_details, tracker.peak)
+
+
+def write_job(job, names, start_time, resolution, coded) -> dict:
+    """
+    A function that writes the output file of a job and returns its
+    details (writer stage)
+    """
+    pathname, quality, options = job
+    image_tuple, input_details, peak = coded
+    settings = {key: options[key] for key in WRITE_OPTIONS
+                if key in options}
+    first_scan_offset = write_image(names[2], image_tuple, input_details,
+                                    **settings)
+    return (image_details(names, quality, pathname, start_time,
+                          datetime.now(), peak, first_scan_offset,
+                          resolution))
+
+
+async def compress_pipeline(jobs, workers=None, queue_size=2,
+                            commit=True) -> list:
+    """
+    A coroutine that compresses the images of a batch in the reader,
+    compute and writer stages
+
+    Parameters
+    ----------
+    jobs : list
+        (pathname, quality, options) lists as made by get_path_array
+    workers : int or None
+        The number of worker processes of the compute stage. None
+        uses every CPU
+    queue_size : int
+        The number of images that can wait between two stages
+    commit : bool
+        True to add the details to storage and save the json file
+        once for the batch
+
+    Returns
+    -------
+    list:
+        (details : dict or None, error : str or None) of every job in
+        the order of the jobs (as compress_batch)
+    """
+    loop = asyncio.get_running_loop()
+    workers = get_workers(workers)
+    results = [None] * len(jobs)
+    decoded = asyncio.Queue(queue_size)
+    encoded = asyncio.Queue(queue_size)
+
+    async def reader(threads):
+        for index, job in enumerate(jobs):
+            try:
+                data = await loop.run_in_executor(threads, read_job, job)
+            except Exception as er:
+                results[index] = (None, error_message(er))
+                continue
+            await decoded.put((index, job, data))
+        for _ in range(workers):
+            await decoded.put(None)
+
+    async def compute(processes):
+        while True:
+            item = await decoded.get()
+            if item is None:
+                return
+            index, job, (names, start_time, resolution, image_array) = item
+            try:
+                coded = await loop.run_in_executor(
+                    processes, compute_job, image_array, job[1], job[2])
+            except Exception as er:
+                results[index] = (None, error_message(er))
+                continue
+            await encoded.put((index, job, names, start_time, resolution,
+                               coded))
+
+    async def writer(threads):
+        while True:
+            item = await encoded.get()
+            if item is None:
+                return
+            index, job = item[0:2]
+            try:
+                details = await loop.run_in_executor(threads, write_job,
+                                                     job, *item[2:])
+            except Exception as er:
+                results[index] = (None, error_message(er))
+                continue
+            results[index] = (details, None)
+
+    with ThreadPoolExecutor(2) as threads, \
+            ProcessPoolExecutor(workers) as processes:
+        writing = asyncio.create_task(writer(threads))
+        await asyncio.gather(reader(threads),
+                             *(compute(processes) for _ in range(workers)))
+        await encoded.put(None)
+        await writing
+
+    if commit:
+        commit_results(results)
+    return (results)
+
+
+def run_pipeline(jobs, workers=None, queue_size=2, commit=True) -> list:
+    """
+    A function that runs compress_pipeline in a new event loop
+
+    Returns
+    -------
+    list:
+        (details : dict or None, error : str or None) of every job
+    """
+    return (asyncio.run(compress_pipeline(jobs, workers, queue_size,
+                                          commit)))
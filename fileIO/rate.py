@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+"""
+A module that compresses an image to a target file size or PSNR
+(rate control)
+
+The color conversion, the padding and the FDCT of the image are done
+once (see RateControl). Every trial quality only requantizes the
+cached DCT coefficients, and a binary search over the qualities finds
+    target_size:
+        the highest quality whose file is at most target_size bytes.
+        Each trial is entropy coded into memory, so the size is the
+        exact size of the file
+    target_psnr:
+        the lowest quality whose decoded image has a PSNR (in dB,
+        over the R, G, B samples) of at least target_psnr
+
+Example
+-------
+    $ rate = RateControl(get_image_array('image.png'))
+    $ quality, report = rate.search(target_size=200000)
+"""
+
+# Python modules utilized
+import io
+import numpy as np
+from math import log10
+
+# Modules (functions) from codec package
+from codec import Encoder
+from codec import Decoder
+
+# Modules (functions) from util_func package
+from util_func.blocks import get_blocks
+from util_func.blocks import put_blocks
+from util_func.memory import get_dtype_policy
+from util_func.transform import get_backend
+from util_func.quantization import get_quant_table
+
+# Modules (functions) from fileIO package
+from fileIO.image_io import get_image_array
+from fileIO.jpeg_writer import write_jpeg
+
+# The qualities the planes can be quantized and written with
+MIN_QUALITY = 5
+MAX_QUALITY = 95
+
+
+class RateControl:
+    """
+    A class that keeps the DCT coefficients of an image to quantize
+    and code them at any quality
+
+    Parameters
+    ----------
+    image_array : ndarray
+        3D uint8 RGB array of the image
+    table_set, backend, dtype, subsampling :
+        The compression settings (see fileIO.compress.picture)
+    workers : int or None
+        The number of threads of the Encoder, the Decoder and the
+        JPEG writer
+
+    Methods
+    -------
+    quantize:
+        the quantized planes and the input details of a quality
+    encode:
+        the bytes of the JPEG file of a quality
+    psnr:
+        the PSNR of the decoded image of a quality
+    search:
+        the quality that meets a target size or PSNR
+    """
+
+    def __init__(self, image_array, table_set='standard', backend=None,
+                 dtype=None, subsampling='4:4:4', workers=1):
+        """
+        Instance attributes (see the class parameters)
+        """
+        self.__image = image_array
+        self.__table_set = table_set
+        self.__backend = get_backend(backend)
+        self.__workers = workers
+        policy = get_dtype_policy(dtype)
+        self.__sample = policy.sample if policy else np.float64
+        work = policy.work if policy else np.float64
+
+        encode = Encoder(image_array, MAX_QUALITY, table_set,
+                         self.__backend.name, dtype, subsampling, False,
+                         workers)
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        self.__details = {
+            'width': encode.width,
+            'height': encode.height,
+            'paddedWidth': encode.paddedWidth,
+            'paddedHeight': encode.paddedHeight,
+            'table_set': table_set,
+            'backend': self.__backend.name,
+            'dtype': dtype,
+            'subsampling': subsampling,
+            'memmap': False
+        }
+        # The only FDCT of the image
+        self.__coefficients = []
+        for plane in (encode.Y, encode.Cr, encode.Cb):
+            blocks = get_blocks(plane, Encoder.bits, work)
+            self.__coefficients.append((plane.shape,
+                                        self.__backend.forward(blocks)))
+
+    def quantize(self, quality) -> tuple:
+        """
+        Quantizes the cached coefficients with the tables of a quality
+
+        Returns
+        -------
+        tuple
+            (image_tuple, input_details) as returned by
+            fileIO.compress.compress_image
+        """
+        table = get_quant_table(quality, 'luma', self.__table_set,
+                                self.__backend.name)
+        planes = []
+        for shape, coefficients in self.__coefficients:
+            plane = np.empty(shape, dtype=self.__sample)
+            put_blocks(plane, table.quantize(coefficients), Encoder.bits)
+            planes.append(plane)
+        input_details = dict(self.__details, quality=quality)
+        return (tuple(planes), input_details)
+
+    def encode(self, quality, optimize=False, mode='baseline',
+               scans='default', restart_rows=0) -> tuple:
+        """
+        Codes the image at a quality into memory (see
+        fileIO.jpeg_writer.write_jpeg for the parameters)
+
+        Returns
+        -------
+        tuple
+            (data : bytes, first_scan_offset : int)
+        """
+        image_tuple, input_details = self.quantize(quality)
+        jpeg = io.BytesIO()
+        first_scan_offset = write_jpeg(jpeg, image_tuple, input_details,
+                                       optimize, mode, scans, restart_rows,
+                                       self.__workers)
+        return (jpeg.getvalue(), first_scan_offset)
+
+    def psnr(self, quality) -> float:
+        """
+        Returns the PSNR in dB of the image decoded at a quality (inf
+        if it equals the source image)
+        """
+        (Y, Cr, Cb), details = self.quantize(quality)
+        decode = Decoder(Y, Cr, Cb, details['width'], details['height'],
+                         details['paddedWidth'], details['paddedHeight'],
+                         quality, self.__table_set, self.__backend.name,
+                         details['dtype'], details['subsampling'], False,
+                         self.__workers, uint8=True)
+        decode.decompression()
+        decode.reverse_padding()
+        decode.reverse_sampling()
+        decode.YCrCb2RGB()
+        error = np.rint(decode.array.astype(np.float64)) - self.__image
+        mse = np.mean(np.square(error))
+        if mse == 0:
+            return (float('inf'))
+        return (10 * log10(255 ** 2 / mse))
+
+    def search(self, target_size=None, target_psnr=None,
+               max_quality=MAX_QUALITY, optimize=False, mode='baseline',
+               scans='default', restart_rows=0) -> tuple:
+        """
+        Binary searches the qualities MIN_QUALITY to max_quality for
+        the one that meets a target size or a target PSNR
+
+        Parameters
+        ----------
+        target_size : int or None
+            The maximum number of bytes of the file
+        target_psnr : float or None
+            The minimum PSNR in dB of the decoded image
+        max_quality : int
+            The highest quality tried
+
+        Returns
+        -------
+        tuple
+            quality : int
+                The chosen quality. If no quality meets the target it
+                is the one closest to it (MIN_QUALITY for a size and
+                max_quality for a PSNR)
+            report : dict
+                {
+                    target_size or target_psnr: the target
+                    size or psnr: the value at the chosen quality
+                    met: bool
+                    trials: int (the number of qualities tried)
+                    data: bytes (the file at the chosen quality, only
+                          for a target size)
+                    first_scan_offset: int (only for a target size)
+                }
+        """
+        if (target_size is None) == (target_psnr is None):
+            raise ValueError('Give either a target size or a target psnr')
+        if not isinstance(max_quality, int):
+            raise TypeError('Quality must be an integer')
+        if max_quality < MIN_QUALITY or max_quality > MAX_QUALITY:
+            raise ValueError(f'Quality must be between {MIN_QUALITY} and '
+                             f'{MAX_QUALITY} for rate control')
+
+        trials = {}
+        if target_size is not None:
+            if target_size <= 0:
+                raise ValueError('Target size must be a positive number')
+
+            def measure(quality):
+                trials[quality] = self.encode(quality, optimize, mode,
+                                              scans, restart_rows)
+                return (len(trials[quality][0]))
+
+            # The size grows with the quality: find the last one that
+            # fits. If MIN_QUALITY does not fit it is kept anyway
+            quality = max(last_true(lambda q: measure(q) <= target_size,
+                                    MIN_QUALITY, max_quality), MIN_QUALITY)
+            if quality not in trials:
+                measure(quality)
+            data, first_scan_offset = trials[quality]
+            return (quality, {
+                'target_size': target_size,
+                'size': len(data),
+                'met': len(data) <= target_size,
+                'trials': len(trials),
+                'data': data,
+                'first_scan_offset': first_scan_offset
+            })
+
+        def measure(quality):
+            trials[quality] = self.psnr(quality)
+            return (trials[quality])
+
+        # The PSNR grows with the quality: find the first one that
+        # reaches the target. If max_quality does not it is kept anyway
+        quality = min(last_true(lambda q: measure(q) < target_psnr,
+                                MIN_QUALITY, max_quality) + 1, max_quality)
+        if quality not in trials:
+            measure(quality)
+        return (quality, {
+            'target_psnr': target_psnr,
+            'psnr': round(trials[quality], 2),
+            'met': trials[quality] >= target_psnr,
+            'trials': len(trials)
+        })
+
+
+def last_true(test, low, high) -> int:
+    """
+    Binary search of the last value of low to high for which a test
+    that is True up to some value and False after it is True
+
+    Returns
+    -------
+    int
+        The value, or low - 1 if the test is False for low
+    """
+    low = low - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if test(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return (low)
+
+
+def rate_image(filename, full_path, max_quality, target_size=None,
+               target_psnr=None, table_set='standard', backend=None,
+               dtype=None, subsampling='4:4:4', optimize=False,
+               mode='baseline', scans='default', restart_rows=0,
+               workers=1) -> tuple:
+    """
+    Function that compresses an image file to the JPEG file of the
+    quality that meets a target size or PSNR (see RateControl.search
+    and fileIO.compress.picture for the parameters)
+
+    Returns
+    -------
+    tuple
+        (quality : int, first_scan_offset : int, report : dict)
+    """
+    rate = RateControl(get_image_array(filename), table_set, backend,
+                       dtype, subsampling, workers)
+    quality, report = rate.search(target_size, target_psnr, max_quality,
+                                  optimize, mode, scans, restart_rows)
+    if 'data' in report:
+        data = report.pop('data')
+        first_scan_offset = report.pop('first_scan_offset')
+    else:
+        data, first_scan_offset = rate.encode(quality, optimize, mode,
+                                              scans, restart_rows)
+    with open(full_path, 'wb') as jpeg:
+        jpeg.write(data)
+    return (quality, first_scan_offset, report)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+A module that compresses one image file at several qualities (a
+quality sweep)
+
+The image file is read once, and the color conversion, the padding
+and the FDCT are done once for all the qualities (see
+fileIO.rate.RateControl). Every quality only requantizes the cached
+DCT coefficients and entropy codes them into its own output file
+
+Example
+-------
+    $ results = picture_sweep('image.jpg', (30, 50, 70, 85))
+"""
+
+# Python modules
+from datetime import datetime
+
+# Modules (functions) from fileIO package
+from fileIO.compress import output_names
+from fileIO.compress import native_output
+from fileIO.compress import image_details
+from fileIO.image_io import get_image_array
+from fileIO.rate import RateControl
+from fileIO.rate import MIN_QUALITY
+from fileIO.rate import MAX_QUALITY
+from fileIO import storage
+
+# Modules (functions) from util_func package
+from util_func.memory import MemoryTracker
+
+
+def picture_sweep(filename, qualities, output_image_names=None,
+                  table_set='standard', backend=None, dtype=None,
+                  subsampling='4:4:4', optimize=False, mode='baseline',
+                  scans='default', restart_rows=0, workers=1,
+                  commit=True, track_memory=False) -> list:
+    """
+    The function that compresses an image file at every quality of a
+    list (see fileIO.compress.picture for the other parameters)
+
+    Parameters:
+    -----------
+    filename: str
+        The pathname of the image file to compress
+    qualities: sequence
+        The qualities of the outputs, each between MIN_QUALITY and
+        MAX_QUALITY of fileIO.rate
+    output_image_names: sequence or None
+        The JPEG output name of every quality. None names them after
+        the input and their ids
+    commit: bool
+        True to add the details of all the outputs to storage and
+        save the json file once
+    track_memory: bool
+        True to measure the peak memory of the sweep (see picture)
+
+    Returns:
+    --------
+    list
+        The details dictionary (see picture) of every quality in the
+        order of qualities. start_time is the start of the sweep and
+        peak_memory the peak of the whole sweep (None without
+        track_memory)
+    """
+    qualities = list(qualities)
+    if not qualities:
+        raise ValueError('Qualities must be a non empty list')
+    for quality in qualities:
+        if not isinstance(quality, int):
+            raise TypeError('Quality must be an integer')
+        if quality < MIN_QUALITY or quality > MAX_QUALITY:
+            raise ValueError(f'Quality must be between {MIN_QUALITY} and '
+                             f'{MAX_QUALITY} for a sweep')
+    if output_image_names is None:
+        output_image_names = [None] * len(qualities)
+    if len(output_image_names) != len(qualities):
+        raise ValueError('Give one output name per quality')
+
+    all_names = [output_names(filename, name)
+                 for name in output_image_names]
+    for names, quality in zip(all_names, qualities):
+        if not native_output(quality, names[2]):
+            raise ValueError('Sweep outputs must be JPEG files')
+
+    outputs = []
+    start_time = datetime.now()
+    with MemoryTracker(track_memory) as tracker:
+        image_array = get_image_array(filename)
+        resolution = f'{image_array.shape[1]} X {image_array.shape[0]}'
+        rate = RateControl(image_array, table_set, backend, dtype,
+                           subsampling, workers)
+        for names, quality in zip(all_names, qualities):
+            data, first_scan_offset = rate.encode(quality, optimize, mode,
+                                                  scans, restart_rows)
+            with open(names[2], 'wb') as jpeg:
+                jpeg.write(data)
+            outputs.append((names, quality, datetime.now(),
+                            first_scan_offset))
+
+    results = [image_details(names, quality, filename, start_time,
+                             end_time, tracker.peak, first_scan_offset,
+                             resolution)
+               for names, quality, end_time, first_scan_offset in outputs]
+
+    # Save the details of all the outputs at once
+    if commit:
+        for details in results:
+            storage.new(details)
+        storage.save()
+
+    return (results)
@@ -6,7 +6,8 @@ import shlex
 
 # Modules (functions) from fileIO package
 from fileIO import storage
-from fileIO.compress import picture
+from fileIO.batch import compress_batch
+from fileIO.sweep import picture_sweep
 from fileIO.image_io import display
 from fileIO.image_io import print_details
 from fileIO.image_io import get_path_array
@@ -260,29 +261,16 @@ class CompJPEG(cmd.Cmd):
             print("ERROR: Wrong file type")
             return
         im_ar = get_path_array(file_path, file_type)
-        counter = 0
         if im_ar:
-            for pathname, quality in im_ar:
-                try:
-                    picture(pathname, quality)
-                    counter += 1
-                except Exception as er:
-                    print(f"\nERROR: compression of {pathname} failed")
-                    try:
-                        e = er.exception
-                    except Exception:
-                        print(str(er))
-                    else:
-                        print(str(e))
-            print("\nFile(s) compression completed......")
-            print(f"Number of input: {len(im_ar)}")
-            print(f"Number of successful compressions: {counter}")
+            compress_all(im_ar)
 
     def do_compress(self, args):
         """
         Compresses image file(s) to the desired ratio
 
         USAGE: compress "path=pathname1 quality=40" ...
+        USAGE: compress "path=pathname1 quality=40 mode=progressive" ...
+        USAGE: compress "path=pathname1 quality=90 target_size=200000" ...
 
         Parameters
         ----------
@@ -290,28 +278,104 @@ class CompJPEG(cmd.Cmd):
             The pathname of the image file
         quality :
             The compression ratio
+        mode : [default=baseline]
+            baseline or progressive
+        scans : [default=default]
+            The scan script preset of progressive images
+            default, spectral or dc
+        target_size :
+            Rate control: the maximum size of the file in bytes. The
+            highest quality up to quality that fits is used
+        target_psnr :
+            Rate control: the minimum PSNR (dB) of the compressed
+            image. The lowest quality up to quality that reaches it
+            is used
         """
         if not args:
             print('ERROR: No input files')
             return
         im_ar = get_path_array(args, file_type='file')
-        counter = 0
         if im_ar:
-            for pathname, quality in im_ar:
+            compress_all(im_ar)
+
+    def do_sweep(self, args):
+        """
+        Compresses an image file at several qualities, sharing the
+        decoding, color conversion and DCT of the image
+
+        USAGE: sweep path=pathname qualities=30,50,70
+        USAGE: sweep path=pathname qualities=30,50,70 mode=progressive
+
+        Parameters
+        ----------
+        path :
+            The pathname of the image file
+        qualities :
+            The comma separated qualities (5 to 95)
+        mode : [default=baseline]
+            baseline or progressive
+        scans : [default=default]
+            The scan script preset of progressive images
+            default, spectral or dc
+        """
+        if not args:
+            print('ERROR: No input arguments')
+            return
+        filename = qualities = None
+        options = {}
+        for arg in shlex.split(args):
+            value = arg.split('=')
+            if len(value) > 1 and value[0] == 'path':
+                filename = value[1]
+            elif len(value) > 1 and value[0] == 'qualities':
                 try:
-                    picture(pathname, quality)
-                    counter += 1
-                except Exception as er:
-                    print(f"\nERROR: compression of {pathname} failed")
-                    try:
-                        e = er.exception
-                    except Exception:
-                        print(str(er))
-                    else:
-                        print(str(e))
-            print("\nFile(s) compression completed......")
-            print(f"Number of input: {len(im_ar)}")
-            print(f"Number of successful compressions: {counter}")
+                    qualities = [int(q) for q in value[1].split(',')]
+                except ValueError:
+                    print(f"ERROR: Conversion to int failed:\t{arg}")
+                    return
+            elif len(value) > 1 and value[0] in ('mode', 'scans'):
+                options[value[0]] = value[1]
+            else:
+                print(f"ERROR: Wrong key-value pair:\t{arg}")
+                return
+        if not (filename and qualities):
+            print("ERROR: path and qualities must be valid inputs")
+            return
+        try:
+            results = picture_sweep(filename, qualities, **options)
+        except Exception as er:
+            print(f"\nERROR: compression of {filename} failed")
+            print(er)
+            return
+        for details in results:
+            print(f"quality {details['quality']}: "
+                  f"{details['compressed_image_name']} "
+                  f"({details['out_size']})")
+        print("\nFile(s) compression completed......")
+        print(f"Number of outputs: {len(results)}")
+
+
+def compress_all(im_ar) -> None:
+    """
+    Compresses the images of a batch on every CPU (see
+    fileIO.batch.compress_batch) and prints the failures and counts
+
+    Parameters
+    ----------
+    im_ar : list
+        (pathname, quality, options) lists as made by get_path_array
+    """
+    counter = 0
+    results = compress_batch(im_ar)
+    for (pathname, _, _), (details, error) in zip(im_ar, results):
+        if details:
+            counter += 1
+        else:
+            print(f"\nERROR: compression of {pathname} failed")
+            print(error)
+    print("\nFile(s) compression completed......")
+    print(f"Number of input: {len(im_ar)}")
+    print(f"Number of successful compressions: {counter}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the Decoder class
+"""
+
+import unittest
+import numpy as np
+
+from codec import Encoder
+from codec import Decoder
+from util_func.memory import configure_memmap
+from benchmarks.bench_codec import per_block_decompression
+
+
+class TestDecompression(unittest.TestCase):
+    """
+    Tests for Decoder.decompression
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.quality = 40
+        self.image_array = rng.integers(0, 256, (45, 30, 3), dtype=np.uint8)
+        encode = Encoder(self.image_array, self.quality,
+                         backend='matrix')
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        encode.compression()
+        self.encode = encode
+
+    def new_decoder(self):
+        encode = self.encode
+        planes = (encode.Y.copy(), encode.Cr.copy(), encode.Cb.copy())
+        return Decoder(*planes, encode.width, encode.height,
+                       encode.paddedWidth, encode.paddedHeight,
+                       self.quality, backend='matrix')
+
+    def test_decompression_same_as_per_block(self):
+        encode = self.encode
+        planes = (encode.Y, encode.Cr, encode.Cb)
+        reference = per_block_decompression(planes, self.quality)
+        decode = self.new_decoder()
+        decode.decompression()
+        for expected, result in zip(reference,
+                                    (decode.Y, decode.Cr, decode.Cb)):
+            self.assertTrue(np.array_equal(expected, result))
+
+    def test_decompression_round_trip(self):
+        decode = self.new_decoder()
+        decode.decompression()
+        decode.reverse_padding()
+        decode.reverse_sampling()
+        decode.YCrCb2RGB()
+        self.assertEqual(decode.array.shape, self.image_array.shape)
+        error = np.abs(decode.array - self.image_array).mean()
+        self.assertLess(error, 40)
+
+    def test_decompression_int16_policy(self):
+        encode = Encoder(self.image_array, self.quality, dtype='int16')
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        encode.compression()
+        decode = Decoder(encode.Y, encode.Cr, encode.Cb, encode.width,
+                         encode.height, encode.paddedWidth,
+                         encode.paddedHeight, self.quality, dtype='int16')
+        decode.decompression()
+        decode.reverse_padding()
+        decode.reverse_sampling()
+        decode.YCrCb2RGB()
+        self.assertEqual(decode.array.dtype, np.uint8)
+        self.assertEqual(decode.array.shape, self.image_array.shape)
+        error = np.abs(decode.array - self.image_array.astype(float)).mean()
+        self.assertLess(error, 40)
+
+    def test_decompression_uint8(self):
+        float_decode = self.new_decoder()
+        encode = self.encode
+        planes = (encode.Y.copy(), encode.Cr.copy(), encode.Cb.copy())
+        decode = Decoder(*planes, encode.width, encode.height,
+                         encode.paddedWidth, encode.paddedHeight,
+                         self.quality, backend='matrix', uint8=True)
+        for step in ('decompression', 'reverse_padding',
+                     'reverse_sampling', 'YCrCb2RGB'):
+            getattr(float_decode, step)()
+            getattr(decode, step)()
+        self.assertEqual(decode.array.dtype, np.uint8)
+        expected = np.clip(np.rint(float_decode.array), 0, 255)
+        error = np.abs(decode.array - expected)
+        self.assertLess(error.mean(), 1)
+
+
+class TestSubsampling(unittest.TestCase):
+    """
+    Round trip of subsampled chroma channels
+    """
+
+    def setUp(self):
+        i, j = np.mgrid[0:37, 0:53]
+        self.array = np.stack((i * 6, j * 4, (i + j) * 3),
+                              axis=-1).astype(np.uint8)
+
+    def round_trip(self, subsampling, dtype=None):
+        encode = Encoder(self.array, 90, dtype=dtype,
+                         subsampling=subsampling)
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        encode.compression()
+        decode = Decoder(encode.Y, encode.Cr, encode.Cb, encode.width,
+                         encode.height, encode.paddedWidth,
+                         encode.paddedHeight, 90, dtype=dtype,
+                         subsampling=subsampling)
+        decode.decompression()
+        decode.reverse_padding()
+        decode.reverse_sampling()
+        decode.YCrCb2RGB()
+        return (encode, decode.array)
+
+    def test_chroma_dimensions(self):
+        encode, _ = self.round_trip('4:2:0')
+        self.assertEqual(encode.Y.shape, (48, 64))
+        self.assertEqual(encode.Cr.shape, (24, 32))
+        encode, _ = self.round_trip('4:2:2')
+        self.assertEqual(encode.Y.shape, (40, 64))
+        self.assertEqual(encode.Cb.shape, (40, 32))
+
+    def test_round_trip(self):
+        for subsampling in ('4:2:2', '4:2:0'):
+            for dtype in (None, 'int16', 'float32'):
+                _, out = self.round_trip(subsampling, dtype)
+                self.assertEqual(out.shape, self.array.shape)
+                error = np.abs(out.astype(np.float64) - self.array)
+                self.assertLess(error.mean(), 3)
+
+    def test_invalid_subsampling(self):
+        with self.assertRaises(ValueError):
+            Encoder(self.array, subsampling='4:1:1')
+
+
+class TestMemmap(unittest.TestCase):
+    """
+    Codec planes backed by memory mapped scratch files
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.array = rng.integers(0, 256, (37, 53, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        configure_memmap()
+
+    def round_trip(self, memmap, subsampling='4:2:0'):
+        encode = Encoder(self.array, 75, dtype='float32',
+                         subsampling=subsampling, memmap=memmap)
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        encode.compression()
+        planes = (encode.Y, encode.Cr, encode.Cb)
+        decode = Decoder(*planes, encode.width, encode.height,
+                         encode.paddedWidth, encode.paddedHeight, 75,
+                         dtype='float32', subsampling=subsampling,
+                         memmap=memmap)
+        decode.decompression()
+        decode.reverse_padding()
+        decode.reverse_sampling()
+        decode.YCrCb2RGB()
+        return (planes, decode.array)
+
+    def test_same_as_unmapped(self):
+        for subsampling in ('4:4:4', '4:2:0'):
+            planes, array = self.round_trip(False, subsampling)
+            mapped, mapped_array = self.round_trip(True, subsampling)
+            for a, b in zip(planes, mapped):
+                self.assertIsInstance(b, np.memmap)
+                self.assertTrue(np.array_equal(a, b))
+            self.assertIsInstance(mapped_array, np.memmap)
+            self.assertTrue(np.array_equal(array, mapped_array))
+
+    def test_threshold(self):
+        configure_memmap(37 * 53)
+        self.assertTrue(Encoder(self.array).memmap)
+        configure_memmap(37 * 53 + 1)
+        self.assertFalse(Encoder(self.array).memmap)
+        self.assertTrue(Encoder(self.array, memmap=True).memmap)
+
+    def test_default_policy(self):
+        encode = Encoder(self.array, memmap=True)
+        encode.RGB2YCrCb()
+        self.assertEqual(encode.Y.dtype, np.float32)
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            configure_memmap(0)
+
+
+class TestWorkers(unittest.TestCase):
+    """
+    Tests for the bands of Decoder.decompression on a thread pool
+    """
+
+    def test_same_array_as_one_worker(self):
+        rng = np.random.default_rng(7)
+        array = rng.integers(0, 256, (600, 560, 3), dtype=np.uint8)
+        encode = Encoder(array, 50, dtype='float32', subsampling='4:2:0')
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        encode.compression()
+        arrays = []
+        for workers in (1, 3):
+            planes = (encode.Y.copy(), encode.Cr.copy(), encode.Cb.copy())
+            decode = Decoder(*planes, encode.width, encode.height,
+                             encode.paddedWidth, encode.paddedHeight, 50,
+                             dtype='float32', subsampling='4:2:0',
+                             workers=workers)
+            decode.decompression()
+            decode.reverse_padding()
+            decode.reverse_sampling()
+            decode.YCrCb2RGB()
+            arrays.append(decode.array)
+        self.assertTrue(np.array_equal(*arrays))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the Encoder class
+"""
+
+import unittest
+import numpy as np
+
+from tests import variables as var
+from codec import Encoder
+from fileIO.image_io import get_image_array
+from benchmarks.bench_codec import per_block_compression
+
+
+def prepared_encoder(image_array, quality=50):
+    """
+    Returns an Encoder of the matrix backend (the one of the per
+    block functions) that is ready for compression
+    """
+    encode = Encoder(image_array, quality, backend='matrix')
+    encode.RGB2YCrCb()
+    encode.sampling()
+    encode.padding()
+    return (encode)
+
+
+class TestCompression(unittest.TestCase):
+    """
+    Tests for Encoder.compression
+    """
+
+    def setUp(self):
+        self.image_array = get_image_array(var.jpeg_image1)
+        rng = np.random.default_rng(0)
+        self.random_array = rng.integers(0, 256, (37, 53, 3), dtype=np.uint8)
+
+    def check_same_as_per_block(self, image_array, quality):
+        encode = prepared_encoder(image_array, quality)
+        planes = (encode.Y, encode.Cr, encode.Cb)
+        reference = per_block_compression(planes, quality)
+        encode.compression()
+        for expected, result in zip(reference,
+                                    (encode.Y, encode.Cr, encode.Cb)):
+            self.assertTrue(np.array_equal(expected, result))
+
+    def test_compression_same_as_per_block(self):
+        self.check_same_as_per_block(self.image_array, 50)
+
+    def test_compression_same_as_per_block_random(self):
+        for quality in (5, 30, 75, 95):
+            self.check_same_as_per_block(self.random_array, quality)
+
+    def test_compression_keeps_padded_shape(self):
+        encode = prepared_encoder(self.random_array)
+        encode.compression()
+        self.assertEqual(encode.Y.shape, (40, 56))
+        self.assertEqual(encode.Cb.shape, (40, 56))
+
+
+class TestDtypePolicy(unittest.TestCase):
+    """
+    Tests for the Encoder dtype policies
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.image_array = rng.integers(0, 256, (21, 34, 3), dtype=np.uint8)
+
+    def compress(self, dtype):
+        encode = Encoder(self.image_array, 50, dtype=dtype)
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        encode.compression()
+        return (encode)
+
+    def test_int16_planes(self):
+        encode = self.compress('int16')
+        for plane in (encode.Y, encode.Cr, encode.Cb):
+            self.assertEqual(plane.dtype, np.int16)
+            self.assertEqual(plane.shape, (24, 40))
+
+    def test_policies_close_to_default(self):
+        default = self.compress(None)
+        for dtype in ('float32', 'int16'):
+            encode = self.compress(dtype)
+            for a, b in zip((default.Y, default.Cr, default.Cb),
+                            (encode.Y, encode.Cr, encode.Cb)):
+                self.assertLessEqual(np.abs(a - b).max(), 1)
+
+    def test_subsampled_padding_keeps_averages(self):
+        rng = np.random.default_rng(4)
+        # The second image is subsampled in several strips
+        for shape in ((37, 53, 3), (141, 53, 3)):
+            array = rng.integers(0, 256, shape, dtype=np.uint8)
+            planes = []
+            for dtype in (None, 'float32'):
+                encode = Encoder(array, 50, dtype=dtype,
+                                 subsampling='4:2:0')
+                encode.RGB2YCrCb()
+                encode.sampling()
+                encode.padding()
+                planes.append((encode.Y, encode.Cr, encode.Cb))
+            for a, b in zip(*planes):
+                self.assertEqual(a.shape, b.shape)
+                self.assertTrue(np.allclose(a, b, atol=1e-4))
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError) as er:
+            Encoder(self.image_array, 50, dtype='int8')
+        self.assertEqual(str(er.exception), 'No dtype policy named int8')
+
+
+class TestWorkers(unittest.TestCase):
+    """
+    Tests for the bands of Encoder.compression on a thread pool
+    """
+
+    def test_same_planes_as_one_worker(self):
+        rng = np.random.default_rng(6)
+        image_array = rng.integers(0, 256, (600, 560, 3), dtype=np.uint8)
+        for dtype in (None, 'int16'):
+            planes = []
+            for workers in (1, 3):
+                encode = Encoder(image_array, 50, dtype=dtype,
+                                 workers=workers)
+                encode.RGB2YCrCb()
+                encode.sampling()
+                encode.padding()
+                encode.compression()
+                planes.append((encode.Y, encode.Cr, encode.Cb))
+            for a, b in zip(*planes):
+                self.assertTrue(np.array_equal(a, b))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the entropy module
+"""
+
+import unittest
+import numpy as np
+
+from codec.entropy import ZIGZAG
+from codec.entropy import HuffmanTable
+from codec.entropy import DC_LUMA_BITS
+from codec.entropy import DC_LUMA_VALUES
+from codec.entropy import bit_size
+from codec.entropy import extra_bits
+from codec.entropy import block_symbols
+from codec.entropy import mcu_blocks
+from codec.entropy import stuff_bytes
+from codec.entropy import optimal_table
+
+
+def per_block_symbols(blocks):
+    """
+    Reference run length coding of one component, a block at a time
+    """
+    symbols = []
+    last_dc = 0
+    for block in blocks:
+        diff = int(block[0]) - last_dc
+        last_dc = int(block[0])
+        symbols.append((0, abs(diff).bit_length(), diff))
+        run = 0
+        for value in block[1:]:
+            if value == 0:
+                run += 1
+                continue
+            while run > 15:
+                symbols.append((1, 0xF0, 0))
+                run -= 16
+            size = abs(int(value)).bit_length()
+            symbols.append((1, (run << 4) | size, int(value)))
+            run = 0
+        if run:
+            symbols.append((1, 0x00, 0))
+    return (symbols)
+
+
+class TestEntropy(unittest.TestCase):
+    """
+    Tests for the entropy coding stages
+    """
+
+    def test_zigzag_is_permutation(self):
+        self.assertTrue(np.array_equal(np.sort(ZIGZAG), np.arange(64)))
+        self.assertEqual(list(ZIGZAG[0:6]), [0, 1, 8, 16, 9, 2])
+
+    def test_huffman_codes(self):
+        table = HuffmanTable(DC_LUMA_BITS, DC_LUMA_VALUES)
+        self.assertEqual((table.codes[0], table.sizes[0]), (0, 2))
+        self.assertEqual((table.codes[1], table.sizes[1]), (2, 3))
+        self.assertEqual((table.codes[11], table.sizes[11]), (510, 9))
+
+    def test_invalid_huffman_table(self):
+        with self.assertRaises(ValueError):
+            HuffmanTable(DC_LUMA_BITS, DC_LUMA_VALUES[0:5])
+
+    def test_bit_size_and_extra_bits(self):
+        values = np.array([0, 1, -1, 3, -3, 1023, -1024])
+        sizes = bit_size(values)
+        self.assertEqual(list(sizes), [0, 1, 1, 2, 2, 10, 11])
+        self.assertEqual(list(extra_bits(values, sizes)),
+                         [0, 1, 0, 3, 0, 1023, 1023])
+
+    def test_block_symbols_same_as_per_block(self):
+        rng = np.random.default_rng(3)
+        blocks = rng.integers(-20, 21, (50, 64)).astype(np.int16)
+        blocks[rng.random((50, 64)) < 0.8] = 0
+        blocks[7] = 0
+        blocks[9, 1:] = 0
+        blocks[9, 40] = 5
+        components = np.zeros(50, dtype=np.int64)
+        _, kinds, symbols, values, _ = block_symbols(
+            blocks, components, np.zeros(1, dtype=np.int64))
+        result = list(zip(kinds.tolist(), symbols.tolist(),
+                          values.tolist()))
+        self.assertEqual(result, per_block_symbols(blocks))
+
+    def test_mcu_blocks_order(self):
+        luma = np.arange(16 * 32).reshape(16, 32)
+        chroma = np.zeros((8, 16))
+        blocks, components = mcu_blocks((luma, chroma, chroma),
+                                        ((2, 2), (1, 1), (1, 1)))
+        self.assertEqual(blocks.shape, (12, 64))
+        self.assertEqual(list(components[0:6]), [0, 0, 0, 0, 1, 2])
+        # Second block of the MCU is the top right luma block
+        self.assertEqual(blocks[1, 0], luma[0, 8])
+        self.assertEqual(blocks[2, 0], luma[8, 0])
+
+    def test_stuff_bytes(self):
+        data = np.array([1, 0xFF, 2, 0xFF], dtype=np.uint8)
+        self.assertEqual(stuff_bytes(data), b'\x01\xff\x00\x02\xff\x00')
+
+    def test_optimal_table(self):
+        rng = np.random.default_rng(4)
+        frequencies = np.zeros(256, dtype=np.int64)
+        frequencies[rng.choice(256, 180, replace=False)] = \
+            rng.geometric(0.001, 180)
+        frequencies[7] = 10 ** 9
+        table = optimal_table(frequencies)
+        used = frequencies > 0
+        self.assertTrue(np.all(table.sizes[used] > 0))
+        self.assertTrue(np.all(table.sizes[~used] == 0))
+        self.assertLessEqual(table.sizes.max(), 16)
+        # Kraft sum below 1 so that no code is all ones
+        self.assertLess(np.sum(2.0 ** -table.sizes[used]), 1)
+        # More frequent symbols never get longer codes
+        order = np.argsort(-frequencies[used], kind='stable')
+        self.assertTrue(np.all(np.diff(table.sizes[used][order]) >= 0))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the progressive module
+"""
+
+import unittest
+import numpy as np
+
+from codec.progressive import SCAN_PRESETS
+from codec.progressive import ProgressiveScan
+from codec.progressive import get_scan_script
+
+
+class TestScanScript(unittest.TestCase):
+    """
+    Tests for get_scan_script
+    """
+
+    def test_presets(self):
+        for name in SCAN_PRESETS:
+            self.assertEqual(len(get_scan_script(name)),
+                             len(SCAN_PRESETS[name]))
+
+    def test_unknown_preset(self):
+        with self.assertRaises(ValueError) as ex:
+            get_scan_script('fastest')
+        self.assertEqual(str(ex.exception), 'No scan script named fastest')
+
+    def test_incomplete_script(self):
+        with self.assertRaises(ValueError):
+            get_scan_script((((0, 1, 2), 0, 0, 0, 0), ((0,), 1, 63, 0, 0)))
+
+    def test_ac_before_dc(self):
+        with self.assertRaises(ValueError):
+            get_scan_script((((0,), 1, 63, 0, 0), ((0, 1, 2), 0, 0, 0, 0)))
+
+    def test_interleaved_ac_scan(self):
+        with self.assertRaises(ValueError):
+            get_scan_script((((0, 1, 2), 0, 0, 0, 0),
+                             ((0, 1, 2), 1, 63, 0, 0)))
+
+    def test_wrong_refinement(self):
+        with self.assertRaises(ValueError):
+            get_scan_script((((0, 1, 2), 0, 0, 0, 2),
+                             ((0, 1, 2), 0, 0, 1, 0)))
+
+
+class TestProgressiveScan(unittest.TestCase):
+    """
+    Tests for the symbols of ProgressiveScan
+    """
+
+    def symbols(self, scan, blocks):
+        index = np.zeros(blocks.shape[0], dtype=np.int64)
+        parts = [scan.symbols(blocks, index), scan.finish()]
+        return [tuple(x.tolist() for x in part) for part in parts]
+
+    def test_eobrun(self):
+        blocks = np.zeros((5, 64), dtype=np.int16)
+        blocks[3, 2] = -3
+        scan = ProgressiveScan((0,), 1, 63, 0, 0)
+        (_, kinds, symbols, values, sizes), last = self.symbols(scan, blocks)
+        # EOB run of 3 blocks (EOB1 + 1 bit), the coefficient, then
+        # the run of the last 2 blocks coded at the end of the scan
+        self.assertEqual(symbols, [0x10, 0x12])
+        self.assertEqual(values, [1, -3])
+        self.assertEqual(last[2], [0x10])
+        self.assertEqual(last[3], [0])
+
+    def test_eobrun_split_between_bands(self):
+        scan = ProgressiveScan((0,), 1, 63, 0, 0)
+        blocks = np.zeros((4, 64), dtype=np.int16)
+        index = np.zeros(4, dtype=np.int64)
+        first = scan.symbols(blocks, index)
+        self.assertEqual(first[2].size, 0)
+        blocks[1, 1] = 1
+        second = scan.symbols(blocks, index)
+        # The 4 blocks of the first band and the first of the second
+        self.assertEqual(second[2].tolist()[0], 0x20)
+        self.assertEqual(second[3].tolist()[0], 1)
+
+    def test_refinement_correction_bits(self):
+        blocks = np.zeros((1, 64), dtype=np.int16)
+        blocks[0, 1] = 3
+        blocks[0, 4] = 1
+        scan = ProgressiveScan((0,), 1, 63, 1, 0)
+        (_, kinds, symbols, values, sizes), last = self.symbols(scan, blocks)
+        # New coefficient at 4 (run of 2 zeros) with its sign, then the
+        # correction bit of the coefficient at 1, then an EOB run
+        self.assertEqual(symbols, [0x21, 0])
+        self.assertEqual(values, [1, 1])
+        self.assertEqual(kinds, [1, 2])
+        self.assertEqual(last[2], [0x00])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the StreamEncoder class
+"""
+
+import unittest
+import numpy as np
+
+from codec import Encoder
+from codec.stream import StreamEncoder
+
+
+class TestStreamEncoder(unittest.TestCase):
+    """
+    Tests for the StreamEncoder class
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(13)
+        self.array = rng.integers(0, 256, (45, 70, 3)).astype(np.uint8)
+
+    def stream(self, rows, **kwargs):
+        encoder = StreamEncoder(45, 70, 60, **kwargs)
+        strips = (self.array[i:i + rows] for i in range(0, 45, rows))
+        parts = list(encoder.encode(strips))
+        for plane in parts[0]:
+            self.assertEqual(plane.shape[0] % 8, 0)
+        return (encoder, [np.concatenate(p) for p in zip(*parts)])
+
+    def test_same_planes_as_encoder(self):
+        for dtype in ('float32', 'int16'):
+            for subsampling in ('4:4:4', '4:2:2', '4:2:0'):
+                encode = Encoder(self.array, 60, dtype=dtype,
+                                 subsampling=subsampling)
+                encode.RGB2YCrCb()
+                encode.sampling()
+                encode.padding()
+                encode.compression()
+                for rows in (1, 7, 16, 45):
+                    stream, planes = self.stream(rows, dtype=dtype,
+                                                 subsampling=subsampling)
+                    self.assertEqual(stream.paddedWidth, encode.paddedWidth)
+                    self.assertEqual(stream.paddedHeight,
+                                     encode.paddedHeight)
+                    for plane, expected in zip(planes, (encode.Y, encode.Cr,
+                                                        encode.Cb)):
+                        self.assertTrue(np.array_equal(plane, expected))
+
+    def test_strip_rows(self):
+        self.assertEqual(StreamEncoder(45, 70).strip_rows, 8)
+        self.assertEqual(StreamEncoder(45, 70, subsampling='4:2:0')
+                         .strip_rows, 16)
+
+    def test_missing_rows(self):
+        encoder = StreamEncoder(45, 70, 60)
+        with self.assertRaises(ValueError):
+            list(encoder.encode([self.array[0:40]]))
+
+    def test_extra_rows(self):
+        encoder = StreamEncoder(40, 70, 60)
+        with self.assertRaises(ValueError):
+            list(encoder.encode([self.array]))
+
+    def test_wrong_strip_shape(self):
+        encoder = StreamEncoder(45, 70, 60)
+        with self.assertRaises(ValueError):
+            list(encoder.encode([self.array[:, 0:60]]))
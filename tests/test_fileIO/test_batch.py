@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the module batch
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from contextlib import redirect_stdout
+from PIL import Image
+
+from tests import variables as var
+from fileIO import storage
+from fileIO.batch import compress_job
+from fileIO.batch import compress_batch
+from main import compress_all
+from util_func.workers import WorkerPool
+
+
+class TestCompressJob(unittest.TestCase):
+    """
+    Tests for the compress_job function
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = [var.make_jpeg(self.directory.name, (40, 56), seed,
+                                    name=f'in{seed}.jpg')
+                      for seed in range(2)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_worker_processes(self):
+        objects = dict(storage.objects)
+        jobs = [[path, 40, {}] for path in self.paths]
+        jobs.append([os.path.join(self.directory.name, 'none.jpg'), 40, {}])
+        with WorkerPool(2, processes=True) as pool:
+            results = list(pool.map(compress_job, jobs))
+        for path, (details, error) in zip(self.paths, results):
+            self.assertIsNone(error)
+            self.assertEqual(details['in_image_name'], path)
+            self.assertTrue(os.path.exists(details['out_fullpath']))
+        self.assertIsNone(results[2][0])
+        self.assertTrue(results[2][1])
+        # Details are only committed by compress_batch
+        self.assertEqual(storage.objects, objects)
+
+    def test_options(self):
+        details, error = compress_job([self.paths[0], 40,
+                                       {'mode': 'progressive'}])
+        self.assertIsNone(error)
+        with Image.open(details['out_fullpath']) as image:
+            self.assertTrue(image.info.get('progressive'))
+
+
+class TestCompressBatch(unittest.TestCase):
+    """
+    Tests for compress_batch and main.compress_all
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.jobs = [[var.make_jpeg(self.directory.name, (40, 56), seed,
+                                    name=f'in{seed}.jpg'), 40, {}]
+                     for seed in range(2)]
+        self.missing = os.path.join(self.directory.name, 'none.jpg')
+        self.jobs.insert(1, [self.missing, 40, {}])
+        self.objects = dict(storage.objects)
+
+    def tearDown(self):
+        for key in list(storage.objects):
+            if key not in self.objects:
+                del storage.objects[key]
+        self.directory.cleanup()
+
+    def test_single_commit(self):
+        with mock.patch.object(storage, 'save') as save:
+            results = compress_batch(self.jobs, workers=2)
+        save.assert_called_once_with()
+        self.assertEqual(len(results), 3)
+        for job, (details, error) in zip(self.jobs[0::2], results[0::2]):
+            self.assertIsNone(error)
+            self.assertEqual(details['in_image_name'], job[0])
+            self.assertIs(storage.objects[details['compressed_image_name']],
+                          details)
+        # The failed job keeps its place and adds nothing to storage
+        self.assertIsNone(results[1][0])
+        self.assertTrue(results[1][1])
+        self.assertEqual(len(storage.objects), len(self.objects) + 2)
+
+    def test_compress_all_counts(self):
+        output = io.StringIO()
+        with mock.patch.object(storage, 'save'), redirect_stdout(output):
+            compress_all(self.jobs)
+        text = output.getvalue()
+        self.assertIn(f'ERROR: compression of {self.missing} failed', text)
+        self.assertNotIn(self.jobs[0][0], text)
+        self.assertIn('Number of input: 3', text)
+        self.assertIn('Number of successful compressions: 2', text)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the module cache
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tests import variables as var
+from fileIO import storage
+from fileIO.compress import picture
+from fileIO.cache import ResultCache
+from fileIO.cache import cache_key
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    Tests for the ResultCache class and the cache of picture
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = var.make_jpeg(self.directory.name, (40, 56), 14, 90)
+        self.json = os.path.join(self.directory.name, 'cache.json')
+        self.cache = ResultCache(self.json)
+        self.objects = dict(storage.objects)
+
+    def tearDown(self):
+        for key in list(storage.objects):
+            if key not in self.objects:
+                storage.discard(key)
+        self.directory.cleanup()
+
+    def test_hit(self):
+        details = picture(self.path, 60, commit=False, cache=self.cache)
+        self.assertFalse(details['cache_hit'])
+        again = picture(self.path, 60, commit=False, cache=self.cache)
+        self.assertTrue(again['cache_hit'])
+        self.assertEqual(again['out_fullpath'], details['out_fullpath'])
+        self.assertEqual(again['user_id'], details['user_id'])
+        # The entries are read back from the json file
+        reloaded = ResultCache(self.json)
+        self.assertEqual(len(reloaded), 1)
+        self.assertTrue(picture(self.path, 60, commit=False,
+                                cache=reloaded)['cache_hit'])
+
+    def test_key(self):
+        other = os.path.join(self.directory.name, 'copy.jpg')
+        with open(self.path, 'rb') as image, open(other, 'wb') as copy:
+            copy.write(image.read())
+        settings = {'quality': 60, 'mode': 'baseline'}
+        self.assertEqual(cache_key(self.path, settings),
+                         cache_key(other, settings))
+        self.assertNotEqual(cache_key(self.path, settings),
+                            cache_key(self.path, {'quality': 61,
+                                                  'mode': 'baseline'}))
+        picture(self.path, 60, commit=False, cache=self.cache)
+        for kwargs in ({'quality': 70}, {'mode': 'progressive'},
+                       {'backend': 'aan'}):
+            kwargs = dict({'quality': 60}, **kwargs)
+            details = picture(self.path, commit=False, cache=self.cache,
+                              **kwargs)
+            self.assertFalse(details['cache_hit'])
+        self.assertEqual(len(self.cache), 4)
+
+    def test_deleted_output(self):
+        details = picture(self.path, 60, commit=False, cache=self.cache)
+        os.remove(details['out_fullpath'])
+        again = picture(self.path, 60, commit=False, cache=self.cache)
+        self.assertFalse(again['cache_hit'])
+        self.assertTrue(os.path.exists(again['out_fullpath']))
+
+    def test_eviction(self):
+        with mock.patch.object(storage, 'save'):
+            first = picture(self.path, 40, cache=self.cache)
+            size = os.path.getsize(first['out_fullpath'])
+            cache = ResultCache(self.json, max_size=size * 2 + size // 2)
+            second = picture(self.path, 50, cache=cache)
+            # A hit makes the first output the most recently used
+            self.assertTrue(picture(self.path, 40,
+                                    cache=cache)['cache_hit'])
+            third = picture(self.path, 45, cache=cache)
+        self.assertLessEqual(cache.size, cache.max_size)
+        self.assertFalse(os.path.exists(second['out_fullpath']))
+        self.assertTrue(os.path.exists(first['out_fullpath']))
+        self.assertEqual(len(cache), 2)
+        # The record of the evicted output goes with it
+        self.assertNotIn(second['compressed_image_name'], storage.objects)
+        for details in (first, third):
+            self.assertIn(details['compressed_image_name'], storage.objects)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            ResultCache(self.json, max_size=0)
+        with self.assertRaises(TypeError):
+            ResultCache(self.json, max_size=1.5)
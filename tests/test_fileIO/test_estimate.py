@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the module estimate
+"""
+
+import io
+import tempfile
+import unittest
+import numpy as np
+
+from tests import variables as var
+from fileIO.compress import compress_image
+from fileIO.jpeg_writer import write_jpeg
+from fileIO.jpeg_writer import frame_layout
+from fileIO.jpeg_writer import segment_counts
+from fileIO.estimate import symbol_statistics
+from fileIO.estimate import estimate_size
+from fileIO.estimate import estimate_image
+
+
+class TestEstimate(unittest.TestCase):
+    """
+    Tests for the compressed size estimator
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = var.make_jpeg(self.directory.name, (75, 98), 8, 95,
+                                  noise=60)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_symbol_counts(self):
+        for subsampling in ('4:4:4', '4:2:0'):
+            (Y, Cr, Cb), details = compress_image(self.path, 50,
+                                                  subsampling=subsampling)
+            layout = frame_layout(details)
+            expected = segment_counts((Y, Cb, Cr), layout)
+            for plane, factors, counts in zip((Y, Cb, Cr), layout,
+                                              expected):
+                result, _ = symbol_statistics(plane, factors)
+                self.assertTrue(np.array_equal(result, counts))
+
+    def test_estimate_size(self):
+        for optimize in (False, True):
+            image_tuple, details = compress_image(self.path, 60)
+            estimate = estimate_size(image_tuple, details, optimize)
+            jpeg = io.BytesIO()
+            write_jpeg(jpeg, image_tuple, details, optimize)
+            size = len(jpeg.getvalue())
+            self.assertLess(abs(estimate - size), size * 0.01)
+
+    def test_estimate_image(self):
+        image_tuple, details = compress_image(self.path, 40)
+        self.assertEqual(estimate_image(self.path, 40),
+                         estimate_size(image_tuple, details))
+        size = estimate_size(image_tuple, details)
+        sampled = estimate_image(self.path, 40, sample=2)
+        self.assertLess(abs(sampled - size), size * 0.1)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            estimate_image(self.path, 40, sample=0)
+        with self.assertRaises(ValueError):
+            estimate_image(self.path, 99)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the module jpeg_reader
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from PIL import Image
+
+from tests import variables as var
+from codec import Encoder
+from fileIO.jpeg_reader import JpegReader
+from fileIO.jpeg_reader import probe_jpeg
+from fileIO.jpeg_reader import table_array
+from fileIO.jpeg_reader import table_lookup
+from fileIO.jpeg_reader import scan_lookup
+from fileIO.jpeg_writer import write_jpeg
+from fileIO.compress import transcode_image
+from fileIO.compress import source_quality
+from fileIO.compress import picture
+from util_func.quantization import get_quant_table
+from util_func.native import LIBRARY
+
+
+class TestJpegReader(unittest.TestCase):
+    """
+    Tests for the JpegReader class and transcode_image
+    """
+
+    def setUp(self):
+        self.array = var.make_image((45, 70), 11, noise=30)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'in.jpg')
+        self.out = os.path.join(self.directory.name, 'out.jpg')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def compress(self, quality, subsampling):
+        encode = Encoder(self.array, quality, subsampling=subsampling)
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        encode.compression()
+        details = {
+            'width': encode.width,
+            'height': encode.height,
+            'paddedWidth': encode.paddedWidth,
+            'paddedHeight': encode.paddedHeight,
+            'quality': quality,
+            'subsampling': subsampling
+        }
+        return ((encode.Y, encode.Cr, encode.Cb), details)
+
+    def test_read_written_planes(self):
+        for subsampling in ('4:4:4', '4:2:2', '4:2:0'):
+            (Y, Cr, Cb), details = self.compress(60, subsampling)
+            write_jpeg(self.path, (Y, Cr, Cb), details, optimize=True)
+            reader = JpegReader(self.path)
+            self.assertEqual((reader.lines, reader.samples), (45, 70))
+            self.assertEqual(reader.subsampling, subsampling)
+            for plane, expected in zip(reader.planes(), (Y, Cb, Cr)):
+                self.assertTrue(np.array_equal(plane, expected))
+
+    @unittest.skipIf(LIBRARY is None, 'C_library is not built')
+    def test_transcode_same_table(self):
+        table = get_quant_table(75, 'luma').table.reshape(64).tolist()
+        for subsampling in (0, 2):
+            Image.fromarray(self.array).save(
+                self.path, qtables=[table, table], subsampling=subsampling,
+                restart_marker_blocks=5)
+            planes, details = transcode_image(self.path, 75)
+            self.assertEqual((details['width'], details['height']),
+                             (45, 70))
+            write_jpeg(self.out, planes, details)
+            with Image.open(self.path) as src, Image.open(self.out) as out:
+                self.assertTrue(np.array_equal(np.array(src),
+                                               np.array(out)))
+
+    @unittest.skipIf(LIBRARY is None, 'C_library is not built')
+    def test_transcode_lower_quality(self):
+        Image.fromarray(self.array).save(self.path, quality=90)
+        planes, details = transcode_image(self.path, 40)
+        write_jpeg(self.out, planes, details)
+        self.assertLess(os.path.getsize(self.out),
+                        os.path.getsize(self.path))
+        with Image.open(self.out) as out:
+            result = np.array(out).astype(np.float64)
+        self.assertLess(np.abs(result - self.array).mean(), 8)
+
+    def test_transcoded_detail(self):
+        Image.fromarray(self.array).save(self.path, quality=90)
+        details = picture(self.path, 40, 'out.jpg', transcode=True,
+                          commit=False)
+        self.assertEqual(details['transcoded'], LIBRARY is not None)
+        # Without the Huffman decoder the pixel path is faster
+        with mock.patch('fileIO.compress.LIBRARY', None):
+            self.assertIsNone(transcode_image(self.path, 40))
+            details = picture(self.path, 40, 'out.jpg', transcode=True,
+                              commit=False)
+        self.assertFalse(details['transcoded'])
+        self.assertNotIn('transcoded', picture(self.path, 40, 'out.jpg',
+                                               commit=False))
+
+    def test_progressive_not_transcoded(self):
+        Image.fromarray(self.array).save(self.path, progressive=True)
+        reader = JpegReader(self.path)
+        self.assertFalse(reader.sequential)
+        with self.assertRaises(ValueError):
+            reader.coefficients()
+        self.assertIsNone(transcode_image(self.path, 50))
+
+    def test_not_jpeg(self):
+        Image.fromarray(self.array).save(self.path, format='PNG')
+        with self.assertRaises(ValueError):
+            JpegReader(self.path)
+        with self.assertRaises(ValueError):
+            probe_jpeg(self.path)
+        self.assertIsNone(source_quality(self.path))
+        self.assertIsNone(transcode_image(self.path, 50))
+
+    def test_parallel_restart_intervals(self):
+        planes, details = self.compress(50, '4:2:0')
+        write_jpeg(self.path, planes, details)
+        expected = JpegReader(self.path).planes()
+        write_jpeg(self.path, planes, details, restart_rows=1)
+        reader = JpegReader(self.path)
+        self.assertEqual(reader.restart_interval, 5)
+        for workers in (1, 2):
+            for plane, other in zip(reader.planes(workers), expected):
+                self.assertTrue(np.array_equal(plane, other))
+
+    def test_lookup_tables_cached(self):
+        planes, details = self.compress(50, '4:2:0')
+        write_jpeg(self.path, planes, details, restart_rows=1)
+        for cache in (table_array, table_lookup, scan_lookup):
+            cache.cache_clear()
+        JpegReader(self.path).planes()
+        # One DC and one AC table of luma and of chroma
+        self.assertEqual(table_array.cache_info().misses, 4)
+        reused = table_lookup if LIBRARY is None else scan_lookup
+        self.assertGreater(reused.cache_info().hits, 0)
+
+    @unittest.skipIf(LIBRARY is None, 'C_library is not built')
+    def test_native_decoder_same_as_python(self):
+        planes, details = self.compress(50, '4:2:0')
+        for restart_rows in (0, 1):
+            write_jpeg(self.path, planes, details, optimize=True,
+                       restart_rows=restart_rows)
+            reader = JpegReader(self.path)
+            expected = reader.coefficients()
+            with mock.patch('fileIO.jpeg_reader.LIBRARY', None):
+                result = reader.coefficients()
+            for a, b in zip(expected, result):
+                self.assertTrue(np.array_equal(a, b))
+
+    def test_corrupt_data(self):
+        planes, details = self.compress(50, '4:4:4')
+        write_jpeg(self.path, planes, details)
+        with open(self.path, 'rb') as jpeg:
+            data = jpeg.read()
+        # Drop the second half of the scan
+        with open(self.path, 'wb') as jpeg:
+            jpeg.write(data[0:len(data) // 2] + b'\xff\xd9')
+        for library in (LIBRARY, None):
+            with mock.patch('fileIO.jpeg_reader.LIBRARY', library):
+                with self.assertRaises(ValueError):
+                    JpegReader(self.path).coefficients()
+
+
+class TestPassthrough(unittest.TestCase):
+    """
+    Tests for probe_jpeg and the passthrough of picture
+    """
+
+    def setUp(self):
+        self.array = var.make_image((40, 56), 12)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'in.jpg')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_probe_jpeg(self):
+        Image.fromarray(self.array).save(self.path, quality=35,
+                                         progressive=True)
+        quant_tables, components = probe_jpeg(self.path)
+        reader = JpegReader(self.path)
+        self.assertEqual(components, reader.components)
+        for ident, table in reader.quant_tables.items():
+            self.assertTrue(np.array_equal(quant_tables[ident], table))
+        self.assertEqual(source_quality(self.path), 35)
+
+    def test_copy_lower_quality(self):
+        Image.fromarray(self.array).save(self.path, quality=40)
+        details = picture(self.path, 60, 'out.jpg', commit=False,
+                          passthrough=True)
+        self.assertTrue(details['passthrough'])
+        self.assertEqual(details['source_quality'], 40)
+        self.assertEqual(details['quality'], 40)
+        with open(self.path, 'rb') as source, \
+                open(details['out_fullpath'], 'rb') as output:
+            self.assertEqual(source.read(), output.read())
+
+    def test_compress_higher_quality(self):
+        Image.fromarray(self.array).save(self.path, quality=90)
+        details = picture(self.path, 60, 'out.jpg', commit=False,
+                          passthrough=True)
+        self.assertFalse(details['passthrough'])
+        self.assertEqual(details['source_quality'], 90)
+        self.assertEqual(details['quality'], 60)
+        self.assertEqual(source_quality(details['out_fullpath']), 60)
+        plain = picture(self.path, 60, 'plain.jpg', commit=False)
+        self.assertNotIn('passthrough', plain)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the module jpeg_writer
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from PIL import Image
+
+from tests import variables as var
+from codec import Encoder
+from codec import Decoder
+from fileIO.jpeg_writer import write_jpeg
+from fileIO.jpeg_writer import write_jpeg_stream
+from util_func.quantization import get_quant_table
+
+
+class TestWriteJpeg(unittest.TestCase):
+    """
+    Tests for the write_jpeg function
+    """
+
+    def setUp(self):
+        self.array = var.make_image((45, 70), 5, noise=30)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'out.jpg')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def compress(self, quality, subsampling):
+        encode = Encoder(self.array, quality, subsampling=subsampling)
+        encode.RGB2YCrCb()
+        encode.sampling()
+        encode.padding()
+        encode.compression()
+        details = {
+            'width': encode.width,
+            'height': encode.height,
+            'paddedWidth': encode.paddedWidth,
+            'paddedHeight': encode.paddedHeight,
+            'quality': quality,
+            'subsampling': subsampling
+        }
+        return ((encode.Y, encode.Cr, encode.Cb), details)
+
+    def test_pillow_reads_same_image(self):
+        for subsampling in ('4:4:4', '4:2:2', '4:2:0'):
+            planes, details = self.compress(60, subsampling)
+            write_jpeg(self.path, planes, details)
+            with Image.open(self.path) as img:
+                self.assertEqual(img.format, 'JPEG')
+                result = np.array(img).astype(np.float64)
+            decode = Decoder(*planes, details['width'], details['height'],
+                             details['paddedWidth'],
+                             details['paddedHeight'], 60,
+                             subsampling=subsampling)
+            decode.decompression()
+            decode.reverse_padding()
+            decode.reverse_sampling()
+            decode.YCrCb2RGB()
+            self.assertEqual(result.shape, self.array.shape)
+            self.assertLess(np.abs(result - decode.array).mean(), 3)
+
+    def test_quantization_table_written(self):
+        planes, details = self.compress(80, '4:4:4')
+        write_jpeg(self.path, planes, details)
+        with Image.open(self.path) as img:
+            table = img.quantization[0]
+        expected = get_quant_table(80, 'luma').table.reshape(64)
+        self.assertEqual(list(table), list(expected))
+
+    def test_optimize_smaller_same_pixels(self):
+        planes, details = self.compress(75, '4:2:0')
+        write_jpeg(self.path, planes, details)
+        size = os.path.getsize(self.path)
+        with Image.open(self.path) as img:
+            expected = np.array(img)
+        write_jpeg(self.path, planes, details, optimize=True)
+        self.assertLess(os.path.getsize(self.path), size)
+        with Image.open(self.path) as img:
+            self.assertTrue(np.array_equal(np.array(img), expected))
+
+    def test_progressive_same_pixels(self):
+        for subsampling in ('4:4:4', '4:2:0'):
+            planes, details = self.compress(70, subsampling)
+            write_jpeg(self.path, planes, details)
+            with Image.open(self.path) as img:
+                expected = np.array(img)
+            for scans in ('default', 'spectral', 'dc'):
+                offset = write_jpeg(self.path, planes, details,
+                                    mode='progressive', scans=scans)
+                self.assertLess(offset, os.path.getsize(self.path))
+                with Image.open(self.path) as img:
+                    self.assertTrue(img.info.get('progressive'))
+                    self.assertTrue(np.array_equal(np.array(img), expected))
+
+    def test_wrong_mode(self):
+        planes, details = self.compress(70, '4:4:4')
+        with self.assertRaises(ValueError):
+            write_jpeg(self.path, planes, details, mode='lossless')
+
+    def test_restart_segments_same_pixels(self):
+        planes, details = self.compress(75, '4:2:0')
+        write_jpeg(self.path, planes, details)
+        with Image.open(self.path) as img:
+            expected = np.array(img)
+        for optimize in (False, True):
+            for workers in (1, 2):
+                write_jpeg(self.path, planes, details, optimize,
+                           restart_rows=1, workers=workers)
+                with open(self.path, 'rb') as jpeg:
+                    data = jpeg.read()
+                self.assertIn(b'\xff\xdd\x00\x04\x00\x05', data)
+                self.assertIn(b'\xff\xd1', data)
+                with Image.open(self.path) as img:
+                    self.assertTrue(np.array_equal(np.array(img), expected))
+
+    def test_restart_progressive(self):
+        planes, details = self.compress(70, '4:4:4')
+        with self.assertRaises(ValueError):
+            write_jpeg(self.path, planes, details, mode='progressive',
+                       restart_rows=2)
+
+    def test_stream_same_pixels(self):
+        planes, details = self.compress(75, '4:2:0')
+        write_jpeg(self.path, planes, details, restart_rows=2)
+        with Image.open(self.path) as img:
+            expected = np.array(img)
+        Y, Cr, Cb = planes
+        strips = [(Y[i:i + 16], Cr[i // 2:i // 2 + 8], Cb[i // 2:i // 2 + 8])
+                  for i in range(0, Y.shape[0], 16)]
+        offset = write_jpeg_stream(self.path, strips, details, 2)
+        self.assertEqual(offset + 2, os.path.getsize(self.path))
+        with Image.open(self.path) as img:
+            self.assertTrue(np.array_equal(np.array(img), expected))
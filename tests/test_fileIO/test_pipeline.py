@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the module pipeline
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tests import variables as var
+from fileIO import storage
+from fileIO.pipeline import run_pipeline
+from fileIO.compress import picture
+from util_func.helpers import picture_resolution
+
+
+class TestPipeline(unittest.TestCase):
+    """
+    Tests for the run_pipeline function
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = [var.make_jpeg(self.directory.name, (40 + seed, 56),
+                                    seed, name=f'in{seed}.jpg')
+                      for seed in range(3)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_same_files_as_picture(self):
+        jobs = [[path, 40, {'dtype': 'int16'}] for path in self.paths]
+        jobs[1][2]['mode'] = 'progressive'
+        results = run_pipeline(jobs, workers=2, queue_size=1, commit=False)
+        for job, (details, error) in zip(jobs, results):
+            self.assertIsNone(error)
+            out = details['out_fullpath']
+            self.assertEqual(details['out_resolution'],
+                             picture_resolution(out))
+            self.assertEqual(details['in_resolution'],
+                             picture_resolution(job[0]))
+            expected = picture(job[0], 40, commit=False, **job[2])
+            with open(out, 'rb') as a, \
+                    open(expected['out_fullpath'], 'rb') as b:
+                self.assertEqual(a.read(), b.read())
+
+    def test_failed_jobs(self):
+        jobs = [[self.paths[0], 40, {}],
+                [os.path.join(self.directory.name, 'none.jpg'), 40, {}],
+                [self.paths[1], 40, {'quality': 3}],
+                [self.paths[2], 97, {'output_image_name': 'out.png'}]]
+        results = run_pipeline(jobs, workers=1, commit=False)
+        self.assertIsNone(results[0][1])
+        self.assertIsNone(results[1][0])
+        self.assertEqual(results[2][1], 'Unknown option quality')
+        self.assertTrue(results[3][0]['out_fullpath'].endswith('out.png'))
+
+    def test_picture_only_options(self):
+        for option in ('transcode', 'target_size', 'passthrough', 'cache'):
+            results = run_pipeline([[self.paths[0], 40, {option: True}]],
+                                   workers=1, commit=False)
+            self.assertEqual(results[0], (None, f'Unknown option {option}'))
+
+    def test_single_commit(self):
+        objects = dict(storage.objects)
+        jobs = [[path, 40, {}] for path in self.paths]
+        with mock.patch.object(storage, 'save') as save:
+            results = run_pipeline(jobs, workers=1)
+        save.assert_called_once_with()
+        for details, _ in results:
+            self.assertIn(details['compressed_image_name'], storage.objects)
+            storage.discard(details['compressed_image_name'])
+        self.assertEqual(storage.objects, objects)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the module rate
+"""
+
+import os
+import tempfile
+import unittest
+
+from tests import variables as var
+from fileIO.compress import picture
+from fileIO.rate import RateControl
+from fileIO.image_io import get_image_array
+
+
+class TestRateControl(unittest.TestCase):
+    """
+    Tests for the rate control of picture
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = var.make_jpeg(self.directory.name, (61, 83), 6, 95,
+                                  noise=40)
+        self.rate = RateControl(get_image_array(self.path))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_encode_same_as_picture(self):
+        details = picture(self.path, 60, 'out.jpg', commit=False)
+        with open(details['out_fullpath'], 'rb') as jpeg:
+            self.assertEqual(self.rate.encode(60)[0], jpeg.read())
+
+    def test_target_size(self):
+        target = len(self.rate.encode(50)[0]) + 100
+        details = picture(self.path, 90, 'out.jpg', commit=False,
+                          target_size=target)
+        quality = details['quality']
+        report = details['rate_control']
+        self.assertTrue(report['met'])
+        self.assertGreaterEqual(quality, 50)
+        self.assertLessEqual(os.path.getsize(details['out_fullpath']),
+                             target)
+        self.assertEqual(report['size'],
+                         os.path.getsize(details['out_fullpath']))
+        self.assertGreater(len(self.rate.encode(quality + 1)[0]), target)
+        self.assertLessEqual(report['trials'], 8)
+
+    def test_target_size_not_met(self):
+        quality, report = self.rate.search(target_size=10)
+        self.assertEqual(quality, 5)
+        self.assertFalse(report['met'])
+
+    def test_target_psnr(self):
+        quality, report = self.rate.search(target_psnr=35, max_quality=90)
+        self.assertTrue(report['met'])
+        self.assertGreaterEqual(self.rate.psnr(quality), 35)
+        self.assertLess(self.rate.psnr(quality - 1), 35)
+
+    def test_one_target(self):
+        with self.assertRaises(ValueError):
+            self.rate.search()
+        with self.assertRaises(ValueError):
+            self.rate.search(target_size=1000, target_psnr=30)
+        with self.assertRaises(ValueError):
+            picture(self.path, 50, 'out.png', commit=False,
+                    target_size=1000)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the module sweep
+"""
+
+import tempfile
+import unittest
+
+from tests import variables as var
+from fileIO import storage
+from fileIO.compress import picture
+from fileIO.sweep import picture_sweep
+
+
+class TestPictureSweep(unittest.TestCase):
+    """
+    Tests for the picture_sweep function
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = var.make_jpeg(self.directory.name, (45, 70), 7)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_same_as_picture(self):
+        objects = dict(storage.objects)
+        qualities = [30, 50, 85]
+        results = picture_sweep(self.path, qualities, commit=False,
+                                mode='progressive')
+        self.assertEqual(storage.objects, objects)
+        self.assertEqual([d['quality'] for d in results], qualities)
+        for details in results:
+            expected = picture(self.path, details['quality'], 'out.jpg',
+                               commit=False, mode='progressive')
+            with open(details['out_fullpath'], 'rb') as jpeg:
+                data = jpeg.read()
+            with open(expected['out_fullpath'], 'rb') as jpeg:
+                self.assertEqual(data, jpeg.read())
+            self.assertEqual(details['out_resolution'],
+                             expected['out_resolution'])
+
+    def test_output_names(self):
+        results = picture_sweep(self.path, [40, 60], ['a.jpg', 'b.jpg'],
+                                commit=False)
+        self.assertEqual([d['compressed_image_name'] for d in results],
+                         ['a.jpg', 'b.jpg'])
+
+    def test_track_memory(self):
+        details = picture(self.path, 50, 'out.jpg', commit=False)
+        self.assertIsNone(details['peak_memory'])
+        details = picture(self.path, 50, 'out.jpg', commit=False,
+                          track_memory=True)
+        self.assertIsInstance(details['peak_memory'], str)
+        results = picture_sweep(self.path, [40, 60], commit=False)
+        self.assertIsNone(results[0]['peak_memory'])
+        results = picture_sweep(self.path, [40, 60], commit=False,
+                                track_memory=True)
+        self.assertEqual(results[0]['peak_memory'],
+                         results[1]['peak_memory'])
+        self.assertIsInstance(results[0]['peak_memory'], str)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            picture_sweep(self.path, [], commit=False)
+        with self.assertRaises(ValueError):
+            picture_sweep(self.path, [50, 99], commit=False)
+        with self.assertRaises(TypeError):
+            picture_sweep(self.path, ['50'], commit=False)
+        with self.assertRaises(ValueError):
+            picture_sweep(self.path, [50], ['a.png'], commit=False)
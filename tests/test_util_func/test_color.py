@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+"""
+Tests cases for the color module
+"""
+
+import numpy as np
+import unittest
+
+from util_func.color import rgb_to_ycrcb
+from util_func.color import ycrcb_to_rgb
+from util_func.sampling import upsample
+
+
+class TestColor(unittest.TestCase):
+    """
+    A unittest class that tests the fixed point color conversions
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.rgb = rng.integers(0, 256, (19, 23, 3), dtype=np.uint8)
+        self.rgb[0, 0:8] = [[0, 0, 0], [255, 255, 255], [255, 0, 0],
+                            [0, 255, 0], [0, 0, 255], [255, 255, 0],
+                            [0, 255, 255], [255, 0, 255]]
+
+    def convert(self, dtype=np.float32):
+        planes = [np.full((19, 23), 1000, dtype=dtype) for _ in range(3)]
+        rgb_to_ycrcb(self.rgb, planes)
+        return (planes)
+
+    def test_rgb_to_ycrcb_close_to_float(self):
+        R, G, B = (self.rgb[:, :, c].astype(np.float64) for c in range(3))
+        expected = (R * 0.299 + G * 0.587 + B * 0.114 - 128,
+                    R * 0.5 + G * -0.4187 + B * -0.0813,
+                    R * -0.1687 + G * -0.3317 + B * 0.5)
+        for plane, exact in zip(self.convert(), expected):
+            self.assertLessEqual(np.abs(plane - exact).max(), 0.51)
+
+    def test_rgb_to_ycrcb_range(self):
+        for plane in self.convert(np.int16):
+            self.assertGreaterEqual(plane.min(), -128)
+            self.assertLessEqual(plane.max(), 127)
+
+    def test_ycrcb_to_rgb_close_to_float(self):
+        Y, Cr, Cb = self.convert()
+        out = np.empty_like(self.rgb)
+        ycrcb_to_rgb(Y, Cr, Cb, out)
+        expected = np.stack((Y + 1.403 * Cr,
+                             Y - 0.344 * Cb - 0.7141 * Cr,
+                             Y + 1.773 * Cb), axis=-1) + 128
+        expected = np.clip(expected, 0, 255)
+        self.assertLessEqual(np.abs(out - expected).max(), 0.51)
+        self.assertLessEqual(np.abs(out.astype(int) - self.rgb).max(), 2)
+
+    def test_ycrcb_to_rgb_upsamples(self):
+        Y, _, _ = self.convert()
+        rng = np.random.default_rng(5)
+        Cr, Cb = rng.uniform(-140, 140, (2, 10, 12)).astype(np.float32)
+        out = np.empty_like(self.rgb)
+        ycrcb_to_rgb(Y, Cr, Cb, out, (2, 2))
+        expected = np.empty_like(self.rgb)
+        ycrcb_to_rgb(Y, upsample(Cr, (2, 2), 19, 23),
+                     upsample(Cb, (2, 2), 19, 23), expected)
+        self.assertTrue(np.array_equal(out, expected))
@@ -5,6 +5,11 @@ Tests cases for quantization module
 """
 
 from util_func import get_quantRatio
+from util_func.quantization import QuantTable
+from util_func.quantization import get_quant_table
+from util_func.quantization import load_quant_tables
+from util_func.quantization import requantize_blocks
+from util_func.quantization import estimate_quality
 import numpy as np
 import unittest
 
@@ -115,3 +120,115 @@ class TestGetQuantRatio(unittest.TestCase):
             get_quantRatio(50, mode='Chromium')
         text = 'mode must be "all, luma or chroma"'
         self.assertEqual(str(er.exception), text)
+
+
+class TestGetQuantTable(unittest.TestCase):
+    """
+    A unittest class that tests the cached QuantTable objects
+    """
+
+    def test_get_quant_table_cached(self):
+        q1 = get_quant_table(50, 'luma')
+        q2 = get_quant_table(50, 'luma')
+        self.assertIs(q1, q2)
+        self.assertIsInstance(q1, QuantTable)
+
+    def test_get_quant_table_values(self):
+        self.assertTrue(np.all(get_quant_table(10, 'luma').table == luma10))
+        self.assertTrue(np.all(
+            get_quant_table(50, 'chroma').table == chroma50))
+
+    def test_get_quant_table_reciprocal(self):
+        q1 = get_quant_table(50, 'luma')
+        self.assertTrue(np.allclose(q1.reciprocal * luma50, 1))
+
+    def test_get_quant_table_read_only(self):
+        with self.assertRaises(ValueError):
+            get_quant_table(50, 'luma').table[0, 0] = 1
+        for backend in ('matrix', 'aan'):
+            table = get_quant_table(50, 'luma', backend=backend)
+            with self.assertRaises(ValueError):
+                table.multiplier[0, 0] = 1
+
+    def test_quantize_round_trip(self):
+        q1 = get_quant_table(50, 'luma')
+        blocks = np.full((2, 3, 8, 8), 3.0) * luma50
+        self.assertTrue(np.all(q1.quantize(blocks) == 3))
+        self.assertTrue(np.all(q1.de_quantize(q1.quantize(blocks)) == blocks))
+
+    def test_load_quant_tables(self):
+        flat = np.full((8, 8), 10)
+        load_quant_tables('flat', flat, flat * 2)
+        self.assertTrue(np.all(
+            get_quant_table(50, 'luma', 'flat').table == 10))
+        self.assertTrue(np.all(
+            get_quant_table(25, 'chroma', 'flat').table == 40))
+
+    def test_load_quant_tables_valueError(self):
+        with self.assertRaises(ValueError) as er:
+            load_quant_tables('bad', np.zeros((8, 8)), luma50)
+        text = 'Quantization table values must be between 1 and 255'
+        self.assertEqual(str(er.exception), text)
+
+    def test_get_quant_table_unknown_set(self):
+        with self.assertRaises(ValueError) as er:
+            get_quant_table(50, 'luma', 'unknown')
+        text = 'No quantization table set named unknown'
+        self.assertEqual(str(er.exception), text)
+
+    def test_integer_quantize(self):
+        q1 = get_quant_table(50, 'luma', 'standard', 'islow')
+        self.assertTrue(q1.integer)
+        rng = np.random.default_rng(4)
+        blocks = rng.integers(-40000, 40000, (50, 8, 8)).astype(np.int32)
+        divisor = luma50 * 8
+        expected = np.sign(blocks) * np.floor(np.abs(blocks) / divisor + 0.5)
+        result = q1.quantize(blocks)
+        self.assertEqual(result.dtype, np.int32)
+        self.assertTrue(np.all(result == expected))
+
+    def test_integer_de_quantize(self):
+        q1 = get_quant_table(50, 'luma', 'standard', 'islow')
+        blocks = np.ones((2, 8, 8), dtype=np.int16)
+        result = q1.de_quantize(blocks)
+        self.assertEqual(result.dtype, np.int32)
+        self.assertTrue(np.all(result == luma50))
+
+
+class TestRequantizeBlocks(unittest.TestCase):
+    """
+    Tests for requantize_blocks
+    """
+
+    def test_requantize(self):
+        source = get_quant_table(90, 'luma').table
+        target = get_quant_table(50, 'luma').table
+        rng = np.random.default_rng(3)
+        dct = rng.normal(0, 200, (4, 8, 8))
+        blocks = np.round(dct / source)
+        result = requantize_blocks(blocks, source, target)
+        self.assertTrue(np.array_equal(result,
+                                       np.round(blocks * source / target)))
+        same = requantize_blocks(blocks, source, source)
+        self.assertTrue(np.array_equal(same, blocks))
+
+    def test_table_shape(self):
+        with self.assertRaises(TypeError):
+            requantize_blocks(np.zeros((2, 8, 8)), np.ones((4, 4)),
+                              np.ones((8, 8)))
+
+
+class TestEstimateQuality(unittest.TestCase):
+    """
+    Tests for estimate_quality
+    """
+
+    def test_estimate_quality(self):
+        for quality in range(5, 96, 5):
+            table = get_quant_table(quality, 'luma').table
+            self.assertEqual(estimate_quality(table), quality)
+        self.assertEqual(estimate_quality(np.ones((8, 8))), 100)
+
+    def test_table_shape(self):
+        with self.assertRaises(TypeError):
+            estimate_quality(np.ones((4, 4)))
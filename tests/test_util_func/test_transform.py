@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+"""
+Tests cases for the transform module
+"""
+
+from math import cos, pi, sqrt
+import numpy as np
+import unittest
+from unittest import mock
+
+from util_func.transform import FDCT_blocks
+from util_func.transform import IDCT_blocks
+from util_func.transform import get_backend
+from util_func.transform import scipy_fft
+from util_func.transform import ScipyBackend
+from util_func.transform import DEFAULT_BACKEND
+from util_func.quantization import get_quant_table
+from util_func.blocks import get_blocks
+from util_func.blocks import put_blocks
+from util_func.native import load_library
+
+
+# Exact orthonormal 8 point DCT matrix
+dct_matrix = np.array([[sqrt(1 / 8) if i == 0 else
+                        sqrt(2 / 8) * cos((2 * j + 1) * i * pi / 16)
+                        for j in range(8)] for i in range(8)])
+
+
+class TestBackends(unittest.TestCase):
+    """
+    A unittest class that tests the transform backends
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.blocks = rng.uniform(-128, 127, (3, 5, 8, 8))
+        self.dct = dct_matrix @ self.blocks @ dct_matrix.T
+
+    def test_matrix_backend(self):
+        result = get_backend('matrix').forward(self.blocks)
+        self.assertTrue(np.array_equal(result, FDCT_blocks(self.blocks)))
+
+    def test_aan_forward(self):
+        aan = get_backend('aan')
+        result = aan.forward(self.blocks) / aan.forward_scale
+        self.assertTrue(np.allclose(result, self.dct, atol=1e-4))
+
+    def test_aan_inverse(self):
+        aan = get_backend('aan')
+        result = aan.inverse(self.dct * aan.inverse_scale)
+        self.assertTrue(np.allclose(result, self.blocks, atol=1e-4))
+        self.assertEqual(result.shape, self.blocks.shape)
+
+    def test_aan_quantization_folded(self):
+        aan = get_backend('aan')
+        table = get_quant_table(50, 'luma', 'standard', 'aan')
+        plain = get_quant_table(50, 'luma')
+        quant = table.quantize(aan.forward(self.blocks))
+        expected = plain.quantize(self.dct)
+        self.assertLessEqual(np.abs(quant - expected).max(), 1)
+        self.assertGreater(np.mean(quant == expected), 0.99)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError) as er:
+            get_backend('fft')
+        self.assertEqual(str(er.exception), 'No transform backend named fft')
+
+    def test_default_backend(self):
+        self.assertEqual(DEFAULT_BACKEND, 'matrix')
+        self.assertIs(get_backend(), get_backend('matrix'))
+
+    @unittest.skipIf(scipy_fft is None, 'SciPy is not installed')
+    def test_scipy_forward_inverse(self):
+        scipy = get_backend('scipy')
+        self.assertTrue(np.allclose(scipy.forward(self.blocks), self.dct))
+        self.assertTrue(np.allclose(scipy.inverse(self.dct), self.blocks))
+        self.assertIsNone(scipy.forward_scale)
+
+    def test_scipy_one_thread(self):
+        fake = mock.Mock()
+        fake.dctn.return_value = self.dct
+        fake.idctn.return_value = self.blocks
+        with mock.patch('util_func.transform.scipy_fft', fake):
+            scipy = ScipyBackend()
+            self.assertIs(scipy.forward(self.blocks), self.dct)
+            self.assertIs(scipy.inverse(self.dct), self.blocks)
+        for call in (fake.dctn, fake.idctn):
+            self.assertEqual(call.call_args.kwargs['workers'], 1)
+            self.assertEqual(call.call_args.kwargs['norm'], 'ortho')
+
+    def test_islow_forward(self):
+        islow = get_backend('islow')
+        blocks = np.rint(self.blocks).astype(np.int32)
+        result = islow.forward(blocks)
+        self.assertEqual(result.dtype, np.int32)
+        dct = dct_matrix @ blocks @ dct_matrix.T
+        self.assertLess(np.abs(result / 8 - dct).max(), 0.5)
+
+    def test_islow_inverse(self):
+        islow = get_backend('islow')
+        blocks = np.rint(self.blocks).astype(np.int32)
+        dct = np.rint(dct_matrix @ blocks @ dct_matrix.T).astype(np.int32)
+        result = islow.inverse(dct)
+        self.assertEqual(result.dtype, np.int32)
+        self.assertLessEqual(np.abs(result - blocks).max(), 1)
+
+    def test_islow_deterministic(self):
+        islow = get_backend('islow')
+        blocks = np.rint(self.blocks).astype(np.int32)
+        self.assertTrue(np.array_equal(islow.forward(blocks),
+                                       islow.forward(blocks.astype(float))))
+
+
+class TestNativeBackend(unittest.TestCase):
+    """
+    A unittest class that tests the backend of the C kernels
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.native = get_backend('native')
+        self.blocks = rng.uniform(-128, 127, (3, 5, 8, 8))
+        self.plane = np.rint(rng.uniform(-128, 127, (24, 40)))
+
+    def test_forward_inverse(self):
+        result = self.native.forward(self.blocks)
+        self.assertEqual(result.shape, self.blocks.shape)
+        self.assertTrue(np.allclose(result, FDCT_blocks(self.blocks)))
+        self.assertTrue(np.allclose(self.native.inverse(self.blocks),
+                                    IDCT_blocks(self.blocks)))
+
+    def test_missing_library(self):
+        self.assertIsNone(load_library('./no_such_library.so'))
+
+    def test_kernel_failure(self):
+        library = mock.Mock()
+        library.compress_plane.return_value = -1
+        library.decompress_plane.return_value = -1
+        table = get_quant_table(50, 'luma', 'standard', 'native')
+        with mock.patch('util_func.transform.LIBRARY', library):
+            with self.assertRaises(RuntimeError):
+                self.native.compress_plane(self.plane.copy(), table)
+            with self.assertRaises(RuntimeError):
+                self.native.decompress_plane(self.plane.copy(), table)
+
+    @unittest.skipUnless(get_backend('native').available,
+                         'C_library/liball.so has no transform kernels')
+    def test_compress_plane(self):
+        table = get_quant_table(50, 'luma', 'standard', 'native')
+        for dtype in (np.float64, np.float32, np.int16, np.int64):
+            plane = self.plane.astype(dtype)
+            expected = plane.copy()
+            blocks = get_blocks(expected, 8, np.float64)
+            put_blocks(expected, table.quantize(FDCT_blocks(blocks)))
+            self.assertTrue(self.native.compress_plane(plane, table))
+            self.assertTrue(np.array_equal(plane, expected))
+
+    @unittest.skipUnless(get_backend('native').available,
+                         'C_library/liball.so has no transform kernels')
+    def test_decompress_plane(self):
+        table = get_quant_table(50, 'luma', 'standard', 'native')
+        quant = np.rint(self.plane / 16)
+        for dtype in (np.float64, np.int16):
+            plane = quant.astype(dtype)
+            blocks = get_blocks(plane, 8, np.float64)
+            idct = IDCT_blocks(table.de_quantize(blocks))
+            self.assertTrue(self.native.decompress_plane(plane, table,
+                                                         True))
+            if dtype == np.int16:
+                idct = np.rint(idct)
+            self.assertTrue(np.allclose(get_blocks(plane, 8), idct))
+
+    def test_unsupported_plane(self):
+        table = get_quant_table(50, 'luma', 'standard', 'native')
+        plane = self.plane.astype(np.uint8)
+        self.assertFalse(self.native.compress_plane(plane, table))
+        self.assertFalse(self.native.compress_plane(self.plane[:, 4:36],
+                                                    table))
+        self.assertFalse(get_backend('matrix').compress_plane(self.plane,
+                                                              table))
+
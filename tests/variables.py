@@ -5,7 +5,9 @@ A module that contains variables and functions needed for
 tests
 """
 
+import os
 import numpy as np
+from PIL import Image
 from pathlib import Path
 
 png_image = './jpeg_images/screenshot1.png'
@@ -51,3 +53,57 @@ def is_file_path(filename):
         return True
     else:
         return False
+
+
+def make_image(shape, seed, noise=None):
+    """
+    Function that makes a seeded RGB test image
+
+    Parameters
+    ----------
+    shape: tuple
+        (rows, cols) of the image
+    seed: int
+        the seed of the random generator
+    noise: int or None
+        None for uniform random samples. Otherwise the image is a
+        gradient with random noise in [0, noise) added to it
+
+    Returns
+    -------
+    ndarray:
+        3D uint8 RGB array
+    """
+    rng = np.random.default_rng(seed)
+    if noise is None:
+        return (rng.integers(0, 256, (*shape, 3), dtype=np.uint8))
+    rows, cols = np.mgrid[0:shape[0], 0:shape[1]]
+    gradient = np.stack((rows * 4, cols * 3, rows + cols), axis=-1)
+    noise = rng.integers(0, noise, (*shape, 3))
+    return (np.clip(gradient + noise, 0, 255).astype(np.uint8))
+
+
+def make_jpeg(directory, shape, seed, quality=75, name='in.jpg',
+              noise=None):
+    """
+    Function that saves a seeded test image (see make_image) as a
+    JPEG file with pillow
+
+    Parameters
+    ----------
+    directory: str
+        the directory of the file (a temporary directory of a test)
+    quality: int
+        the pillow quality of the file
+    name: str
+        the name of the file
+
+    Returns
+    -------
+    str:
+        the pathname of the file
+    """
+    path = os.path.join(directory, name)
+    Image.fromarray(make_image(shape, seed, noise)).save(path,
+                                                         quality=quality)
+    return (path)
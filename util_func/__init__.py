@@ -0,0 +1,5 @@
+from util_func.padding import pad_array
+from util_func.quantization import get_quantRatio
+from util_func.helpers import get_dimension
+from util_func.helpers import picture_resolution
+from util_func.helpers import get_image_size
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+"""
+A module that splits 2D image planes into 8X8 blocks so that the
+DCT transform and quantization can be applied to every block of a
+plane at once instead of looping through the blocks one at a time
+
+Formula
+-------
+    # plane - 2D array with dimensions (rows * 8, cols * 8)
+    # blocks - 4D array with dimensions (rows, cols, 8, 8)
+    $ blocks[r][c] = plane[r*8:(r+1)*8, c*8:(c+1)*8]
+
+Note
+----
+The block view shares memory with the plane, so writing into the
+view writes directly into the plane
+"""
+
+# Python module
+import numpy as np
+
+
+def block_view(plane, bits=8):
+    """
+    A function that returns a (rows, cols, bits, bits) view of a
+    2D plane without copying the plane
+
+    Parameters
+    ----------
+    plane : ndarray
+        C-contiguous 2D numpy array whose dimensions are multiples
+        of bits
+    bits : int
+        The number of rows and columns in each block
+
+    Returns
+    -------
+    ndarray:
+        4D view of the plane where view[r][c] is the block in the
+        r-th block row and c-th block column
+    """
+
+    if not isinstance(plane, np.ndarray):
+        raise TypeError('Array must be a numpy array')
+    if plane.ndim != 2:
+        raise TypeError('Array must be a 2D array')
+    if not plane.flags.c_contiguous:
+        raise ValueError('Array must be C-contiguous')
+
+    width, height = plane.shape
+    if (width % bits) or (height % bits):
+        raise ValueError(f'Array dimensions must be multiples of {bits}')
+
+    rows = width // bits
+    cols = height // bits
+    return (plane.reshape(rows, bits, cols, bits).swapaxes(1, 2))
+
+
+def get_blocks(plane, bits=8, dtype=np.float64):
+    """
+    A function that copies the blocks of a plane into a contiguous
+    (rows, cols, bits, bits) array
+
+    Parameters
+    ----------
+    plane : ndarray
+        C-contiguous 2D numpy array whose dimensions are multiples
+        of bits
+    bits : int
+        The number of rows and columns in each block
+    dtype : numpy dtype
+        The data type of the returned blocks
+
+    Returns
+    -------
+    ndarray:
+        contiguous 4D array of the blocks of the plane
+    """
+
+    return (np.ascontiguousarray(block_view(plane, bits), dtype=dtype))
+
+
+def put_blocks(plane, blocks, bits=8) -> None:
+    """
+    A function that writes (rows, cols, bits, bits) blocks back into
+    their positions in a plane
+
+    Parameters
+    ----------
+    plane : ndarray
+        C-contiguous 2D numpy array that receives the blocks
+    blocks : ndarray
+        4D array of blocks with the same block layout as the plane
+    bits : int
+        The number of rows and columns in each block
+    """
+
+    view = block_view(plane, bits)
+    if view.shape != blocks.shape:
+        raise ValueError('Blocks do not match the plane dimensions')
+    view[...] = blocks
+
+
+def iter_bands(plane, bits=8, max_blocks=1024):
+    """
+    A generator that splits a plane into horizontal bands of whole
+    block rows so that each band can be transformed on its own
+
+    Parameters
+    ----------
+    plane : ndarray
+        C-contiguous 2D numpy array whose dimensions are multiples
+        of bits
+    bits : int
+        The number of rows and columns in each block
+    max_blocks : int
+        The maximum number of blocks in one band
+
+    Yields
+    ------
+    ndarray:
+        C-contiguous view of plane[start:end] for every band
+    """
+    cols = max(plane.shape[1] // bits, 1)
+    rows = max(max_blocks // cols, 1) * bits
+    for start in range(0, plane.shape[0], rows):
+        yield (plane[start:start + rows])
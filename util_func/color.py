@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+A module that converts rows of RGB pixels to level shifted Y, Cr, Cb
+samples and back with the fixed point arithmetic of libjpeg
+
+Every weight is scaled by 2 ** SCALEBITS and rounded to an integer,
+so a conversion is a sum of integer products and one shift. The
+results are integers in the range -128 to 127 (RGB to YCrCb) or 0 to
+255 (YCrCb to RGB) and need no separate clipping or level shift
+
+Variables
+---------
+COLOR_ROWS : int
+    The number of image rows converted together. The int32
+    temporaries of a few rows stay in the CPU cache, which makes
+    small chunks faster than large ones
+
+Formula
+-------
+    # fix(w) = round(w * 2 ** SCALEBITS)
+    $ Y - 128 = (fix(0.299) * R + fix(0.587) * G + fix(0.114) * B
+    $            + ONE_HALF - 128 * 2 ** SCALEBITS) >> SCALEBITS
+    $ R = Y + (fix(1.403) * (Cr - 128) + ONE_HALF) >> SCALEBITS
+
+Note
+----
+libjpeg keeps one 256 entry table per weight (table[x] = fix(w) * x).
+The numpy versions multiply by fix(w) instead, which gives the same
+integers and is faster than gathering from the tables
+"""
+
+# Python modules
+import numpy as np
+
+# Modules (functions) from util_func package
+from util_func.sampling import upsample
+
+COLOR_ROWS = 64
+SCALEBITS = 16
+ONE_HALF = 1 << (SCALEBITS - 1)
+
+
+def fix(weight) -> int:
+    """
+    A function that returns a weight as a SCALEBITS fixed point integer
+    """
+    return (int(round(weight * (1 << SCALEBITS))))
+
+
+# The fixed point (R, G, B) weights and the rounding term of the level
+# shifted Y, Cr and Cb samples. ONE_HALF - 1 keeps Cr and Cb below 128
+RGB_YCRCB = (((fix(0.299), fix(0.587), fix(0.114)),
+              ONE_HALF - (128 << SCALEBITS)),
+             ((fix(0.5), fix(-0.4187), fix(-0.0813)), ONE_HALF - 1),
+             ((fix(-0.1687), fix(-0.3317), fix(0.5)), ONE_HALF - 1))
+
+# The fixed point weights of Cr (red), Cb (blue) and Cb, Cr (green)
+CR_R = fix(1.403)
+CB_B = fix(1.773)
+CB_G = fix(-0.344)
+CR_G = fix(-0.7141)
+
+
+def rgb_to_ycrcb(rgb, planes) -> None:
+    """
+    A function that converts rows of RGB pixels to level shifted Y,
+    Cr, Cb samples and writes them into the planes in one pass
+
+    Parameters
+    ----------
+    rgb : ndarray
+        (rows, cols, 3) uint8 array of RGB pixels
+    planes : sequence
+        The Y, Cr, Cb arrays (or views of padded planes) with the
+        dimensions (rows, cols) that receive the samples
+    """
+    total = np.empty(rgb.shape[0:2], dtype=np.int32)
+    part = np.empty(rgb.shape[0:2], dtype=np.int32)
+    for plane, (weights, rounding) in zip(planes, RGB_YCRCB):
+        np.multiply(rgb[:, :, 0], weights[0], out=total, dtype=np.int32)
+        for channel in (1, 2):
+            np.multiply(rgb[:, :, channel], weights[channel], out=part,
+                        dtype=np.int32)
+            np.add(total, part, out=total)
+        np.add(total, rounding, out=total)
+        np.right_shift(total, SCALEBITS, out=total)
+        plane[...] = total
+
+
+def ycrcb_to_rgb(Y, Cr, Cb, out, factors=(1, 1)) -> None:
+    """
+    A function that converts rows of level shifted Y, Cr, Cb samples
+    to RGB pixels and writes them into a uint8 array in one pass
+
+    The samples are rounded and limited to the range -128 to 127
+    (as the IDCT output of libjpeg). The chroma terms are computed
+    at the resolution of the chroma rows and then upsampled
+
+    Parameters
+    ----------
+    Y : ndarray
+        (rows, cols) array of level shifted luma samples
+    Cr, Cb : ndarray
+        the level shifted chroma rows of Y, subsampled by factors
+    out : ndarray
+        (rows, cols, 3) uint8 array (or view) that receives the pixels
+    factors : tuple
+        the (row, column) subsampling factors of Cr and Cb
+    """
+    rows, cols = Y.shape
+    y = limit(Y)
+    np.add(y, 128, out=y)
+    cr = limit(Cr)
+    cb = limit(Cb)
+
+    # Chroma terms: R = Y + red, G = Y + green, B = Y + blue
+    red = np.multiply(cr, CR_R)
+    green = np.multiply(cb, CB_G)
+    np.multiply(cr, CR_G, out=cr)
+    np.add(green, cr, out=green)
+    blue = np.multiply(cb, CB_B, out=cb)
+    for channel, term in ((0, red), (1, green), (2, blue)):
+        np.add(term, ONE_HALF, out=term)
+        np.right_shift(term, SCALEBITS, out=term)
+        if factors != (1, 1):
+            term = upsample(term, factors, rows, cols)
+        np.add(term, y, out=term)
+        np.clip(term, 0, 255, out=term)
+        out[:, :, channel] = term
+
+
+def limit(plane) -> np.ndarray:
+    """
+    A function that rounds level shifted samples to int32 values in
+    the range -128 to 127
+
+    Returns
+    -------
+    ndarray:
+        new int32 array with the dimensions of plane
+    """
+    if np.issubdtype(plane.dtype, np.integer):
+        samples = plane.astype(np.int32)
+    else:
+        samples = np.rint(plane).astype(np.int32)
+    return (np.clip(samples, -128, 127, out=samples))
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+"""
+A module that controls the data types and the memory used by the
+Encoder and the Decoder
+
+Variables
+---------
+DTYPE_POLICIES : dict
+    The dtype policies keyed by name
+    float32:
+        Y, Cr, Cb planes and the DCT coefficients are float32
+    int16:
+        Y, Cr, Cb planes hold rounded int16 samples and the quantized
+        coefficients are written back into the same int16 planes.
+        The three planes then take twice the memory of the uint8
+        input image
+MEMMAP_PIXELS : int or None
+    Images with at least this many pixels get Y, Cr, Cb planes (and
+    a decoded RGB array) backed by memory mapped scratch files
+    instead of heap memory (see configure_memmap). None never maps
+SCRATCH_DIR : str or None
+    The directory of the scratch files. None uses the temporary
+    directory of the system
+
+Note
+----
+Without a policy (dtype=None) the Encoder and Decoder keep their
+original float64/int64 planes
+
+Peak memory
+-----------
+The peak of a whole image stays above twice the size of the uint8
+input. With int16 the three 4:4:4 planes alone take twice the input,
+and the decoded input is still held while they are filled. On a
+1920 X 1280 image (7.0MB) picture peaks at about 24MB (int16), 39MB
+(float32) and 68MB (no policy). Of the int16 peak, 14MB are the
+planes, 5.5MB the symbols of a band of the JPEG writer (MAX_BLOCKS)
+and the rest the decoded input file. 4:2:0 keeps full resolution
+chroma from RGB2YCrCb until sampling. Only stream (one MCU row at a
+time, see codec.stream) stays below the input size (about 1.5MB)
+"""
+
+# Python modules
+import tempfile
+import tracemalloc
+import numpy as np
+
+MEMMAP_PIXELS = 1 << 28
+SCRATCH_DIR = None
+
+
+class DtypePolicy:
+    """
+    A dtype policy for the planes of the Encoder and the Decoder
+
+    Parameters
+    ----------
+    name : str
+        The name of the policy
+    work : numpy dtype
+        The float data type of the temporary arrays
+    sample : numpy dtype
+        The data type of the Y, Cr, Cb planes
+    """
+
+    def __init__(self, name, work, sample):
+        self.name = name
+        self.work = np.dtype(work)
+        self.sample = np.dtype(sample)
+
+    @property
+    def integer(self):
+        return (np.issubdtype(self.sample, np.integer))
+
+
+DTYPE_POLICIES = {
+    'float32': DtypePolicy('float32', np.float32, np.float32),
+    'int16': DtypePolicy('int16', np.float32, np.int16)
+}
+
+
+def get_dtype_policy(name):
+    """
+    A function that returns a dtype policy by name
+
+    Parameters
+    ----------
+    name : str or None
+        The name of the policy. None means no policy
+
+    Returns
+    -------
+    DtypePolicy or None
+    """
+    if name is None:
+        return (None)
+    if name not in DTYPE_POLICIES:
+        raise ValueError(f'No dtype policy named {name}')
+    return (DTYPE_POLICIES[name])
+
+
+def configure_memmap(pixels=1 << 28, directory=None) -> None:
+    """
+    A function that sets the pixel count above which planes are
+    memory mapped and the directory of the scratch files
+
+    Parameters
+    ----------
+    pixels : int or None
+        The smallest image (width * height) whose planes are memory
+        mapped. None never maps planes automatically
+    directory : str or None
+        The directory of the scratch files
+    """
+    global MEMMAP_PIXELS, SCRATCH_DIR
+    if pixels is not None and (not isinstance(pixels, int) or pixels < 1):
+        raise ValueError('pixels must be a positive integer or None')
+    MEMMAP_PIXELS = pixels
+    SCRATCH_DIR = directory
+
+
+def use_memmap(pixels, memmap=None) -> bool:
+    """
+    A function that decides if the planes of an image are memory
+    mapped
+
+    Parameters
+    ----------
+    pixels : int
+        The number of pixels of the image
+    memmap : bool or None
+        True or False to force the choice. None maps images with at
+        least MEMMAP_PIXELS pixels
+
+    Returns
+    -------
+    bool
+    """
+    if memmap is None:
+        return (MEMMAP_PIXELS is not None and pixels >= MEMMAP_PIXELS)
+    return (bool(memmap))
+
+
+def allocate(shape, dtype, mapped=False) -> np.ndarray:
+    """
+    A function that allocates an uninitialized plane on the heap or in
+    a memory mapped scratch file
+
+    The scratch file is an unnamed temporary file, so it is removed
+    by the system as soon as the plane is garbage collected (or the
+    process ends)
+
+    Parameters
+    ----------
+    shape : tuple
+        The shape of the plane
+    dtype : numpy dtype
+        The data type of the plane
+    mapped : bool
+        True to back the plane with a scratch file
+
+    Returns
+    -------
+    ndarray or np.memmap
+    """
+    if not mapped:
+        return (np.empty(shape, dtype=dtype))
+    with tempfile.TemporaryFile(prefix='compjpeg-',
+                                dir=SCRATCH_DIR) as scratch:
+        # The mapping stays valid after the file is closed
+        return (np.memmap(scratch, dtype=dtype, mode='w+', shape=shape))
+
+
+def store(plane, values) -> None:
+    """
+    A function that writes float values into a plane, rounding them
+    first if the plane holds integers
+
+    Parameters
+    ----------
+    plane : ndarray
+        the array (or view) that receives the values
+    values : ndarray
+        array with the same shape as plane. Float values may be
+        modified in place
+    """
+    if (np.issubdtype(plane.dtype, np.integer)
+            and not np.issubdtype(values.dtype, np.integer)):
+        np.rint(values, out=values)
+    plane[...] = values
+
+
+def format_size(size) -> str:
+    """
+    A function that formats a number of bytes like get_image_size
+
+    Example
+    -------
+        $ format_size(489)
+        $ > 489B
+        $ format_size(23345)
+        $ > 23.3KB
+    """
+    identifier = ['B', 'KB', 'MB', 'GB', 'TB']
+    index = 0
+    size = float(size)
+    while size >= 1000 and index < len(identifier) - 1:
+        size /= 1000
+        index += 1
+    if index == 0:
+        return (f'{int(size)}B')
+    if size < 10:
+        return (f'{size:.2f}{identifier[index]}')
+    if size < 100:
+        return (f'{size:.1f}{identifier[index]}')
+    return (f'{size:.0f}{identifier[index]}')
+
+
+class MemoryTracker:
+    """
+    A context manager that measures the peak memory allocated by
+    python and numpy inside the with block
+
+    tracemalloc slows the codec down by about 11%, so a tracker only
+    measures when it is enabled. A disabled tracker leaves peak None
+
+    Parameters
+    ----------
+    enabled : bool
+        True to trace the allocations of the with block
+
+    Example
+    -------
+        $ with MemoryTracker(True) as tracker:
+        $     compress_image(filename, quality)
+        $ tracker.peak
+        $ > 51200000
+    """
+
+    def __init__(self, enabled=True):
+        self.peak = None
+        self.__enabled = enabled
+        self.__started = False
+
+    def __enter__(self):
+        if not self.__enabled:
+            return (self)
+        # A tracker nested in another one does not reset the peak of
+        # the outer tracker
+        self.__started = not tracemalloc.is_tracing()
+        if self.__started:
+            tracemalloc.start()
+        self.__base = tracemalloc.get_traced_memory()[0]
+        return (self)
+
+    def __exit__(self, *args):
+        if not self.__enabled:
+            return (False)
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak = peak - self.__base
+        if self.__started:
+            tracemalloc.stop()
+        return (False)
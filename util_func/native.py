@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""
+A module that loads the DCT and quantization kernels
+(C_library/transform.c) and the Huffman decoder (C_library/huffman.c)
+of the C library with ctypes
+
+The kernels get the data pointers of the numpy arrays, so the blocks
+and the planes are transformed in place without a copy. The library
+is optional: LIBRARY is None when C_library/liball.so is missing or
+was built without the kernels (run make in C_library). The 'native'
+transform backend then falls back to numpy and the JPEG reader to
+its Python decoder
+
+Variables
+---------
+LIBRARY_PATH : str
+    The path of the shared library
+LIBRARY : CDLL or None
+    The loaded library
+KINDS : dict
+    The element type codes of the plane kernels keyed by numpy dtype
+"""
+
+# Python modules
+import os
+import numpy as np
+from ctypes import CDLL
+from ctypes import c_int
+from ctypes import c_long
+from ctypes import c_void_p
+
+LIBRARY_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'C_library', 'liball.so')
+
+KERNELS = ('fdct_blocks', 'idct_blocks', 'quantize_blocks',
+           'dequantize_blocks', 'compress_plane', 'decompress_plane',
+           'decode_interval')
+
+KINDS = {
+    np.dtype(np.float64): 0,
+    np.dtype(np.float32): 1,
+    np.dtype(np.int16): 2,
+    np.dtype(np.int32): 3,
+    np.dtype(np.int64): 4
+}
+
+
+def load_library(path=LIBRARY_PATH):
+    """
+    A function that loads the kernels of a shared library
+
+    Parameters
+    ----------
+    path : str
+        The path of the shared library
+
+    Returns
+    -------
+    CDLL or None:
+        The library with the argument types of the kernels set, or
+        None if it can not be loaded or lacks a kernel
+    """
+    try:
+        library = CDLL(path)
+    except OSError:
+        return (None)
+    if not all(hasattr(library, name) for name in KERNELS):
+        return (None)
+
+    blocks = np.ctypeslib.ndpointer(np.float64, flags='C_CONTIGUOUS')
+    table = np.ctypeslib.ndpointer(np.float64, shape=(8, 8),
+                                   flags='C_CONTIGUOUS')
+    for name in KERNELS[0:4]:
+        kernel = getattr(library, name)
+        kernel.argtypes = [blocks, c_long, table]
+        kernel.restype = None
+    library.compress_plane.argtypes = [c_void_p, c_int, c_long, c_long,
+                                       table, table]
+    library.compress_plane.restype = c_int
+    library.decompress_plane.argtypes = [c_void_p, c_int, c_long, c_long,
+                                         table, table, c_int]
+    library.decompress_plane.restype = c_int
+    library.decode_interval.argtypes = [
+        np.ctypeslib.ndpointer(np.uint8, flags='C_CONTIGUOUS'), c_long,
+        np.ctypeslib.ndpointer(np.int64, flags='C_CONTIGUOUS'), c_long,
+        np.ctypeslib.ndpointer(np.int16, flags='C_CONTIGUOUS'),
+        np.ctypeslib.ndpointer(np.int32, flags='C_CONTIGUOUS'), c_int]
+    library.decode_interval.restype = c_int
+    return (library)
+
+
+LIBRARY = load_library()
@@ -8,7 +8,30 @@ Implentation of padding for 3D array
 import numpy as np
 
 
-def pad_array3d(array, width, height, paddedWidth, paddedHeight):
+def pad_edges(array, width, height) -> None:
+    """
+    A function that pads a preallocated 2D or 3D array in place by
+    copying the last row and the last column of the width X height
+    region into the rest of the array
+
+    Parameters
+    ----------
+    array : ndarray
+        Numpy 2D or 3D array that already has the padded dimensions
+        and holds the image data in array[0:width, 0:height]
+    width : int
+        the original width of the array
+    height : int
+        the original height of the array
+    """
+
+    # Extend the last element of the rows and columns to fill the matrix
+    array[width:, 0:height] = array[width - 1:width, 0:height]
+    array[:, height:] = array[:, height - 1:height]
+
+
+def pad_array3d(array, width, height, paddedWidth, paddedHeight,
+                dtype=np.int64):
     """
     A function that pads a 3D numpy array to ensure multiples of 8 on both
     rows and columns
@@ -25,6 +48,8 @@ def pad_array3d(array, width, height, paddedWidth, paddedHeight):
         the padded width of the array
     paddedHeight : int
         the padded height of the array
+    dtype : numpy dtype
+        the data type of the padded array
 
     Return
     ------
@@ -33,40 +58,19 @@ def pad_array3d(array, width, height, paddedWidth, paddedHeight):
         individual 2D arrays are divisible by 8
     """
 
-    # Create a 2X2 array for the three channels of the image matrix
-    # Using '1' as the default element
-    R = np.ones((paddedWidth, paddedHeight), dtype=np.int64)
-    B = np.ones((paddedWidth, paddedHeight), dtype=np.int64)
-    G = np.ones((paddedWidth, paddedHeight), dtype=np.int64)
-
-    # split the image data into 2X2 and copy into RGB array
-    R[0:width:, 0:height] = array[:, :, 0]
-    B[0:width:, 0:height] = array[:, :, 1]
-    G[0:width:, 0:height] = array[:, :, 2]
-
-    w_diff = paddedWidth - width
-    h_diff = paddedHeight - height
+    # Create the padded array for the three channels of the image
+    # matrix and copy the image data into it
+    ar = np.empty((paddedWidth, paddedHeight, array.shape[2]), dtype=dtype)
+    ar[0:width, 0:height] = array
 
     # Extend the last element of the rows and columns to fill the matrix
-    for w in range(w_diff):
-        last = w + width
-        R[last:last + 1, 0:paddedHeight] = R[width - 1:width, 0:paddedHeight]
-        B[last:last + 1, 0:paddedHeight] = B[width - 1:width, 0:paddedHeight]
-        G[last:last + 1, 0:paddedHeight] = G[width - 1:width, 0:paddedHeight]
-
-    for h in range(h_diff):
-        last = h + height
-        R[0:paddedWidth, last: last + 1] = R[0:paddedWidth, height - 1:height]
-        G[0:paddedWidth, last: last + 1] = G[0:paddedWidth, height - 1:height]
-        B[0:paddedWidth, last: last + 1] = B[0:paddedWidth, height - 1:height]
+    pad_edges(ar, width, height)
 
-    # Stack the RBG as a 3D numpy array
-    array = np.stack((R, B, G), axis=-1)
-
-    return (array)
+    return (ar)
 
 
-def pad_array2d(array, width, height, paddedWidth, paddedHeight):
+def pad_array2d(array, width, height, paddedWidth, paddedHeight,
+                dtype=np.int64):
     """
     A function that pads a 2D numpy array to ensure multiples of 8 on both
     rows and columns
@@ -83,6 +87,8 @@ def pad_array2d(array, width, height, paddedWidth, paddedHeight):
         the padded width of the array
     paddedHeight : int
         the padded height of the array
+    dtype : numpy dtype
+        the data type of the padded array
 
     Return
     ------
@@ -90,29 +96,17 @@ def pad_array2d(array, width, height, paddedWidth, paddedHeight):
         2D numpy array that both the height and the width are divisible by 8
     """
 
-    # Create a 2X2 array using '1' as the default element
-    ar = np.ones((paddedWidth, paddedHeight), dtype=np.int64)
-
-    # Copy previous array elements into the new array
-    ar[0:width:, 0:height] = array[:, :]
-
-    w_diff = paddedWidth - width
-    h_diff = paddedHeight - height
+    # Create the padded array and copy previous array elements into it
+    ar = np.empty((paddedWidth, paddedHeight), dtype=dtype)
+    ar[0:width, 0:height] = array
 
     # Extend the last element of the rows and columns to fill the matrix
-    for w in range(w_diff):
-        last = w + width
-        ar[last:last + 1, 0:paddedHeight] = ar[width - 1:width, 0:paddedHeight]
-
-    for h in range(h_diff):
-        last = h + height
-        ar[0:paddedWidth, last: last + 1] =\
-            ar[0:paddedWidth, height - 1:height]
+    pad_edges(ar, width, height)
 
     return (ar)
 
 
-def pad_array(array, paddedWidth, paddedHeight):
+def pad_array(array, paddedWidth, paddedHeight, dtype=None):
     """
     A function that pads a 3D or 2D numpy array to
     ensure multiples of 8 on bothrows and columns
@@ -125,6 +119,8 @@ def pad_array(array, paddedWidth, paddedHeight):
         the padded width of the array
     paddedHeight : int
         the padded height of the array
+    dtype : numpy dtype
+        the data type of the padded array. Defaults to int64
 
     Return
     ------
@@ -152,7 +148,9 @@ def pad_array(array, paddedWidth, paddedHeight):
     if (w == paddedWidth) and (h == paddedHeight):
         return (array)
 
+    if dtype is None:
+        dtype = np.int64
     if dim == 2:
-        return pad_array2d(array, w, h, paddedWidth, paddedHeight)
+        return pad_array2d(array, w, h, paddedWidth, paddedHeight, dtype)
     else:
-        return pad_array3d(array, w, h, paddedWidth, paddedHeight)
+        return pad_array3d(array, w, h, paddedWidth, paddedHeight, dtype)
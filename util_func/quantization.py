@@ -9,12 +9,35 @@ Variables
 QUANTIZATION_LUMA_50 : list
     2D numpy array for the JPEG standard at a quantization ratio
     of 50 for luminance
-QUANTIZATION_LUMA_50 : list
+QUANTIZATION_CHROMA_50 : list
     2D numpy array for the JPEG standard at a quantization ratio
     of 50 for chrominance
+TABLE_SETS : dict
+    The registered base (quality 50) tables keyed by table set name
+    {name: (luma_table, chroma_table)}. 'standard' holds the JPEG
+    standard tables and more can be added with load_quant_tables
+
+Classes
+-------
+QuantTable :
+    A quantization table for one (quality, channel, table set,
+    transform backend) with its reciprocal precomputed so that
+    quantization is a multiply. The scale factors of the transform
+    backend are folded into the reciprocal and the dequantization
+    multiplier. For integer backends the reciprocal is a fixed point
+    integer and quantization is a multiply and a right shift.
+    QuantTable objects are created once by get_quant_table and are
+    reused for every block of every image
 
 Formula
 -------
+    # Integer quantization of a coefficient x by a divisor d
+    $ reciprocal = ceil(2 ** 32 / d)
+    $ q = ((abs(x) + d // 2) * reciprocal) >> 32
+    $ q = -q if x < 0
+    # which equals round(x / d) with halves rounded away from zero
+    # for every abs(x) < 2 ** 20
+
     # Q - quantization table for JPEG 50 standard
     # quality = the quantization faction
     # IF QUALITY >= 50:
@@ -29,6 +52,11 @@ Matrix - An array of array | 2D array
 
 # Python module required
 import numpy as np
+from functools import lru_cache
+
+# Modules (functions) from util_func package
+from util_func.transform import get_backend
+from util_func.transform import integer_blocks
 
 QUANTIZATION_CHROMA_50 = np.array((
     (17, 18, 24, 47, 99, 99, 99, 99),
@@ -53,6 +81,39 @@ QUANTIZATION_LUMA_50 = np.array((
 ))
 
 
+TABLE_SETS = {
+    'standard': (QUANTIZATION_LUMA_50, QUANTIZATION_CHROMA_50)
+}
+
+
+def scale_table(table, quality):
+    """
+    A function that scales a quality 50 quantization table to the
+    user quality
+
+    parameters
+    ----------
+    table : ndarray
+        8X8 quantization table for quality 50
+    quality : int
+        the compression quality
+
+    Returns
+    ------
+    ndarray :
+        An 8X8 nd array of integers ranging from 0-255
+    """
+
+    if quality >= 50:
+        ratio = (100 - quality) / 50
+    else:
+        ratio = 50 / quality
+
+    # Ensure no value passes 255
+    quant = (table * ratio).round().astype(int)
+    return (np.minimum(quant, 255))
+
+
 def get_quantRatio(quality, channel='all'):
     """
     A function that computes the quantization array of array from the user
@@ -88,26 +149,9 @@ def get_quantRatio(quality, channel='all'):
     if quality < 1 or quality > 100:
         raise ValueError('Quality must be between 1 and 100')
 
-    if quality >= 50:
-        ratio = (100 - quality) / 50
-    else:
-        ratio = 50 / quality
-
-    # Get quantization table for luma
-    luma_quant = QUANTIZATION_LUMA_50 * ratio
-    luma_quant = luma_quant.round().astype(int)
-
-    # Get quantization table for chroma
-    chroma_quant = QUANTIZATION_CHROMA_50 * ratio
-    chroma_quant = chroma_quant.round().astype(int)
-
-    # Ensure no value passes 255 or are below 256
-    luma_array = np.minimum(luma_quant, 255)
-    chroma_array = np.minimum(chroma_quant, 255)
-
-    # # Using lamda to ensure values are below 256
-    # mat = list(map(lambda x: list(map(
-    #     lambda y: 255 if y > 255 else y, x)),luma_quant))
+    # Get quantization table for luma and chroma
+    luma_array = scale_table(QUANTIZATION_LUMA_50, quality)
+    chroma_array = scale_table(QUANTIZATION_CHROMA_50, quality)
 
     if (channel.lower() == 'luma'):
         return (luma_array)
@@ -117,25 +161,219 @@ def get_quantRatio(quality, channel='all'):
     return (luma_array, chroma_array)
 
 
-def quantize(array, quality, channel):
+class QuantTable:
     """
-    Function that quantizes an 8X8 subsection of an nd array
+    A precomputed quantization table
 
     Parameters
     ----------
-    array: ndarray
-        8X8 subsection of an image ndarray
-    quality: int
-        the quality needed for quantization
-    channel: str ['luma' or 'chroma']
-        the color channel that is to be quantized
+    table : ndarray
+        8X8 integer quantization table (read only)
+    reciprocal : ndarray
+        8X8 table of 1 / (table * forward_scale) (read only)
+    multiplier : ndarray
+        8X8 table of table * inverse_scale (read only)
+    integer : bool
+        True if the table quantizes the int32 output of an integer
+        transform backend
 
-    Returns
+    Methods
     -------
-    ndarray:
-        The dequantized subsection of the array
+    quantize:
+        quantizes an array of 8X8 blocks
+    de_quantize:
+        dequantizes an array of 8X8 blocks
+    """
+
+    def __init__(self, table, forward_scale=None, inverse_scale=None,
+                 integer=False):
+        """
+        Instance attributes
+
+        Attributes
+        ----------
+        table : ndarray
+            8X8 array of integers ranging from 1-255
+        forward_scale : ndarray
+            8X8 scale factors of the forward transform output
+        inverse_scale : ndarray
+            8X8 scale factors expected by the inverse transform
+        integer : bool
+            True to quantize with integer multiply-shift arithmetic
+        """
+        table = np.array(table, dtype=int)
+        if table.shape != (8, 8):
+            raise TypeError('Quantization table must be an 8X8 array')
+        if np.any(table < 1) or np.any(table > 255):
+            raise ValueError('Quantization table values must be '
+                             'between 1 and 255')
+
+        self.__table = table
+        self.__scaled = inverse_scale is not None
+        self.__integer = integer
+        if integer:
+            divisor = table.astype(np.int64)
+            if forward_scale is not None:
+                divisor = divisor * np.asarray(forward_scale, dtype=np.int64)
+            self.__divisor = divisor
+            self.__half = divisor // 2
+            self.__reciprocal = ((1 << 32) + divisor - 1) // divisor
+        elif forward_scale is None:
+            self.__reciprocal = 1 / table
+        else:
+            self.__reciprocal = 1 / (table * forward_scale)
+        if inverse_scale is None:
+            self.__multiplier = table
+        else:
+            self.__multiplier = table * inverse_scale
+        self.__table.flags.writeable = False
+        self.__reciprocal.flags.writeable = False
+        self.__multiplier.flags.writeable = False
+
+    @property
+    def table(self):
+        return self.__table
+
+    @property
+    def reciprocal(self):
+        return self.__reciprocal
+
+    @property
+    def multiplier(self):
+        return self.__multiplier
+
+    @property
+    def integer(self):
+        return self.__integer
+
+    def quantize(self, blocks):
+        """
+        Quantizes an array of 8X8 blocks
+
+        Parameters
+        ----------
+        blocks : ndarray
+            nd array of 8X8 blocks with shape (..., 8, 8)
+
+        Returns
+        -------
+        ndarray:
+            The quantized blocks
+        """
+        if self.__integer:
+            magnitude = np.abs(blocks).astype(np.int64)
+            magnitude += self.__half
+            magnitude *= self.__reciprocal
+            magnitude >>= 32
+            quant = magnitude.astype(np.int32)
+            return (np.negative(quant, out=quant, where=blocks < 0))
+        return (np.round(np.multiply(blocks, self.__reciprocal)))
+
+    def de_quantize(self, blocks):
+        """
+        Dequantizes an array of 8X8 blocks
+
+        Parameters
+        ----------
+        blocks : ndarray
+            nd array of 8X8 blocks with shape (..., 8, 8)
+
+        Returns
+        -------
+        ndarray:
+            The dequantized blocks
+        """
+        if self.__integer:
+            return (np.multiply(integer_blocks(blocks), self.__multiplier,
+                                dtype=np.int32))
+        if self.__scaled:
+            return (np.multiply(blocks, self.__multiplier))
+        return (np.round(np.multiply(blocks, self.__multiplier)))
+
+
+def load_quant_tables(name, luma, chroma) -> None:
+    """
+    A function that registers custom quality 50 quantization tables
+    so that they can be used by name for a whole batch of images
+
+    Parameters
+    ----------
+    name : str
+        The name of the table set
+    luma : ndarray
+        8X8 quantization table for the Y channel at quality 50
+    chroma : ndarray
+        8X8 quantization table for the CrCb channels at quality 50
     """
+    if not isinstance(name, str) or not name:
+        raise TypeError('Table set name must be a non empty string')
+
+    tables = []
+    for table in (luma, chroma):
+        table = np.array(table, dtype=int)
+        if table.shape != (8, 8):
+            raise TypeError('Quantization table must be an 8X8 array')
+        if np.any(table < 1) or np.any(table > 255):
+            raise ValueError('Quantization table values must be '
+                             'between 1 and 255')
+        tables.append(table)
+
+    TABLE_SETS[name] = tuple(tables)
+    # Tables of a replaced set must not be served from the cache
+    get_quant_table.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_quant_table(quality, channel='luma', table_set='standard',
+                    backend=None):
+    """
+    A function that returns the cached QuantTable of a quality,
+    channel, table set and transform backend
+
+    parameters
+    ----------
+    quality : int
+        the compression quality
+    channel : str ['luma' or 'chroma']
+        the color channel for the quantization
+    table_set : str
+        the name of a table set in TABLE_SETS
+    backend : str or None
+        the name of the transform backend whose scale factors are
+        folded into the table. None is the default backend
+
+    Returns
+    ------
+    QuantTable :
+        the precomputed quantization table
+    """
+
     # Handle input errors
+    if not isinstance(quality, int):
+        raise TypeError('Quality must be an integer')
+    if not isinstance(channel, str):
+        raise TypeError("channel is not a string")
+    if channel.lower().strip() not in ['luma', 'chroma']:
+        raise ValueError('channel must be either "luma" or "chroma"')
+    if quality < 5 or quality > 95:  # Avert ZeroDivisionError
+        raise ValueError('Quality must be between 1 and 100')
+    if table_set not in TABLE_SETS:
+        raise ValueError(f'No quantization table set named {table_set}')
+
+    transform = get_backend(backend)
+    luma, chroma = TABLE_SETS[table_set]
+    if channel.lower().strip() == 'luma':
+        table = scale_table(luma, quality)
+    else:
+        table = scale_table(chroma, quality)
+    return (QuantTable(table, transform.forward_scale,
+                       transform.inverse_scale, transform.integer))
+
+
+def check_block(array):
+    """
+    Function that raises an error if array is not an 8X8 array
+    """
     if not isinstance(array, np.ndarray):
         raise TypeError('Array must be a numpy array')
 
@@ -144,17 +382,44 @@ def quantize(array, quality, channel):
         raise TypeError('Array must be a 2d 8X8 array')
     if dim[0] != 8 or dim[1] != 8:
         raise TypeError('Array must be an 8X8 array')
-    if channel.lower().strip() not in ['luma', 'chroma']:
-        raise ValueError('channel must be either "luma" or "chroma"')
-    if not isinstance(quality, int):
-        raise TypeError('Quality must be an integer')
-    if quality < 5 or quality > 95:  # Avert ZeroDivisionError
-        raise ValueError('Quality must be between 1 and 100')
-    quant_ratio = get_quantRatio(quality, channel)
-    return (np.round(np.divide(array, quant_ratio)))
 
 
-def de_quantize(array, quality, channel):
+def check_blocks(blocks):
+    """
+    Function that raises an error if blocks is not an array of
+    8X8 blocks
+    """
+    if not isinstance(blocks, np.ndarray):
+        raise TypeError('Array must be a numpy array')
+    if blocks.ndim < 2 or blocks.shape[-2:] != (8, 8):
+        raise TypeError('Array must be an array of 8X8 blocks')
+
+
+def quantize(array, quality, channel, table_set='standard'):
+    """
+    Function that quantizes an 8X8 subsection of an nd array
+
+    Parameters
+    ----------
+    array: ndarray
+        8X8 subsection of an image ndarray
+    quality: int
+        the quality needed for quantization
+    channel: str ['luma' or 'chroma']
+        the color channel that is to be quantized
+    table_set: str
+        the name of the quantization table set
+
+    Returns
+    -------
+    ndarray:
+        The quantized subsection of the array
+    """
+    check_block(array)
+    return (get_quant_table(quality, channel, table_set).quantize(array))
+
+
+def de_quantize(array, quality, channel, table_set='standard'):
     """
     Function that dequantizes an 8X8 subsection of an nd array
 
@@ -166,27 +431,132 @@ def de_quantize(array, quality, channel):
         the quality needed for dequantization
     channel: str ['luma' or 'chroma']
         the color channel that is to be deuantized
+    table_set: str
+        the name of the quantization table set
 
     Returns
     -------
     ndarray:
         The dequantized subsection of the array
     """
+    check_block(array)
+    return (get_quant_table(quality, channel, table_set).de_quantize(array))
 
-    # Handle input errors
-    if not isinstance(array, np.ndarray):
-        raise TypeError('Array must be a numpy array')
 
-    dim = array.shape
-    if len(dim) != 2:
-        raise TypeError('Array must be a 2d 8X8 array')
-    if dim[0] != 8 or dim[1] != 8:
-        raise TypeError('Array must be an 8X8 array')
-    if channel.lower().strip() not in ['luma', 'chroma']:
-        raise ValueError('channel must be either "luma" or "chroma"')
-    if not isinstance(quality, int):
-        raise TypeError('Quality must be an integer')
-    if quality < 5 or quality > 95:
-        raise ValueError('Quality must be between 1 and 100')
-    quant_ratio = get_quantRatio(quality, channel)
-    return (np.round(np.multiply(array, quant_ratio)))
+def quantize_blocks(blocks, quality, channel, table_set='standard'):
+    """
+    Function that quantizes every 8X8 block of an array of blocks
+    at once
+
+    Parameters
+    ----------
+    blocks: ndarray
+        nd array of 8X8 blocks with shape (..., 8, 8)
+    quality: int
+        the quality needed for quantization
+    channel: str ['luma' or 'chroma']
+        the color channel that is to be quantized
+    table_set: str
+        the name of the quantization table set
+
+    Returns
+    -------
+    ndarray:
+        The quantized blocks with the same shape as blocks
+    """
+    check_blocks(blocks)
+    return (get_quant_table(quality, channel, table_set).quantize(blocks))
+
+
+def de_quantize_blocks(blocks, quality, channel, table_set='standard'):
+    """
+    Function that dequantizes every 8X8 block of an array of blocks
+    at once
+
+    Parameters
+    ----------
+    blocks: ndarray
+        nd array of 8X8 blocks with shape (..., 8, 8)
+    quality: int
+        the quality needed for dequantization
+    channel: str ['luma' or 'chroma']
+        the color channel that is to be dequantized
+    table_set: str
+        the name of the quantization table set
+
+    Returns
+    -------
+    ndarray:
+        The dequantized blocks with the same shape as blocks
+    """
+    check_blocks(blocks)
+    return (get_quant_table(quality, channel, table_set).de_quantize(blocks))
+
+
+def requantize_blocks(blocks, source, target):
+    """
+    Function that converts quantized 8X8 blocks from one quantization
+    table to another without leaving the DCT domain
+
+    Parameters
+    ----------
+    blocks: ndarray
+        nd array of quantized 8X8 blocks with shape (..., 8, 8)
+    source: ndarray
+        8X8 quantization table the blocks were quantized with
+    target: ndarray
+        8X8 quantization table to quantize the blocks with
+
+    Returns
+    -------
+    ndarray:
+        The requantized blocks, round(blocks * source / target)
+
+    Formula
+    -------
+        $ q_target = round(q_source * source[u][v] / target[u][v])
+    """
+    check_blocks(blocks)
+    for table in (source, target):
+        if np.shape(table) != (8, 8):
+            raise TypeError('Quantization table must be an 8X8 array')
+    ratio = np.asarray(source, dtype=np.float64) / \
+        np.asarray(target, dtype=np.float64)
+    return (np.round(np.multiply(blocks, ratio)))
+
+
+def estimate_quality(table, base=QUANTIZATION_LUMA_50) -> int:
+    """
+    Function that estimates the IJG (libjpeg) quality a quantization
+    table was scaled to from its quality 50 table
+
+    Parameters
+    ----------
+    table: ndarray
+        8X8 quantization table in natural order (the luma table of a
+        JPEG file)
+    base: ndarray
+        8X8 quality 50 table the table was scaled from
+
+    Returns
+    -------
+    int:
+        The quality 1 to 100 whose IJG table is closest to the table.
+        Of qualities with equally close tables the highest is chosen
+
+    Formula
+    -------
+        # The IJG scaling of the quality 50 table
+        $ scale = 5000 // quality if quality < 50 else 200 - 2 * quality
+        $ table = clip((base * scale + 50) // 100, 1, 255)
+    """
+    if np.shape(table) != (8, 8):
+        raise TypeError('Quantization table must be an 8X8 array')
+    qualities = np.arange(1, 101)
+    scales = np.where(qualities < 50, 5000 // qualities,
+                      200 - 2 * qualities)
+    tables = np.clip((base[np.newaxis] * scales[:, None, None] + 50) // 100,
+                     1, 255)
+    error = np.abs(tables - np.asarray(table)[np.newaxis]).sum(axis=(1, 2))
+    best = np.flatnonzero(error == error.min())[-1]
+    return (int(qualities[best]))
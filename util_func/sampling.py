@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+A module that implements chroma subsampling (downsampling of the
+Cr and Cb channels) and the matching upsampling
+
+Variables
+---------
+SUBSAMPLING : dict
+    The subsampling modes keyed by name. The values are the
+    (row, column) factors by which the chroma channels are reduced
+        4:4:4 - (1, 1) chroma at full resolution
+        4:2:2 - (1, 2) half the chroma columns
+        4:2:0 - (2, 2) half the chroma rows and columns
+
+Note
+----
+With subsampling the MCU (minimum coded unit) holds
+(8 * row_factor) X (8 * column_factor) luma pixels and one 8X8
+block of each chroma channel, so the luma channel is padded to
+multiples of the MCU dimensions
+"""
+
+# Python modules
+import numpy as np
+from math import ceil
+
+SUBSAMPLING = {
+    '4:4:4': (1, 1),
+    '4:2:2': (1, 2),
+    '4:2:0': (2, 2)
+}
+
+
+def get_factors(subsampling):
+    """
+    A function that returns the (row, column) factors of a
+    subsampling mode
+
+    Parameters
+    ----------
+    subsampling : str
+        The name of the subsampling mode
+
+    Returns
+    -------
+    tuple:
+        (row_factor : int, column_factor : int)
+    """
+    if subsampling not in SUBSAMPLING:
+        raise ValueError('subsampling must be "4:4:4, 4:2:2 or 4:2:0"')
+    return (SUBSAMPLING[subsampling])
+
+
+def chroma_dimensions(width, height, factors):
+    """
+    A function that returns the dimensions of a subsampled channel
+
+    Parameters
+    ----------
+    width : int
+        the width (rows) of the full resolution channel
+    height : int
+        the height (columns) of the full resolution channel
+    factors : tuple
+        the (row, column) subsampling factors
+
+    Returns
+    -------
+    tuple:
+        (width : int, height : int)
+    """
+    return (ceil(width / factors[0]), ceil(height / factors[1]))
+
+
+def downsample(plane, factors):
+    """
+    A function that reduces a channel by averaging every
+    row_factor X column_factor group of values
+
+    Parameters
+    ----------
+    plane : ndarray
+        2D array of a full resolution chroma channel
+    factors : tuple
+        the (row, column) subsampling factors
+
+    Returns
+    -------
+    ndarray:
+        2D float array with the dimensions given by
+        chroma_dimensions. Odd edges are averaged with a copy of
+        the last row or column
+    """
+    fr, fc = factors
+    if fr == 1 and fc == 1:
+        return (plane)
+
+    width, height = plane.shape
+    w, h = chroma_dimensions(width, height, factors)
+    extra = ((0, w * fr - width), (0, h * fc - height))
+    if extra[0][1] or extra[1][1]:
+        plane = np.pad(plane, extra, mode='edge')
+    return (plane.reshape(w, fr, h, fc).mean(axis=(1, 3)))
+
+
+def upsample(plane, factors, width=None, height=None):
+    """
+    A function that brings a subsampled channel back to full
+    resolution by repeating every value row_factor X column_factor
+    times
+
+    Parameters
+    ----------
+    plane : ndarray
+        2D array of a subsampled chroma channel
+    factors : tuple
+        the (row, column) subsampling factors
+    width : int
+        the width (rows) of the full resolution channel
+    height : int
+        the height (columns) of the full resolution channel
+
+    Returns
+    -------
+    ndarray:
+        2D array with the full resolution dimensions
+    """
+    fr, fc = factors
+    if fr > 1:
+        plane = np.repeat(plane, fr, axis=0)
+    if fc > 1:
+        plane = np.repeat(plane, fc, axis=1)
+    return (plane[0:width, 0:height])
@@ -9,6 +9,52 @@ Variables
 cosine_array: list of list
     The discreet cosine transform matrix that will be used in
     multiplying the 8X8 block to yield the transformed image matrix
+aan_scale: ndarray
+    The AAN scale factors aan_scale[k] = sqrt(2) * cos(k * pi / 16)
+    with aan_scale[0] = 1
+BACKENDS: dict
+    The registered transform backends keyed by name
+DEFAULT_BACKEND: str
+    The backend used when no name is given ('matrix'). The exact
+    scipy backend takes about twice the time of matrix on one thread,
+    so it is only used when it is asked for by name
+
+Backends
+--------
+    matrix:
+        The dense cosine_array matrix product (FDCT_blocks and
+        IDCT_blocks). cosine_array is rounded to 4 decimals
+    scipy (only registered if SciPy is installed):
+        The exact orthonormal type II DCT of scipy.fft.dctn and
+        idctn over the last two axes of the stacked blocks. Each
+        call runs on one thread, the bands of the Encoder and the
+        Decoder are already spread over their workers
+    aan:
+        The factored (Arai, Agui and Nakajima) DCT and IDCT used by
+        the float path of libjpeg. It needs 5 multiplications per 8
+        point transform instead of 64 and returns coefficients that
+        are scaled by forward_scale. The scale is folded into the
+        quantization table (see quantization.get_quant_table) so the
+        quantized coefficients are the same as the matrix ones. In
+        numpy its butterflies are many small array operations, so it
+        takes about twice the time of the matrix backend
+    native:
+        The matrix transform computed by the C kernels of
+        C_library/transform.c (see native.LIBRARY). Whole planes are
+        transformed and quantized in place by compress_plane and
+        decompress_plane, with the same output as the matrix backend
+        and about a third of its time. Without the library it is the
+        matrix backend
+    islow:
+        The integer (Loeffler, Ligtenberg and Moschytz) DCT and IDCT
+        of the islow path of libjpeg. Cosine constants are scaled by
+        2 ** CONST_BITS and all the arithmetic is done on int32, so
+        the results are the same on every machine. The forward
+        output is scaled by 8, which is folded into the integer
+        multiply-shift quantization. It is for deterministic results
+        (the same coefficients for the caches on every machine), not
+        for throughput: in numpy it takes about 2.7 times as long as
+        the matrix backend
 
 Formular
 --------
@@ -29,7 +75,17 @@ cosine_array implementation is from the function get_cosine_array
 
 # Python modules required
 import numpy as np
-from math import cos, sqrt
+from math import cos, sqrt, pi
+
+# SciPy is optional (see ScipyBackend)
+try:
+    from scipy import fft as scipy_fft
+except ImportError:
+    scipy_fft = None
+
+# Modules (functions) from util_func package
+from util_func.native import KINDS
+from util_func.native import LIBRARY
 
 cosine_array = np.array([
     [0.3536, 0.3536, 0.3536, 0.3536, 0.3536, 0.3536, 0.3536, 0.3536],
@@ -150,3 +206,796 @@ def IDCT(array):
         raise TypeError('Array must be an 8X8 array')
 
     return (np.dot(np.dot(cosine_array.T, array), cosine_array))
+
+
+def FDCT_blocks(blocks):
+    """
+    A function that implements (Foward) DCT on every 8X8 block of
+    an array of blocks at once
+
+    Parameters
+    ----------
+    blocks: ndarray
+        nd array of 8X8 blocks with shape (..., 8, 8)
+
+    Formula
+    -------
+        # the same formula as FDCT is broadcast over the leading
+        # dimensions of blocks
+        $ result[...] = cosine_array * blocks[...] * cosine_array.T
+
+    Returns
+    -------
+    ndarray:
+        DCT transformed blocks with the same shape as blocks
+    """
+
+    if not isinstance(blocks, np.ndarray):
+        raise TypeError('Array must be a numpy array')
+    if blocks.ndim < 2 or blocks.shape[-2:] != (8, 8):
+        raise TypeError('Array must be an array of 8X8 blocks')
+
+    # np.matmul - matrix multiplication broadcast over all the blocks
+    return (np.matmul(np.matmul(cosine_array, blocks), cosine_array.T))
+
+
+def IDCT_blocks(blocks):
+    """
+    A function that implements inverse DCT on every 8X8 block of
+    an array of blocks at once
+
+    Parameters
+    ----------
+    blocks: ndarray
+        nd array of 8X8 blocks with shape (..., 8, 8)
+
+    Formula
+    -------
+        # the same formula as IDCT is broadcast over the leading
+        # dimensions of blocks
+        $ result[...] = cosine_array.T * blocks[...] * cosine_array
+
+    Returns
+    -------
+    ndarray:
+        inverse DCT transformed blocks with the same shape as blocks
+    """
+
+    if not isinstance(blocks, np.ndarray):
+        raise TypeError('Array must be a numpy array')
+    if blocks.ndim < 2 or blocks.shape[-2:] != (8, 8):
+        raise TypeError('Array must be an array of 8X8 blocks')
+
+    return (np.matmul(np.matmul(cosine_array.T, blocks), cosine_array))
+
+
+aan_scale = np.array([1.0] + [sqrt(2) * cos(k * pi / 16) for k in range(1, 8)])
+
+
+class TransformBackend:
+    """
+    The matrix transform backend and the base class of all
+    transform backends
+
+    Parameters
+    ----------
+    name : str
+        The name the backend is registered with
+    forward_scale : ndarray or None
+        8X8 factors that forward multiplies the true DCT
+        coefficients by. None if the coefficients are not scaled
+    inverse_scale : ndarray or None
+        8X8 factors that inverse expects the DCT coefficients to
+        be multiplied by. None if no scaling is expected
+
+    Methods
+    -------
+    forward:
+        DCT of an array of 8X8 blocks
+    inverse:
+        inverse DCT of an array of 8X8 blocks
+    compress_plane:
+        DCT and quantization of a whole plane in place
+    decompress_plane:
+        dequantization and inverse DCT of a whole plane in place
+    """
+
+    name = 'matrix'
+    integer = False
+    forward_scale = None
+    inverse_scale = None
+
+    def forward(self, blocks):
+        """
+        Forward DCT of an array of blocks with shape (..., 8, 8)
+        """
+        return (FDCT_blocks(blocks))
+
+    def inverse(self, blocks):
+        """
+        Inverse DCT of an array of blocks with shape (..., 8, 8)
+        """
+        return (IDCT_blocks(blocks))
+
+    def compress_plane(self, plane, table) -> bool:
+        """
+        Transforms and quantizes a C-contiguous padded plane in place
+
+        Parameters
+        ----------
+        plane : ndarray
+            2D array whose dimensions are multiples of 8
+        table : QuantTable
+            The quantization table of the plane
+
+        Returns
+        -------
+        bool:
+            False if the backend has no plane kernel for the plane,
+            in which case the caller uses forward and the table
+        """
+        return (False)
+
+    def decompress_plane(self, plane, table, round_samples=False) -> bool:
+        """
+        Dequantizes and inverse transforms a C-contiguous padded plane
+        in place
+
+        Parameters
+        ----------
+        plane : ndarray
+            2D array whose dimensions are multiples of 8
+        table : QuantTable
+            The quantization table of the plane
+        round_samples : bool
+            True to round the samples written to an integer plane
+            (they are truncated otherwise, as by put_blocks)
+
+        Returns
+        -------
+        bool:
+            False if the backend has no plane kernel for the plane,
+            in which case the caller uses the table and inverse
+        """
+        return (False)
+
+
+# The DCT matrix in the layout of the C kernels
+cosine_kernel = np.ascontiguousarray(cosine_array, dtype=np.float64)
+
+
+def native_blocks(blocks, kernel):
+    """
+    A function that applies a C block kernel to a float64 copy of
+    an array of blocks
+
+    Parameters
+    ----------
+    blocks : ndarray
+        nd array of 8X8 blocks with shape (..., 8, 8)
+    kernel : function
+        LIBRARY.fdct_blocks or LIBRARY.idct_blocks
+
+    Returns
+    -------
+    ndarray:
+        the transformed blocks with the same shape as blocks
+    """
+    if not isinstance(blocks, np.ndarray):
+        raise TypeError('Array must be a numpy array')
+    if blocks.ndim < 2 or blocks.shape[-2:] != (8, 8):
+        raise TypeError('Array must be an array of 8X8 blocks')
+
+    result = np.array(blocks, dtype=np.float64, order='C')
+    kernel(result, result.size // 64, cosine_kernel)
+    return (result)
+
+
+class NativeBackend(TransformBackend):
+    """
+    The matrix transform backend computed by the kernels of the C
+    library
+
+    The kernels return the coefficients of the matrix backend (up to
+    the rounding of the float sums). The plane kernels read every
+    8X8 block straight from the plane, so no block arrays are made.
+    Without the library every method is the one of the matrix backend
+    """
+
+    name = 'native'
+
+    @property
+    def available(self):
+        return LIBRARY is not None
+
+    def forward(self, blocks):
+        """
+        Forward DCT of an array of blocks with shape (..., 8, 8)
+        """
+        if LIBRARY is None:
+            return (FDCT_blocks(blocks))
+        return (native_blocks(blocks, LIBRARY.fdct_blocks))
+
+    def inverse(self, blocks):
+        """
+        Inverse DCT of an array of blocks with shape (..., 8, 8)
+        """
+        if LIBRARY is None:
+            return (IDCT_blocks(blocks))
+        return (native_blocks(blocks, LIBRARY.idct_blocks))
+
+    def compress_plane(self, plane, table) -> bool:
+        """
+        Transforms and quantizes a padded plane in place with the
+        compress_plane kernel (see TransformBackend.compress_plane)
+        """
+        kind = self.__kind(plane)
+        if kind is None:
+            return (False)
+        status = LIBRARY.compress_plane(
+            plane.ctypes.data, kind, plane.shape[0], plane.shape[1],
+            cosine_kernel, np.ascontiguousarray(table.reciprocal))
+        if status != 0:
+            raise RuntimeError('The native compress_plane kernel failed')
+        return (True)
+
+    def decompress_plane(self, plane, table, round_samples=False) -> bool:
+        """
+        Dequantizes and inverse transforms a padded plane in place with
+        the decompress_plane kernel (see
+        TransformBackend.decompress_plane)
+        """
+        kind = self.__kind(plane)
+        if kind is None:
+            return (False)
+        multiplier = np.ascontiguousarray(table.multiplier,
+                                          dtype=np.float64)
+        status = LIBRARY.decompress_plane(
+            plane.ctypes.data, kind, plane.shape[0], plane.shape[1],
+            cosine_kernel, multiplier, int(round_samples))
+        if status != 0:
+            raise RuntimeError('The native decompress_plane kernel failed')
+        return (True)
+
+    def __kind(self, plane):
+        """
+        Returns the element type code of a plane the plane kernels can
+        work on, or None
+        """
+        if LIBRARY is None or not isinstance(plane, np.ndarray):
+            return (None)
+        if (plane.ndim != 2 or not plane.flags.c_contiguous
+                or not plane.flags.writeable
+                or plane.shape[0] % 8 or plane.shape[1] % 8):
+            return (None)
+        return (KINDS.get(plane.dtype))
+
+
+class ScipyBackend(TransformBackend):
+    """
+    The transform backend of scipy.fft
+
+    The blocks get the exact orthonormal DCT, so the coefficients
+    differ from the matrix ones by the rounding of cosine_array
+    (about 1e-4 of their magnitude)
+
+    Parameters
+    ----------
+    workers : int
+        The number of threads of every scipy.fft call. -1 uses every
+        CPU. The registered backend uses 1, since the Encoder band
+        threads and the batch processes already run calls in parallel
+    """
+
+    name = 'scipy'
+
+    def __init__(self, workers=1):
+        if scipy_fft is None:
+            raise ValueError('The scipy backend needs SciPy')
+        self.__workers = workers
+
+    @property
+    def workers(self):
+        return self.__workers
+
+    def forward(self, blocks):
+        """
+        Forward DCT of an array of blocks with shape (..., 8, 8)
+        """
+        if not isinstance(blocks, np.ndarray):
+            raise TypeError('Array must be a numpy array')
+        if blocks.ndim < 2 or blocks.shape[-2:] != (8, 8):
+            raise TypeError('Array must be an array of 8X8 blocks')
+        return (scipy_fft.dctn(blocks, type=2, axes=(-2, -1), norm='ortho',
+                               workers=self.__workers))
+
+    def inverse(self, blocks):
+        """
+        Inverse DCT of an array of blocks with shape (..., 8, 8)
+        """
+        if not isinstance(blocks, np.ndarray):
+            raise TypeError('Array must be a numpy array')
+        if blocks.ndim < 2 or blocks.shape[-2:] != (8, 8):
+            raise TypeError('Array must be an array of 8X8 blocks')
+        return (scipy_fft.idctn(blocks, type=2, axes=(-2, -1),
+                                norm='ortho', workers=self.__workers))
+
+
+def aan_fdct_1d(d):
+    """
+    The AAN forward butterflies of 8 point rows
+
+    Parameters
+    ----------
+    d : list of ndarray
+        the 8 input points, each an ndarray of the same shape
+
+    Returns
+    -------
+    list of ndarray:
+        the 8 scaled DCT coefficients
+    """
+    out = [None] * 8
+
+    tmp0 = d[0] + d[7]
+    tmp7 = d[0] - d[7]
+    tmp1 = d[1] + d[6]
+    tmp6 = d[1] - d[6]
+    tmp2 = d[2] + d[5]
+    tmp5 = d[2] - d[5]
+    tmp3 = d[3] + d[4]
+    tmp4 = d[3] - d[4]
+
+    # Even part
+    tmp10 = tmp0 + tmp3
+    tmp13 = tmp0 - tmp3
+    tmp11 = tmp1 + tmp2
+    tmp12 = tmp1 - tmp2
+
+    out[0] = tmp10 + tmp11
+    out[4] = tmp10 - tmp11
+    z1 = (tmp12 + tmp13) * 0.707106781
+    out[2] = tmp13 + z1
+    out[6] = tmp13 - z1
+
+    # Odd part
+    tmp10 = tmp4 + tmp5
+    tmp11 = tmp5 + tmp6
+    tmp12 = tmp6 + tmp7
+
+    z5 = (tmp10 - tmp12) * 0.382683433
+    z2 = tmp10 * 0.541196100 + z5
+    z4 = tmp12 * 1.306562965 + z5
+    z3 = tmp11 * 0.707106781
+    z11 = tmp7 + z3
+    z13 = tmp7 - z3
+
+    out[5] = z13 + z2
+    out[3] = z13 - z2
+    out[1] = z11 + z4
+    out[7] = z11 - z4
+    return (out)
+
+
+def aan_idct_1d(d):
+    """
+    The AAN inverse butterflies of 8 point rows
+
+    Parameters
+    ----------
+    d : list of ndarray
+        the 8 scaled DCT coefficients, each an ndarray of the
+        same shape
+
+    Returns
+    -------
+    list of ndarray:
+        the 8 output points
+    """
+    out = [None] * 8
+
+    # Even part
+    tmp10 = d[0] + d[4]
+    tmp11 = d[0] - d[4]
+    tmp13 = d[2] + d[6]
+    tmp12 = (d[2] - d[6]) * 1.414213562 - tmp13
+
+    tmp0 = tmp10 + tmp13
+    tmp3 = tmp10 - tmp13
+    tmp1 = tmp11 + tmp12
+    tmp2 = tmp11 - tmp12
+
+    # Odd part
+    z13 = d[5] + d[3]
+    z10 = d[5] - d[3]
+    z11 = d[1] + d[7]
+    z12 = d[1] - d[7]
+
+    tmp7 = z11 + z13
+    tmp11 = (z11 - z13) * 1.414213562
+    z5 = (z10 + z12) * 1.847759065
+    tmp10 = z12 * 1.082392200 - z5
+    tmp12 = z10 * -2.613125930 + z5
+
+    tmp6 = tmp12 - tmp7
+    tmp5 = tmp11 - tmp6
+    tmp4 = tmp10 + tmp5
+
+    out[0] = tmp0 + tmp7
+    out[7] = tmp0 - tmp7
+    out[1] = tmp1 + tmp6
+    out[6] = tmp1 - tmp6
+    out[2] = tmp2 + tmp5
+    out[5] = tmp2 - tmp5
+    out[4] = tmp3 + tmp4
+    out[3] = tmp3 - tmp4
+    return (out)
+
+
+def separable_2d(blocks, butterflies, chunk=512):
+    """
+    A function that applies 1D butterflies to the rows and then the
+    columns of every 8X8 block
+
+    The blocks are processed in chunks that fit in the CPU cache and
+    every chunk is moved to a (8, 8, chunk) layout first, so that
+    every input point of the butterflies is a contiguous array that
+    holds that point for all the blocks of the chunk
+
+    Parameters
+    ----------
+    blocks : ndarray
+        nd array of 8X8 blocks with shape (..., 8, 8)
+    butterflies : function
+        aan_fdct_1d or aan_idct_1d
+    chunk : int
+        The number of blocks transformed together
+
+    Returns
+    -------
+    ndarray:
+        the transformed blocks with the same shape as blocks
+    """
+    if not isinstance(blocks, np.ndarray):
+        raise TypeError('Array must be a numpy array')
+    if blocks.ndim < 2 or blocks.shape[-2:] != (8, 8):
+        raise TypeError('Array must be an array of 8X8 blocks')
+
+    flat = blocks.reshape(-1, 8, 8)
+    result = np.empty(flat.shape, dtype=np.float64)
+    for start in range(0, flat.shape[0], chunk):
+        work = np.ascontiguousarray(
+            np.moveaxis(flat[start:start + chunk], 0, -1), dtype=np.float64)
+
+        # Rows: work[i, j] holds point j of row i of every block
+        rows = butterflies([work[:, j] for j in range(8)])
+        for j in range(8):
+            work[:, j] = rows[j]
+        # Columns: work[i] holds row i of every block
+        cols = butterflies([work[i] for i in range(8)])
+        for i in range(8):
+            work[i] = cols[i]
+
+        result[start:start + chunk] = np.moveaxis(work, -1, 0)
+
+    return (result.reshape(blocks.shape))
+
+
+class AANBackend(TransformBackend):
+    """
+    The factored AAN transform backend
+
+    The forward transform returns DCT[u][v] * forward_scale[u][v]
+    and the inverse transform expects DCT[u][v] * inverse_scale[u][v],
+    where
+        $ forward_scale[u][v] = 8 * aan_scale[u] * aan_scale[v]
+        $ inverse_scale[u][v] = aan_scale[u] * aan_scale[v] / 8
+    """
+
+    name = 'aan'
+    forward_scale = 8 * np.outer(aan_scale, aan_scale)
+    inverse_scale = np.outer(aan_scale, aan_scale) / 8
+
+    def forward(self, blocks):
+        """
+        Scaled forward DCT of an array of blocks with shape (..., 8, 8)
+        """
+        return (separable_2d(blocks, aan_fdct_1d))
+
+    def inverse(self, blocks):
+        """
+        Inverse DCT of an array of scaled blocks with shape (..., 8, 8)
+        """
+        return (separable_2d(blocks, aan_idct_1d))
+
+
+# Fixed point constants of the islow transform
+CONST_BITS = 13
+PASS1_BITS = 2
+FIX_0_298631336 = 2446
+FIX_0_390180644 = 3196
+FIX_0_541196100 = 4433
+FIX_0_765366865 = 6270
+FIX_0_899976223 = 7373
+FIX_1_175875602 = 9633
+FIX_1_501321110 = 12299
+FIX_1_847759065 = 15137
+FIX_1_961570560 = 16069
+FIX_2_053119869 = 16819
+FIX_2_562915447 = 20995
+FIX_3_072711026 = 25172
+
+
+def descale(x, n):
+    """
+    Right shift of an integer array by n bits with rounding
+    """
+    return ((x + (1 << (n - 1))) >> n)
+
+
+def islow_odd(tmp4, tmp5, tmp6, tmp7):
+    """
+    The rotations of the odd part that are shared by the islow
+    forward and inverse transforms
+
+    Returns
+    -------
+    tuple:
+        the four odd outputs scaled by 2 ** CONST_BITS
+    """
+    z1 = tmp4 + tmp7
+    z2 = tmp5 + tmp6
+    z3 = tmp4 + tmp6
+    z4 = tmp5 + tmp7
+    z5 = (z3 + z4) * FIX_1_175875602
+
+    tmp4 = tmp4 * FIX_0_298631336
+    tmp5 = tmp5 * FIX_2_053119869
+    tmp6 = tmp6 * FIX_3_072711026
+    tmp7 = tmp7 * FIX_1_501321110
+    z1 = z1 * -FIX_0_899976223
+    z2 = z2 * -FIX_2_562915447
+    z3 = z3 * -FIX_1_961570560 + z5
+    z4 = z4 * -FIX_0_390180644 + z5
+
+    return (tmp4 + z1 + z3, tmp5 + z2 + z4,
+            tmp6 + z2 + z3, tmp7 + z1 + z4)
+
+
+def islow_fdct_1d(d, first_pass):
+    """
+    The islow forward butterflies of 8 point rows
+
+    Parameters
+    ----------
+    d : list of ndarray
+        the 8 int32 input points
+    first_pass : bool
+        True for the rows (output scaled up by 2 ** PASS1_BITS) and
+        False for the columns (that scaling is removed)
+
+    Returns
+    -------
+    list of ndarray:
+        the 8 scaled DCT coefficients
+    """
+    out = [None] * 8
+    if first_pass:
+        bits = CONST_BITS - PASS1_BITS
+    else:
+        bits = CONST_BITS + PASS1_BITS
+
+    tmp0 = d[0] + d[7]
+    tmp7 = d[0] - d[7]
+    tmp1 = d[1] + d[6]
+    tmp6 = d[1] - d[6]
+    tmp2 = d[2] + d[5]
+    tmp5 = d[2] - d[5]
+    tmp3 = d[3] + d[4]
+    tmp4 = d[3] - d[4]
+
+    # Even part
+    tmp10 = tmp0 + tmp3
+    tmp13 = tmp0 - tmp3
+    tmp11 = tmp1 + tmp2
+    tmp12 = tmp1 - tmp2
+
+    if first_pass:
+        out[0] = (tmp10 + tmp11) << PASS1_BITS
+        out[4] = (tmp10 - tmp11) << PASS1_BITS
+    else:
+        out[0] = descale(tmp10 + tmp11, PASS1_BITS)
+        out[4] = descale(tmp10 - tmp11, PASS1_BITS)
+
+    z1 = (tmp12 + tmp13) * FIX_0_541196100
+    out[2] = descale(z1 + tmp13 * FIX_0_765366865, bits)
+    out[6] = descale(z1 + tmp12 * -FIX_1_847759065, bits)
+
+    # Odd part
+    odd = islow_odd(tmp4, tmp5, tmp6, tmp7)
+    out[7] = descale(odd[0], bits)
+    out[5] = descale(odd[1], bits)
+    out[3] = descale(odd[2], bits)
+    out[1] = descale(odd[3], bits)
+    return (out)
+
+
+def islow_idct_1d(d, first_pass):
+    """
+    The islow inverse butterflies of 8 point rows
+
+    Parameters
+    ----------
+    d : list of ndarray
+        the 8 int32 dequantized coefficients
+    first_pass : bool
+        True for the columns and False for the rows, which also
+        remove the scaling of the transform
+
+    Returns
+    -------
+    list of ndarray:
+        the 8 output points
+    """
+    out = [None] * 8
+    if first_pass:
+        bits = CONST_BITS - PASS1_BITS
+    else:
+        bits = CONST_BITS + PASS1_BITS + 3
+
+    # Even part
+    z1 = (d[2] + d[6]) * FIX_0_541196100
+    tmp2 = z1 + d[6] * -FIX_1_847759065
+    tmp3 = z1 + d[2] * FIX_0_765366865
+    tmp0 = (d[0] + d[4]) << CONST_BITS
+    tmp1 = (d[0] - d[4]) << CONST_BITS
+
+    tmp10 = tmp0 + tmp3
+    tmp13 = tmp0 - tmp3
+    tmp11 = tmp1 + tmp2
+    tmp12 = tmp1 - tmp2
+
+    # Odd part
+    tmp0, tmp1, tmp2, tmp3 = islow_odd(d[7], d[5], d[3], d[1])
+
+    out[0] = descale(tmp10 + tmp3, bits)
+    out[7] = descale(tmp10 - tmp3, bits)
+    out[1] = descale(tmp11 + tmp2, bits)
+    out[6] = descale(tmp11 - tmp2, bits)
+    out[2] = descale(tmp12 + tmp1, bits)
+    out[5] = descale(tmp12 - tmp1, bits)
+    out[3] = descale(tmp13 + tmp0, bits)
+    out[4] = descale(tmp13 - tmp0, bits)
+    return (out)
+
+
+def integer_blocks(blocks):
+    """
+    A function that returns blocks as int32, rounding float blocks
+    """
+    if not isinstance(blocks, np.ndarray):
+        raise TypeError('Array must be a numpy array')
+    if blocks.ndim < 2 or blocks.shape[-2:] != (8, 8):
+        raise TypeError('Array must be an array of 8X8 blocks')
+    if not np.issubdtype(blocks.dtype, np.integer):
+        blocks = np.rint(blocks)
+    return (blocks.astype(np.int32, copy=False))
+
+
+def separable_2d_int(blocks, butterflies, rows_first):
+    """
+    A function that applies 1D integer butterflies to the rows and
+    the columns of every int32 8X8 block
+
+    Parameters
+    ----------
+    blocks : ndarray
+        int32 nd array of 8X8 blocks with shape (..., 8, 8)
+    butterflies : function
+        islow_fdct_1d or islow_idct_1d
+    rows_first : bool
+        True to transform the rows in the first pass
+
+    Returns
+    -------
+    ndarray:
+        int32 transformed blocks with the same shape as blocks
+    """
+    flat = blocks.reshape(-1, 8, 8)
+    work = np.ascontiguousarray(np.moveaxis(flat, 0, -1))
+
+    if rows_first:
+        passes = ((1, True), (0, False))
+    else:
+        passes = ((0, True), (1, False))
+    for axis, first_pass in passes:
+        if axis == 1:
+            points = [work[:, k] for k in range(8)]
+        else:
+            points = [work[k] for k in range(8)]
+        points = butterflies(points, first_pass)
+        for k in range(8):
+            if axis == 1:
+                work[:, k] = points[k]
+            else:
+                work[k] = points[k]
+
+    return (np.moveaxis(work, -1, 0).reshape(blocks.shape))
+
+
+class IslowBackend(TransformBackend):
+    """
+    The integer islow transform backend
+
+    It gives the same int32 results on every machine but is slower
+    than the matrix backend (see the module docstring). The forward transform returns 8 * DCT[u][v] as int32 and the
+    inverse transform expects the plain dequantized coefficients
+    and returns the int32 level shifted samples
+    """
+
+    name = 'islow'
+    integer = True
+    forward_scale = np.full((8, 8), 8)
+    inverse_scale = None
+
+    def forward(self, blocks):
+        """
+        Scaled integer DCT of an array of blocks with shape (..., 8, 8)
+        """
+        return (separable_2d_int(integer_blocks(blocks),
+                                 islow_fdct_1d, True))
+
+    def inverse(self, blocks):
+        """
+        Integer inverse DCT of an array of blocks with shape (..., 8, 8)
+        """
+        return (separable_2d_int(integer_blocks(blocks),
+                                 islow_idct_1d, False))
+
+
+BACKENDS = {}
+
+
+def register_backend(backend) -> None:
+    """
+    A function that registers a transform backend by its name
+
+    Parameters
+    ----------
+    backend : TransformBackend
+        An instance of TransformBackend or of a subclass
+    """
+    if not isinstance(backend, TransformBackend):
+        raise TypeError('backend must be a TransformBackend')
+    BACKENDS[backend.name] = backend
+
+
+def get_backend(name=None):
+    """
+    A function that returns a registered transform backend
+
+    Parameters
+    ----------
+    name : str or None
+        The name of the backend. None returns DEFAULT_BACKEND
+
+    Returns
+    -------
+    TransformBackend:
+        The backend registered with name
+    """
+    if name is None:
+        name = DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f'No transform backend named {name}')
+    return (BACKENDS[name])
+
+
+register_backend(TransformBackend())
+register_backend(AANBackend())
+register_backend(IslowBackend())
+register_backend(NativeBackend())
+if scipy_fft is not None:
+    register_backend(ScipyBackend())
+
+DEFAULT_BACKEND = 'matrix'
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""
+A module that runs independent pieces of work (restart segments,
+tiles, images) on a pool of worker threads or processes
+
+Note
+----
+Threads suit work that is done by numpy on large arrays (numpy
+releases the GIL). Work that loops in python needs processes, whose
+arguments and results are pickled between the processes
+"""
+
+# Python modules
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
+
+
+def get_workers(workers):
+    """
+    A function that returns the number of workers to use
+
+    Parameters
+    ----------
+    workers : int or None
+        The number of workers. None uses every CPU
+
+    Returns
+    -------
+    int:
+        the number of workers (at least 1)
+    """
+    if workers is None:
+        return (os.cpu_count() or 1)
+    if not isinstance(workers, int) or isinstance(workers, bool):
+        raise TypeError('workers must be an integer')
+    if workers < 1:
+        raise ValueError('workers must be at least 1')
+    return (workers)
+
+
+class WorkerPool:
+    """
+    A context manager with a map that runs on a pool of workers, or
+    in the calling thread when there is only one worker
+
+    Parameters
+    ----------
+    workers : int or None
+        The number of workers. None uses every CPU
+    processes : bool
+        True to use worker processes instead of threads
+
+    Example
+    -------
+        $ with WorkerPool(4) as pool:
+        $     results = list(pool.map(encode_segment, segments))
+    """
+
+    def __init__(self, workers=1, processes=False):
+        self.workers = get_workers(workers)
+        self.processes = processes
+        self.__executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            if self.processes:
+                self.__executor = ProcessPoolExecutor(self.workers)
+            else:
+                self.__executor = ThreadPoolExecutor(self.workers)
+        return (self)
+
+    def __exit__(self, *args):
+        if self.__executor:
+            self.__executor.shutdown()
+            self.__executor = None
+        return (False)
+
+    def map(self, function, *iterables):
+        """
+        Calls function on the items of the iterables
+
+        Returns
+        -------
+        iterator:
+            the results in the order of the items
+        """
+        if self.__executor is None:
+            return (map(function, *iterables))
+        return (self.__executor.map(function, *iterables))